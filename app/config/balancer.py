@@ -1,4 +1,7 @@
 class BatchBalance:
     ASSET_REMOTE_LOADING_SIZE = 1000
     MARKET_REMOTE_LOADING_SIZE = 1000
-    RELOADING_MSEC = 5000
\ No newline at end of file
+    RELOADING_MSEC = 5000
+    CURSOR_BATCH_SIZE = 12
+    # Points of the embedded quote arrays pulled for sparklines and growth (the 60-day window)
+    SERIES_WINDOW = 60
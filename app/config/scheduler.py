@@ -15,5 +15,7 @@ class Schedule:
     LONG_WAITING_DELAY = 3000
 
     ACCUMULATED_TASKS = 100
+    MAX_CONCURRENT_TASKS = 16
+    USER_RESERVED_TASKS = 4
 
     CHANGE_DELAY = 2000
\ No newline at end of file
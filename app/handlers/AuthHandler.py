@@ -6,7 +6,7 @@ from typing import Callable
 from pymongo.mongo_client import MongoClient
 
 from app.windows.WarningDialog import Warning
-from utils.databases import mongoGet
+from utils.asyncDatabases import asyncMongoGet
 from utils.paths import getFileSystemPath
 from utils.envHandler import getenv
 from utils.asyncJobs import asyncWrap
@@ -58,8 +58,12 @@ async def read_auth_level(connection: MongoClient) -> int:
         user_email = file_res.get('email', '')
 
         if user_email:
-            asyncMongoGet = asyncWrap(mongoGet)
-            users = await asyncMongoGet(database='UsersAuth', collection="users", limit=int(1e7), connection=connection) # Use a verly large limit to avoid returned range not including user
+            users = await asyncMongoGet(
+                database='UsersAuth', 
+                collection="users", 
+                limit=int(1e7), # Use a verly large limit to avoid returned range not including user
+                connection=connection, 
+                projection={"_id": 0, "user.email": 1, "authorizationLevel": 1}) 
 
             this_user = [user for user in users if user['user']['email'] == user_email]
 
@@ -2,7 +2,11 @@ import dotenv
 from datetime import datetime, timedelta
 from typing import Union, Optional, Dict
 
+from pymongo.mongo_client import MongoClient
+
 from utils.databases import mongoGet
+from utils.quoteSeries import QuoteSeries
+from app.config.balancer import BatchBalance
 
 dotenv.load_dotenv()
 
@@ -33,25 +37,40 @@ class Index:
         self.exchangeShortName = args.exchangeShortName
 
 class Series:
-    def __init__(self, asset: Union[Index, Symbol], interval:int = 60):
+    def __init__(self, asset: Union[Index, Symbol], interval:int = BatchBalance.SERIES_WINDOW, connection: Optional[MongoClient] = None):
         self.asset = asset
+        self.interval = interval
+        self.connection = connection
         today = datetime.now().date()
         self.startTime = (today - timedelta(days=interval)).isoformat()
         self.endTime = today.isoformat()
 
-    def historical(self, collection:str):
-        try:
-            docs = mongoGet(collection=collection, symbol=self.asset.symbol)
+    def embeddedQuotes(self, collection: str):
+        # the quotes are stored oldest first: only the last `interval` points are pulled
+        projection = {
+            "_id": 0,
+            "historicalData.symbol": 1,
+            "historicalData.quotes": {"$slice": -self.interval},
+        }
+        docs = mongoGet(collection=collection, symbol=self.asset.symbol, connection=self.connection, projection=projection)
 
-            if not docs:
-                raise Exception("No documents that match this query was found in the database.")
+        if not docs:
+            raise Exception("No documents that match this query was found in the database.")
 
-            data: Dict = list(docs)[0]
+        data: Dict = list(docs)[0]
 
-            target = data["historicalData"]
-            index_symbol = target["symbol"]
+        target = data["historicalData"]
+        return target["symbol"], target["quotes"]
+
+    def historical(self, collection:str):
+        try:
+            # the last `interval` points, as many as the embedded arrays give; fall back to them without the time series
+            quotes = QuoteSeries(self.connection).window(self.asset.symbol, points=self.interval)
+            if quotes:
+                index_symbol = self.asset.symbol
+            else:
+                index_symbol, quotes = self.embeddedQuotes(collection)
             index_name = self.asset.name
-            quotes = target["quotes"]
 
             dates = []
             opens = []
@@ -2,8 +2,7 @@ from pymongo import MongoClient
 
 from app.versions.info import Version
 from utils.logs import Logger
-from utils.databases import mongoGet
-from utils.asyncJobs import asyncWrap
+from utils.asyncDatabases import asyncMongoGet
 
 logger = Logger("VersionControl")
 
@@ -12,7 +11,6 @@ class VersionController:
 
     async def check_for_update(self, screen_resolution: tuple[int, int], connection: MongoClient):
         try:
-            asyncMongoGet = asyncWrap(mongoGet)
             result = await asyncMongoGet(
                 connection=connection,
                 database="versions",
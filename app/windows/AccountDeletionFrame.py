@@ -14,8 +14,8 @@ from app.handlers.AuthHandler import sync_read_user_cred_file
 from utils.appHelper import setRelativeToMainWindow, adjustForDPI, showWindow
 from utils.paths import getFrozenPath, getFileSystemPath
 from utils.envHandler import getenv
-from utils.asyncJobs import asyncWrap, ThreadRun
-from utils.databases  import mongoUpdate, mongoGet, mongoDeleteOne
+from utils.asyncJobs import ThreadRun
+from utils.asyncDatabases import asyncMongoUpdate, asyncMongoGet, asyncMongoDeleteOne
 
 # import resources
 import app.config.resources
@@ -106,7 +106,6 @@ class AccountDeleteTrigger(QFrame):
         userCreds: dict = await ThreadRun(sync_read_user_cred_file)
         userEmail = userCreds.get("email", "")
         # get user details
-        asyncMongoGet = asyncWrap(mongoGet)
         usersInfo = await asyncMongoGet(database="UsersAuth", collection="users", limit=int(1e7), connection=self.connection)
         thisUser = [user for user in usersInfo if user['user']['email'] == userEmail]
         subscriptionId = thisUser[0].get("subscriptionId", None)
@@ -120,8 +119,7 @@ class AccountDeleteTrigger(QFrame):
             await self.cancelPlan(subscriptionId, acessToken, reason)
 
         # delete user from active users
-        asyncMongoDel = asyncWrap(mongoDeleteOne)
-        await asyncMongoDel(database="UsersAuth", collection="users", filter={"user.email": userEmail}, connection=self.connection)
+        await asyncMongoDeleteOne(database="UsersAuth", collection="users", filter={"user.email": userEmail}, connection=self.connection)
         # delete user permanent creds file
         path = Path(
             getFileSystemPath(os.path.join(getenv("APP_BASE_PATH"), "credentials", "credentials.json"))
@@ -130,7 +128,6 @@ class AccountDeleteTrigger(QFrame):
             os.remove(path)
         # user goes in inactive users
         await ThreadRun(self.connection["UsersAuth"]["inactive_users"].insert_one, thisUser[0])
-        asyncMongoUpdate = asyncWrap(mongoUpdate)
         await asyncMongoUpdate(database="UsersAuth", collection="inactive_users", query={"user.email": userEmail}, update={"$set": {"status": "INACTIVE", "reason": reason}}, connection=self.connection)
 
         # then show completion
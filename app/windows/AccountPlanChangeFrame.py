@@ -20,8 +20,8 @@ from app.windows.Styles import msgBoxStyleSheet
 from utils.appHelper import setRelativeToMainWindow, adjustForDPI, showWindow
 from utils.paths import getFrozenPath
 from utils.envHandler import getenv
-from utils.asyncJobs import asyncWrap, ThreadRun
-from utils.databases  import mongoGet, mongoUpdate
+from utils.asyncJobs import ThreadRun
+from utils.asyncDatabases import asyncMongoGet, asyncMongoUpdate
 
 # import resources
 import app.config.resources
@@ -128,7 +128,6 @@ class AccountPlanChange(QFrame):
             messageBox.exec_()
             return
         
-        asyncMongoGet = asyncWrap(mongoGet)
         usersInfo = await asyncMongoGet(database="UsersAuth", collection="users", limit=int(1e7), connection=self.connection)
         thisUser = [user for user in usersInfo if user['user']['email'] == userEmail]
         subscriptionId = thisUser[0].get("subscriptionId", None)
@@ -185,7 +184,6 @@ class AccountPlanChange(QFrame):
             messageBox.exec_()
             return
         
-        asyncMongoGet = asyncWrap(mongoGet)
         usersInfo = await asyncMongoGet(database="UsersAuth", collection="users", limit=int(1e7), connection=self.connection)
         thisUser = [user for user in usersInfo if user['user']['email'] == userEmail]
         subscriptionId = thisUser[0].get("subscriptionId", None)
@@ -310,7 +308,6 @@ class AccountPlanChange(QFrame):
             raise Exception(f"API request failed: {e}")
         
     async def updateUser(self, email, subscription: str, authorizationLevel: int):
-        asyncMongoUpdate = asyncWrap(mongoUpdate)
         _ = await asyncMongoUpdate(
             database=self.dbName, 
             collection=self.collection,
@@ -4,18 +4,19 @@ import asyncio
 from typing import Any
 from PyQt5 import uic
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QEvent, QThread, pyqtSignal, pyqtSlot, QObject
+from PyQt5.QtCore import Qt, QEvent, pyqtSlot
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame, QTextEdit
 from pymongo import MongoClient
 
-from utils.databases import mongoGet
+from utils.databases import mongoGet, materialize, CancellationToken
 from app.windows.Spinner import Spinner
 from app.handlers.Patterns import Index, Symbol
 from app.config.fonts import RobotoSemiBold, RobotoRegular, FontSizePoint
 from app.windows.Styles import chatScrollBarStyle
 from utils.logs import Logger
 from utils.appHelper import clearLayout, adjustForDPI
-from utils.workers import spinnerWork
+from utils.workers import spinnerTask
+from utils.executors import DB_IO, runIn
 from utils.paths import getFrozenPath
 from app.config.renderer import ViewController
 
@@ -58,7 +59,7 @@ class AssetFocusItem(QFrame):
         self.value.setFont(font)
 
 class AssetFocus(QWidget):
-    def __init__(self, symbol:str, connection: MongoClient, parent=None):
+    def __init__(self, symbol:str, connection: MongoClient, async_tasks=None, parent=None):
         super(AssetFocus, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI", "assetFocus.ui"))
         if os.path.exists(path):
@@ -71,8 +72,14 @@ class AssetFocus(QWidget):
         self.symbol = symbol
         self.connection = connection
         self.apikey = os.getenv("FMP_API_KEY")
-        target = mongoGet(collection='ticker', symbol=self.symbol, connection=self.connection)
-        self.target = target[0]['ticker'] if target else None
+        # The ticker document is fetched on first use, off the GUI thread, and abandoned if the window goes away
+        self.queries = CancellationToken()
+        self.target = None
+        self.targetLoad = None
+        # the panels run on the application loop; switching panels cancels the one still loading
+        self.tasks = async_tasks.group("AssetFocus") if async_tasks is not None else None
+        self.panel = None
+        self.spinner = None
 
         self.initUI()
 
@@ -92,6 +99,35 @@ class AssetFocus(QWidget):
         self.scrollArea.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.scrollArea.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
 
+    def hideEvent(self, event):
+        self.queries.cancel()
+        self.cancelPanel()
+        super().hideEvent(event)
+
+    def closeEvent(self, event):
+        self.queries.cancel()
+        self.cancelPanel()
+        super().closeEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.queries.cancelled:
+            self.queries = CancellationToken()
+
+    def queryTarget(self):
+        # lazily decoded: only the section a button asks for is turned into Python objects
+        target = mongoGet(collection='ticker', symbol=self.symbol, connection=self.connection, token=self.queries, raw=True)
+        return target[0]['ticker'] if target else None
+
+    async def loadTarget(self):
+        # the document is queried once, off the GUI thread, and shared by the four panels
+        load = self.targetLoad
+        if load is None or load.cancelled() or (load.done() and load.exception() is not None):
+            load = self.targetLoad = asyncio.ensure_future(runIn(DB_IO, self.queryTarget))
+        # a panel cancelled by a switch must not abandon the query the next panel waits on
+        self.target = await asyncio.shield(load)
+        return self.target
+
     def eventFilter(self, obj, event):
         if event.type() == QEvent.MouseButtonPress:
             if not self.geometry().contains(event.globalPos()):
@@ -108,31 +144,32 @@ class AssetFocus(QWidget):
         self.priceTargets.clicked.connect(self.makePriceTargetsWithSpinner)
 
     async def fetchFinancials(self):
-        await asyncio.sleep(2)
+        await self.loadTarget()
         if not self.target:
             return
-        subTarget = self.target['general']['financials']
+        subTarget = materialize(self.target['general']['financials'])
         # force it to return a list
         return subTarget if subTarget else []
         
     async def fetchMetrics(self):
-        await asyncio.sleep(2)
+        await self.loadTarget()
         if not self.target:
             return
-        subTarget = self.target['analysis']['keyMetricsTTM']
+        subTarget = materialize(self.target['analysis']['keyMetricsTTM'])
         return subTarget if subTarget else []
         
     async def fetchRatios(self):
-        await asyncio.sleep(2)
+        await self.loadTarget()
         if not self.target:
             return
-        subTarget = self.target['analysis']['ratios']
+        subTarget = materialize(self.target['analysis']['ratios'])
         return subTarget if subTarget else []
+
     async def fetchPriceTargets(self):
-        await asyncio.sleep(2)
+        await self.loadTarget()
         if not self.target:
             return
-        subTarget = self.target['general']['priceTarget']
+        subTarget = materialize(self.target['general']['priceTarget'])
         return subTarget if subTarget else []
 
     def populateResult(self, result):
@@ -170,46 +207,27 @@ class AssetFocus(QWidget):
     def populatePriceTargets(self, priceTargets):
         self.populateResult(priceTargets)
 
-    def makeFinancialsWithSpinner(self):
-        self.spinner = Spinner()
+    def cancelPanel(self):
+        if self.panel is not None:
+            self.panel.cancel()
+            self.panel = None
+        if self.spinner is not None:
+            self.spinner.stop()
 
-        self.thread = QThread()
-        self.worker = Worker(self.fetchFinancials)
+    def showPanel(self, fetch, populate):
+        self.cancelPanel()
+        if self.spinner is None:
+            self.spinner = Spinner()
+        self.panel = spinnerTask(self.spinner, fetch(), populate, self.tasks)
 
-        spinnerWork(self.spinner, self.thread, self.worker, self.populateFinancials)
+    def makeFinancialsWithSpinner(self):
+        self.showPanel(self.fetchFinancials, self.populateFinancials)
 
     def makeMetricsWithSpinner(self):
-        self.spinner = Spinner()
-        self.thread = QThread()
-        self.worker = Worker(self.fetchMetrics)
-
-        spinnerWork(self.spinner, self.thread, self.worker, self.populateMetrics)
+        self.showPanel(self.fetchMetrics, self.populateMetrics)
 
     def makeRatiosWithSpinner(self):
-        self.spinner = Spinner()
-        self.thread = QThread()
-        self.worker = Worker(self.fetchRatios)
-
-        spinnerWork(self.spinner, self.thread, self.worker, self.populateRatios)
+        self.showPanel(self.fetchRatios, self.populateRatios)
 
     def makePriceTargetsWithSpinner(self):
-        self.spinner = Spinner()
-        self.thread = QThread()
-        self.worker = Worker(self.fetchPriceTargets)
-
-        spinnerWork(self.spinner, self.thread, self.worker, self.populatePriceTargets)
-
-class Worker(QObject):
-    finished = pyqtSignal()
-    result = pyqtSignal(list)
-
-    def __init__(self, async_func):
-        super(Worker, self).__init__()
-        self.async_func = async_func
-
-    def run(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        financials = loop.run_until_complete(self.async_func())
-        self.result.emit(financials)
-        self.finished.emit()
+        self.showPanel(self.fetchPriceTargets, self.populatePriceTargets)
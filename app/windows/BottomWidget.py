@@ -18,6 +18,7 @@ from app.windows.InsightsWidget import JanineInsights
 from app.windows.CommunityWidget import JanineCommunity
 from app.windows.PlusWidget import ProjectHome
 from utils.paths import getFrozenPath
+from utils.taskScheduler import Priority
 from app.config.renderer import ViewController
 
 # import resources
@@ -39,7 +40,7 @@ class PressInsigthsFrame(QFrame):
     def openInsights(self):
         if not self.insightsWindow:
             self.insightsWindow = JanineInsights(connection=self.connection, async_tasks=self.async_tasks, parent=self.parent())
-            self.async_tasks.append(handleAuth(self.connection, 2, stackOnCurrentWindow, self.insightsWindow))
+            self.async_tasks.submit(handleAuth(self.connection, 2, stackOnCurrentWindow, self.insightsWindow), Priority.USER)
         else:
             self.insightsWindow = None
 
@@ -62,7 +63,7 @@ class PressCommunityFrame(QFrame):
     def openCommunity(self):
         if not self.communityWindow:
             self.communityWindow = JanineCommunity(self.parent())
-            self.async_tasks.append(handleAuth(self.connection, 1, stackOnCurrentWindow, self.communityWindow))
+            self.async_tasks.submit(handleAuth(self.connection, 1, stackOnCurrentWindow, self.communityWindow), Priority.USER)
         else:
             self.communityWindow = None
 
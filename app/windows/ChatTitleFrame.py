@@ -1,7 +1,7 @@
 import os
 from typing import Optional, Callable
 
-from pymongo.database import Database
+from databases.mongodb.JanineDB import JanineMongoDatabase
 from PyQt5 import uic
 from PyQt5.QtCore import Qt, pyqtSignal, QEvent
 from PyQt5.QtWidgets import QFrame, QDialog
@@ -56,7 +56,7 @@ class ChatTitleSelector(QFrame):
 class ChatTitle(QFrame):
     isClicked = pyqtSignal()
     userConfirmedDeletion = pyqtSignal()
-    def __init__(self, title: str, db: Database, func: Optional[Callable[[str], None]] = None, parent = None, gdparent = None):
+    def __init__(self, title: str, db: JanineMongoDatabase, func: Optional[Callable[[str], None]] = None, parent = None, gdparent = None):
         super(ChatTitle, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI", "chatTitle.ui"))
         if os.path.exists(path):
@@ -110,8 +110,7 @@ class ChatTitle(QFrame):
         confirmation.no.connect(self.close)
 
     def deleteSelf(self):
-        self.db.drop_collection(self.title)
-        self.db['metadata'].delete_one({'chat.title': self.title})
+        self.db.dropChat(self.title)
         self.userConfirmedDeletion.emit()
         self.deleteLater()
         # **NOTE**: See app/windows/AttachmentFrame.py: line 47-51 for more details
@@ -124,8 +123,7 @@ class ChatTitle(QFrame):
         titleSelector.show()
 
     def editTitle(self, title: str):
-        self.db['metadata'].update_one({'chat.title': self.title}, {'$set': {'chat.title': title}})
-        self.db[self.title].rename(title)
+        self.db.renameChat(self.title, title)
         self.title = title
         self.setContents()
 
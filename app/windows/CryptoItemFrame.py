@@ -13,6 +13,7 @@ from app.config.fonts import RobotoBold, Exo2Light, FontSizePoint
 from app.windows.SingleFocusFrame import SingleFocus
 from utils.appHelper import setRelativeToMainWindow, adjustForDPI
 from utils.paths import getFrozenPath
+from utils.taskScheduler import Priority
 
 # import resources
 import app.config.resources
@@ -98,7 +99,7 @@ class CryptoItem(QFrame):
         self.tagLabel.setFont(tinyFont)
 
     def connectSlots(self):
-        self.clicked.connect(lambda: self.async_tasks.append(handleAuth(self.connection, 2, self.spawnFocus)))
+        self.clicked.connect(lambda: self.async_tasks.submit(handleAuth(self.connection, 2, self.spawnFocus), Priority.USER))
 
     def spawnFocus(self):
         ancestorWidget = self.parent().parent().parent().parent() #Stands for ExploreMarket widget
@@ -1,7 +1,7 @@
 import os
 import asyncio
 from io import BytesIO
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
 
 from pymongo.mongo_client import MongoClient
 
@@ -16,11 +16,16 @@ from app.handlers.ShortLiveSeries import Series
 from app.handlers.ExportAssets import symbolList
 from app.windows.AssetPreviewFrame import AssetPreview
 from app.windows.AssetFocusFrame import AssetFocus
-from utils.appHelper import clearLayout, setRelativeToMainWindow, adjustForDPI
-from utils.databases import mongoGet
-from utils.asyncJobs import quickFetchBytes, asyncWrap, ThreadRun
-from utils.graphics import chartWithSense
+from utils.appHelper import replaceGridWidget, setRelativeToMainWindow, adjustForDPI
+from utils.deltaSync import DeltaSync
+from utils.databases import CancellationToken
+from utils.quoteSeries import QuoteSeries
+from databases.mongodb.Previews import loadPreviews, previewSync
+from utils.asyncJobs import quickFetchBytes, ThreadRun
+from utils.executors import runIn, CPU_RENDER, DB_IO
+from utils.graphics import chartImage
 from utils.paths import getFrozenPath
+from utils.taskScheduler import Priority
 from app.config.scheduler import Schedule
 from app.config.balancer import BatchBalance
 from app.config.renderer import ViewController
@@ -29,6 +34,16 @@ from app.config.renderer import ViewController
 import app.config.resources
 
 class ExploreAsset(QFrame):
+    # Only the fields rendered by `processData` are pulled from the `ticker` collection,
+    # and only the drawn window of the price history (newest first)
+    previewProjection = {
+        "_id": 0,
+        "symbol": 1,
+        "name": 1,
+        "ticker.general.outlook.image": 1,
+        "ticker.historical.price.historical": {"$slice": BatchBalance.SERIES_WINDOW},
+    }
+
     def __init__(self, connection: MongoClient, async_tasks: list, parent=None):
         super(ExploreAsset, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI", "exploreAsset.ui"))
@@ -40,6 +55,9 @@ class ExploreAsset(QFrame):
         self.connection = connection
 
         self.async_tasks = async_tasks
+        # the loads of this window, cancelled while it is hidden
+        self.tasks = async_tasks.group("ExploreAsset")
+        self.syncTasks = async_tasks.group("ExploreAsset.sync")
 
         self.symbols = [symbol for symbol in symbolList]
         self.assetPreviews: list[AssetPreview] = []
@@ -52,10 +70,40 @@ class ExploreAsset(QFrame):
         self.rowLength = ViewController.MAX_DISPLAY_ROWS
 
         self.allData: List[Dict] = []
+        self.dataBySymbol: Dict[str, Dict] = {}
+        # changed documents waiting for their quote windows, fetched together
+        self.pendingDocuments: Dict[str, Dict] = {}
+        self.positions = {symbol.symbol: pos for pos, symbol in enumerate(self.symbols)}
+        # Cards are repainted only when their document changes, instead of rebuilding the grid on a timer
+        self.deltaSync = DeltaSync(
+            connection=connection,
+            collection="ticker",
+            key="symbol",
+            keys=self.positions.keys(),
+            projection=self.previewProjection,
+            # the market collections carry no modification field, the watchlist is refetched on each period
+            watermarkField=None,
+            interval=Schedule.STRICT_DELAY / 1000,
+            batchSize=BatchBalance.CURSOR_BATCH_SIZE,
+            raw=True) # the price histories are only decoded when a card is painted, off the GUI thread
+        self.deltaSync.subscribe(self.onDocumentsChanged)
+        # Followed instead of `deltaSync` when the previews collection is maintained
+        self.previewSync = previewSync(
+            connection,
+            {"ticker": self.positions.keys()},
+            snapshot="previews.assets",
+            interval=Schedule.STRICT_DELAY / 1000,
+            batchSize=BatchBalance.CURSOR_BATCH_SIZE)
+        self.previewSync.subscribe(self.onPreviewsChanged)
+        self.source: Optional[DeltaSync] = None
+        # Cancelled when the window is hidden, so its queries don't keep running for nothing
+        self.queries = CancellationToken()
+        self.interrupted = False
+        # the first load (and the sync loop it starts) waits for the window to be shown
+        self.started = False
+        self.quoteSeries = QuoteSeries(connection)
 
         self.initUI()
-        QTimer.singleShot(Schedule.NO_DELAY, self.syncGetAllData)
-        QTimer.singleShot(Schedule.ASSET_JOB_START_DELAY, self.hotReload)
 
     def initUI(self):
         adjustForDPI(self)
@@ -81,116 +129,154 @@ class ExploreAsset(QFrame):
         self.searchScroll.setWidget(self.scrollWidget)
 
 
-    def hotReload(self):
-        def clearAndReLoad():
-            clearLayout(self.scrollLayout)
-            self.startLazyLoad()
-        reloadTimer = QTimer()
-        reloadTimer.timeout.connect(clearAndReLoad)
-        reloadTimer.setInterval(Schedule.STRICT_DELAY)
-        # start lazy loading manually at epoch 0
-        self.startLazyLoad()
-        # then start timer to continue relaoding henceforth
-        reloadTimer.start()
-
-    def startLazyLoad(self):
-        self.lazyLoadTimer = QTimer()
-        self.lazyLoadTimer.timeout.connect(lambda:  self.loadNextBatch(self.allData))
-        self.lazyLoadTimer.start(BatchBalance.RELOADING_MSEC)  # Load next batch every ... ms
-
-        #self.lazyLoadTimer.singleShot(1000, self.loadNextBatch)
-
-        self.batchSize = BatchBalance.ASSET_REMOTE_LOADING_SIZE
-        self.currentIndex = 0
-
-    def loadNextBatch(self, allData: List[Dict]):
-        if not allData or len(allData) == 0:
-            return
-        
-        if self.currentIndex >= len(self.symbols):
-            self.lazyLoadTimer.stop()
-            return
-
-        tasks = []
-        for _ in range(self.batchSize):
-            if self.currentIndex >= len(self.symbols):
-                break
-            symbol = self.symbols[self.currentIndex]
-            row = self.currentIndex // self.rowLength
-            col = self.currentIndex % self.rowLength
-            task = self.task(allData, symbol, row, col)
-            tasks.append(task)
-            self.currentIndex += 1
-
-        self.async_tasks.extend(tasks)
-
-    @asyncSlot()
-    async def task(self, allData: List[Dict], symbol: str, row: int, col: dict):
-        symbol:str = symbol.symbol
-        data = [data for data in allData if data.get("symbol") == symbol]
-        if not data or len(data) == 0:
-            print(f'> symbol not found: {symbol} | [Not in database] ')
-            return
-        
-        _ = await self.processData(data, symbol, row, col)
-        
-    async def processData(self, data: List[Dict], symbol: str, row: int, col: int):
+    async def processData(self, data: List[Dict], symbol: str, row: int, col: int, quotes: Optional[List[Dict]] = None):
         def func_(data):
 
             symbolData = data[0]
 
             name = symbolData["name"]
-            outlookTarget = symbolData["ticker"]["general"]["outlook"]
+            # projected documents omit sub-documents whose parent is null
+            tickerTarget = symbolData.get("ticker") or {}
+            outlookTarget = (tickerTarget.get("general") or {}).get("outlook")
             if outlookTarget:
                 baseImageUrl = outlookTarget.get("image")
             else:
                 baseImageUrl = None
 
-            historicalPriceTarget = symbolData['ticker']['historical']['price']
-            if not historicalPriceTarget:
-                return
-            
-            historicalPrice = historicalPriceTarget['historical'] 
+            # newest first, from the time-series collection when it exists
+            if quotes:
+                historicalPrice = quotes[::-1]
+            else:
+                historicalPriceTarget = (tickerTarget.get("historical") or {}).get("price")
+                if not historicalPriceTarget:
+                    return
+                historicalPrice = historicalPriceTarget['historical'] 
             currentPrice = historicalPrice[0]['adjClose']
             previousPrice = historicalPrice[1]['adjClose']
             growth = 100 * (currentPrice - previousPrice)/previousPrice
 
             reorderedPrices = [point['adjClose'] for point in historicalPrice][::-1]
             reorderedDates = [point['date'] for point in historicalPrice][::-1]
-            chartOutPut = chartWithSense(reorderedDates, reorderedPrices)
-            chartPixmap = QPixmap(str(chartOutPut))
 
-            return name, baseImageUrl, currentPrice, growth, chartPixmap
+            return name, baseImageUrl, currentPrice, growth, (reorderedDates, reorderedPrices)
         
         res = await ThreadRun(func_, data)
         if res:
-            name, baseImageUrl, currentPrice, growth, chartPixmap = res
-
-            alternateImageUrl = f"{self.baseImgesUrl}{symbol}.png"
-            imageUrl = baseImageUrl if baseImageUrl else alternateImageUrl
-            imagePixmap = await self.getTickerPixmap(imageUrl)
-
-            item = AssetPreview(
-                symbol=symbol, 
-                name=name, 
-                price=currentPrice, 
-                growth=growth, 
-                imagePixmap=imagePixmap, 
-                chartPixmap=chartPixmap, 
-                parent=self)
-            item.clicked.connect(lambda: self.async_tasks.append(handleAuth(self.connection, 2, self.expand, item, symbol)))
-            self.scrollLayout.addWidget(item, row, col)
-            self.assetPreviews.append(item)
-
-            await asyncio.sleep(0.1)
+            name, baseImageUrl, currentPrice, growth, chartInputs = res
+            chartPixmap = await self.renderChart(*chartInputs)
+            await self.paintCard(symbol, name, baseImageUrl, currentPrice, growth, chartPixmap, row, col)
+
+    async def processPreview(self, preview: Dict, symbol: str, row: int, col: int):
+        points = preview.get("points") or []
+        if preview.get("price") is None or preview.get("growth") is None:
+            return
+        chartPixmap = await self.renderChart([point['date'] for point in points], [point['value'] for point in points])
+        await self.paintCard(symbol, preview.get("name"), preview.get("logo"), preview["price"], preview["growth"], chartPixmap, row, col)
+
+    async def renderChart(self, dates: List[Any], values: List[float], width: int = 120, height: int = 60) -> QPixmap:
+        # rendered on the cpu-render executor, loaded into a pixmap on the GUI thread
+        image = await runIn(CPU_RENDER, chartImage, dates, values, width, height)
+        pixmap = QPixmap()
+        if image:
+            pixmap.loadFromData(image)
+        return pixmap
+
+    async def paintCard(self, symbol: str, name: str, baseImageUrl: str, currentPrice: float, growth: float, chartPixmap: QPixmap, row: int, col: int):
+        alternateImageUrl = f"{self.baseImgesUrl}{symbol}.png"
+        imageUrl = baseImageUrl if baseImageUrl else alternateImageUrl
+        imagePixmap = await self.getTickerPixmap(imageUrl)
+
+        item = AssetPreview(
+            symbol=symbol, 
+            name=name, 
+            price=currentPrice, 
+            growth=growth, 
+            imagePixmap=imagePixmap, 
+            chartPixmap=chartPixmap, 
+            parent=self)
+        item.clicked.connect(lambda: self.async_tasks.submit(handleAuth(self.connection, 2, self.expand, item, symbol), Priority.USER))
+        previous = self.scrollLayout.itemAtPosition(row, col)
+        if previous and previous.widget() in self.assetPreviews:
+            self.assetPreviews.remove(previous.widget())
+        replaceGridWidget(self.scrollLayout, item, row, col)
+        self.assetPreviews.append(item)
+
+        await asyncio.sleep(0.1)
+
+    def onDocumentsChanged(self, changed: List[Dict]):
+        for doc in changed:
+            symbol = doc.get("symbol")
+            if symbol not in self.positions:
+                continue
+            self.dataBySymbol[symbol] = doc
+            self.pendingDocuments[symbol] = doc
+        self.allData = list(self.dataBySymbol.values())
+        # the documents of a cursor batch are published one by one, the first job to run takes them all
+        self.tasks.append(self.paintDocuments())
+
+    async def paintDocuments(self):
+        documents, self.pendingDocuments = self.pendingDocuments, {}
+        if not documents:
+            return
+        # one query for the quote windows of every card, instead of one per card
+        windows = await runIn(DB_IO, self.quoteSeries.windows, list(documents), BatchBalance.SERIES_WINDOW) or {}
+        for symbol, doc in documents.items():
+            pos = self.positions[symbol]
+            self.tasks.append(self.processData([doc], symbol, pos // self.rowLength, pos % self.rowLength, windows.get(symbol)))
+
+    def onPreviewsChanged(self, changed: List[Dict]):
+        for preview in changed:
+            symbol = preview.get("key")
+            if symbol not in self.positions:
+                continue
+            pos = self.positions[symbol]
+            self.tasks.append(self.processPreview(preview, symbol, pos // self.rowLength, pos % self.rowLength))
 
     async def getAllData(self):
-        asyncMongoGet = asyncWrap(mongoGet)
-        self.allData = await asyncMongoGet(collection="ticker", connection=self.connection, limit=int(5e4))
-        return self.allData
+        if self.source is None:
+            # When the previews job maintains the `previews` collection, every card comes from one query
+            previews = await loadPreviews(self.connection, {"ticker": self.positions.keys()}, token=self.queries)
+            if previews:
+                self.source = self.previewSync
+                self.previewSync.seed(previews)
+                self.onPreviewsChanged(previews)
+            else:
+                # Paint the last snapshot straight away, then let the delta sync push what changed since
+                self.source = self.deltaSync
+                cached = await self.deltaSync.restore()
+                self.onDocumentsChanged(cached)
+        await self.source.run(token=self.queries)
+
+    def repaint(self):
+        documents = list(self.source.documents.values()) if self.source is not None else []
+        if self.source is self.previewSync:
+            self.onPreviewsChanged(documents)
+        else:
+            self.onDocumentsChanged(documents)
 
     def syncGetAllData(self):
-        self.async_tasks.append(self.getAllData())
+        self.syncTasks.append(self.getAllData())
+
+    def hideEvent(self, event):
+        self.queries.cancel()
+        self.syncTasks.pause()
+        # cards still being painted are painted again once shown
+        self.interrupted = self.tasks.pause() > 0
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.started:
+            self.started = True
+            self.syncGetAllData()
+        elif self.queries.cancelled:
+            self.tasks.resume()
+            self.syncTasks.resume()
+            # catch up from the watermark reached before the window was hidden
+            self.queries = CancellationToken()
+            if self.interrupted:
+                self.repaint()
+            self.syncGetAllData()
 
     async def loopRun(self, excutor: Any, func: Callable):
         loop = asyncio.new_event_loop()
@@ -209,7 +295,7 @@ class ExploreAsset(QFrame):
         return pixmap
 
     def expand(self, item: AssetPreview, symbol):
-        expand = AssetFocus(symbol=symbol, connection=self.connection, parent=self.parent())
+        expand = AssetFocus(symbol=symbol, connection=self.connection, async_tasks=self.async_tasks, parent=self.parent())
         setRelativeToMainWindow(expand, self, "center")
         self.installEventFilter(expand)
 
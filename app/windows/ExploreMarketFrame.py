@@ -2,27 +2,31 @@ import os
 import random
 import asyncio
 from io import BytesIO
-from typing import List, Dict, Callable
+from typing import Any, List, Dict, Callable, Optional, Tuple
 
 from pymongo.mongo_client import MongoClient
 
 from PyQt5.QtGui import QPixmap
 from PyQt5 import uic
-from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtCore import Qt
 from PyQt5.QtWidgets import QFrame, QGridLayout, QWidget, QApplication
 from qasync import QEventLoop, asyncSlot
 
-from utils.asyncJobs import quickFetchBytes, quickFetchJson,  asyncWrap, ThreadRun
-from utils.databases import mongoGet
+from utils.asyncJobs import quickFetchBytes, quickFetchJson, ThreadRun
+from utils.deltaSync import DeltaSync
+from utils.databases import CancellationToken
+from utils.quoteSeries import QuoteSeries
+from databases.mongodb.Previews import loadPreviews, previewSync
 from utils.envHandler import getenv
-from utils.graphics import chartWithSense
+from utils.executors import runIn, CPU_RENDER, DB_IO
+from utils.graphics import chartImage
 from app.windows.ForexItemFrame import ForexItem
 from app.windows.IndexItemFrame import IndexItem
 from app.windows.CryptoItemFrame import CryptoItem
 from app.windows.CommodityItemFrame import CommodityItem
 from app.windows.Styles import scrollBarStyle
 from utils.paths import getFrozenPath
-from utils.appHelper import adjustForDPI
+from utils.appHelper import adjustForDPI, replaceGridWidget
 from app.config.scheduler import Schedule
 from app.config.balancer import BatchBalance
 from app.config.renderer import ViewController
@@ -31,6 +35,13 @@ from app.config.renderer import ViewController
 import app.config.resources
 
 class ExploreMarket(QFrame):
+    # Only the fields rendered by each `*Task` are pulled from the market collections, and only the drawn window
+    # of the quote arrays: `quotes` arrays are oldest first (last points), `historical` arrays newest first (first points)
+    forexProjection = {"_id": 0, "name": 1, "price.quote": 1, "price.historical.quotes": {"$slice": -BatchBalance.SERIES_WINDOW}}
+    indexProjection = {"_id": 0, "name": 1, "symbol": 1, "historical.quotes": {"$slice": -BatchBalance.SERIES_WINDOW}}
+    cryptoProjection = {"_id": 0, "symbol": 1, "name": 1, "historicalData.quote": 1, "historicalData.daily.historical": {"$slice": BatchBalance.SERIES_WINDOW}}
+    commodityProjection = {"_id": 0, "symbol": 1, "name": 1}
+
     def __init__(self, connection: MongoClient, async_tasks: list, parent=None):
         super(ExploreMarket, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI", "exploreMarket.ui"))
@@ -42,38 +53,65 @@ class ExploreMarket(QFrame):
         self.connection = connection
 
         self.async_tasks = async_tasks
+        # the loads of this window, cancelled while it is hidden
+        self.tasks = async_tasks.group("ExploreMarket")
+        self.syncTasks = async_tasks.group("ExploreMarket.sync")
 
-        self.cryptos: List[Dict] = []
-        self.commodities: List[Dict] = []
-        self.indices: List[Dict] = []
-        self.forexes: List[Dict] = []
+        # Documents of the displayed items, keyed by the field each watchlist is made of
+        self.cryptos: Dict[str, Dict] = {}
+        self.commodities: Dict[str, Dict] = {}
+        self.indices: Dict[str, Dict] = {}
+        self.forexes: Dict[str, Dict] = {}
 
         self.flagsSource = "https://flagcdn.com"
         self.chartDisplayWidth, self.chartDisplayHeigth = 130, 60
 
         self.forexList = ['ARS/MXN', 'TND/ZAR', 'XAG/RUB', 'ILS/NOK']
-        self.forexCurrentIndex = 0
-        self.forexBatchSize = 1
         self.forexRawSize = 2
         
         self.indicesList = ['S &P 500', 'S & P 500', 'NASDAQ Composite', 'Russell 2000', 'Dow Jones Industrial Average']
-        self.indicesCurrentIndex = 0
-        self.indicesBatchSize = 1
         self.indicesRawSize = 2
 
         self.cryptosList = ['BTCUSD', "ETHUSD", "DERPUSD", "BTRSTUSD", "ARQUSD", "ALIENUSD"]
-        self.cryptosCurrentIndex = 0
-        self.cryptosBatchSize = 1
         self.cryptosRawSize = 2
 
         self.commoditiesList = ["ESUSD", "GOLDUSD"]
-        self.commoditiesCurrentIndex = 0
-        self.commoditiesBatchSize = 1
         self.commoditiesRawSize = 2
 
+        # Cards of each collection: positions, row size and painting task
+        self.cards: Dict[str, tuple] = {}
+        # Previews of the displayed items, by collection, when the previews collection is maintained
+        self.previews: Dict[str, Dict[str, Dict]] = {}
+        # Quote windows of the displayed items, by collection, from the time-series collection
+        self.series: Dict[str, Dict[str, Optional[List[Dict]]]] = {}
+        # Changed documents waiting for their quote windows, by collection, and the field holding their symbol
+        self.pendingDocuments: Dict[str, Dict[str, Dict]] = {}
+        self.seriesFields: Dict[str, str] = {}
+
+        # One delta sync per collection: an item is repainted only when its document changes
+        self.deltaSyncs = [
+            self.createDeltaSync("crypto", "symbol", self.cryptosList, self.cryptoProjection, self.cryptos, self.cryptosRawSize, self.cryptoTask, seriesField="symbol"),
+            self.createDeltaSync("commodities", "symbol", self.commoditiesList, self.commodityProjection, self.commodities, self.commoditiesRawSize, self.commodityTask),
+            self.createDeltaSync("indices", "name", self.indicesList, self.indexProjection, self.indices, self.indicesRawSize, self.indexTask, seriesField="symbol"),
+            self.createDeltaSync("forex", "name", self.forexList, self.forexProjection, self.forexes, self.forexRawSize, self.forexTask),
+        ]
+        # Followed instead of `deltaSyncs` when the previews collection is maintained
+        self.previewSync = previewSync(
+            connection,
+            {collection: positions.keys() for collection, (positions, _, _) in self.cards.items()},
+            snapshot="previews.market",
+            interval=Schedule.STRICT_DELAY / 1000,
+            batchSize=BatchBalance.CURSOR_BATCH_SIZE)
+        self.previewSync.subscribe(self.onPreviewsChanged)
+        self.usePreviews: Optional[bool] = None
+        # Cancelled when the window is hidden, so its queries don't keep running for nothing
+        self.queries = CancellationToken()
+        self.interrupted = False
+        # the first load (and the sync loop it starts) waits for the window to be shown
+        self.started = False
+        self.quoteSeries = QuoteSeries(connection)
+
         self.initUI()
-        QTimer.singleShot(Schedule.NO_DELAY, self.syncGetAllData)
-        QTimer.singleShot(Schedule.BATCH_MARKET_JOBS_DELAY, lambda: self.startLazyLoad(self.completeJobs))
         
     def initUI(self):
         adjustForDPI(self)
@@ -141,44 +179,56 @@ class ExploreMarket(QFrame):
     def connectSlots(self):
         self.close_.clicked.connect(self.hide) # only hide to preserve state
 
-    def startLazyLoad(self, execFunc: Callable, timeout: int = BatchBalance.RELOADING_MSEC, *args, **kwargs):
-        self.lazyLoadTimer = QTimer()
-        self.lazyLoadTimer.setInterval(timeout)
-        self.lazyLoadTimer.timeout.connect(lambda: execFunc(*args, **kwargs))
-        self.BatchSize = BatchBalance.MARKET_REMOTE_LOADING_SIZE
-        self.lazyLoadTimer.start(Schedule.LONG_WAITING_DELAY)
-
-    def completeJobs(self):
-        self.loadNextBatch(self.forexList, self.forexCurrentIndex, self.forexBatchSize, self.forexRawSize, self.forexTask)
-        self.loadNextBatch(self.indicesList, self.indicesCurrentIndex, self.indicesBatchSize, self.indicesRawSize, self.indexTask)
-        self.loadNextBatch(self.cryptosList, self.cryptosCurrentIndex, self.cryptosBatchSize, self.cryptosRawSize, self.cryptoTask)
-        self.loadNextBatch(self.commoditiesList, self.commoditiesCurrentIndex, self.commoditiesBatchSize, self.commoditiesRawSize, self.commodityTask)
-
-    def loadNextBatch(self, items: List[str], currentIndex: int, BatchSize: int, rawSize: int, taskFunc: Callable):
-        totalLength = len(items)
-        if currentIndex >= totalLength:
-            self.lazyLoadTimer.stop()
-            print("NO MORE DATA!")
+    def createDeltaSync(self, collection: str, key: str, items: List[str], projection: Dict, documents: Dict[str, Dict], rawSize: int, taskFunc: Callable, seriesField: Optional[str] = None) -> DeltaSync:
+        positions = {item: pos for pos, item in enumerate(items)}
+        self.cards[collection] = (positions, rawSize, taskFunc)
+        if seriesField:
+            self.seriesFields[collection] = seriesField
+
+        def onDocumentsChanged(changed: List[Dict]):
+            for doc in changed:
+                item = doc.get(key)
+                if item not in positions:
+                    continue
+                documents[item] = doc
+                if seriesField:
+                    self.pendingDocuments.setdefault(collection, {})[item] = doc
+                else:
+                    pos = positions[item]
+                    self.tasks.append(taskFunc(item, pos // rawSize, pos % rawSize))
+            if seriesField:
+                # the documents of a cursor batch are published one by one, the first job to run takes them all
+                self.tasks.append(self.paintWithSeries(collection))
+
+        deltaSync = DeltaSync(
+            connection=self.connection,
+            collection=collection,
+            key=key,
+            keys=items,
+            projection=projection,
+            # the market collections carry no modification field, the watchlist is refetched on each period
+            watermarkField=None,
+            interval=Schedule.STRICT_DELAY / 1000,
+            batchSize=BatchBalance.CURSOR_BATCH_SIZE,
+            raw=True) # the price histories are only decoded when a card is painted, off the GUI thread
+        deltaSync.subscribe(onDocumentsChanged)
+        return deltaSync
+
+    async def paintWithSeries(self, collection: str):
+        documents = self.pendingDocuments.pop(collection, {})
+        if not documents:
             return
+        seriesField = self.seriesFields[collection]
+        symbols = {item: doc.get(seriesField) for item, doc in documents.items()}
+        # one query for the quote windows of every card of the collection, instead of one per card
+        windows = await runIn(DB_IO, self.quoteSeries.windows, list(symbols.values()), BatchBalance.SERIES_WINDOW) or {}
+        series = self.series.setdefault(collection, {})
+        positions, rawSize, taskFunc = self.cards[collection]
+        for item, symbol in symbols.items():
+            series[item] = windows.get(symbol)
+            pos = positions[item]
+            self.tasks.append(taskFunc(item, pos // rawSize, pos % rawSize))
 
-        tasks = []
-
-        for pos, item in enumerate(items):
-            if currentIndex >= totalLength:
-                print("NO MORE DATA! Index exceeds list size.")
-                break
-
-            row = pos // rawSize
-            col = pos % rawSize
-
-            task = taskFunc(item, row, col)
-            tasks.append(task)
-
-            currentIndex += 1
-
-        self.async_tasks.extend(tasks)
-
-    @asyncSlot()
     async def forexTask(self, forexPair: str, row: int, col: int):
         def func_1(forexPair: str):
             codes = forexPair.split("/")
@@ -190,31 +240,31 @@ class ExploreMarket(QFrame):
 
             return flag1Url, flag2Url
         
-        def func_2(forexList: List[Dict], forexPair: str):
-            forexData = [forex for forex in forexList if forex.get("name")==forexPair]
+        def func_2(forexes: Dict[str, Dict], forexPair: str):
+            preview = self.pricedPreview("forex", forexPair)
+            if preview:
+                return preview["price"], preview["growth"], self.previewChartInputs(preview)
+
+            forexData = forexes.get(forexPair)
 
             if not forexData:
                 return
 
-            quoteTarget = forexData[0]["price"]["quote"]
+            quoteTarget = forexData["price"]["quote"]
 
             price = quoteTarget[0]["price"]
             growth = quoteTarget[0]["changesPercentage"]
 
-            historicalTarget = forexData[0]["price"]["historical"]["quotes"][::-1] # reverse to get a descending order (based on date)
+            historicalTarget = forexData["price"]["historical"]["quotes"][::-1] # reverse to get a descending order (based on date)
 
             # only for testing
             chartVoidInputs = (list(range(1000)), [random.randrange(200, 420) for _ in range(1000)])
             if not historicalTarget:
                 chartInputs = chartVoidInputs
-                chartOutput = chartWithSense(chartInputs[0], chartInputs[1], self.chartDisplayWidth, self.chartDisplayHeigth)
-                chartPixmap = QPixmap(str(chartOutput))
             else:
                 chartInputs = ([point["date"] for point in historicalTarget], [point["adjClose"] for point in historicalTarget])
-                chartOutput = chartWithSense(chartInputs[0], chartInputs[1], self.chartDisplayWidth, self.chartDisplayHeigth)
-                chartPixmap = QPixmap(str(chartOutput))
 
-            return price, growth, chartPixmap
+            return price, growth, chartInputs
 
         def func_3(forexPair: str, price: float, growth: float, flag1: QPixmap, flag2: QPixmap, chartPixmap: QPixmap):
             item = ForexItem(
@@ -232,12 +282,13 @@ class ExploreMarket(QFrame):
 
         res = await ThreadRun(func_2, self.forexes, forexPair)
         if res:
-            price, growth, chart = res
+            price, growth, chartInputs = res
+            chart = await self.renderChart(*chartInputs)
             flag1Url, flag2Url = await ThreadRun(func_1, forexPair)
             flag1 = await self.getFlagPixmap(flag1Url)
             flag2 = await self.getFlagPixmap(flag2Url)
             item = func_3(forexPair, price, growth, flag1, flag2, chart)
-            self.forexLayout.addWidget(item, row, col)
+            replaceGridWidget(self.forexLayout, item, row, col)
         
 
     async def getFlagPixmap(self, url):
@@ -250,15 +301,20 @@ class ExploreMarket(QFrame):
         pixmap.loadFromData(BytesIO(bytesObj).read())
         return pixmap
 
-    @asyncSlot()
     async def indexTask(self, indexName: str, row: int, col: int):
-        def func_1(indicesList: List, indexName: str):
-            indexData = [index for index in  indicesList if index.get("name")==indexName]
+        def func_1(indices: Dict[str, Dict], indexName: str):
+            preview = self.pricedPreview("indices", indexName)
+            if preview:
+                shortName = f'{indexName[:30]}.' if len(indexName) > 30 else indexName
+                return preview.get("symbol"), shortName, preview["price"], preview["growth"], self.previewChartInputs(preview)
+
+            indexData = indices.get(indexName)
 
             if not indexData:
                 return
 
-            target = indexData[0]['historical']['quotes']
+            # oldest first, from the time-series collection when it exists
+            target = self.series.get("indices", {}).get(indexName) or indexData['historical']['quotes']
             if not target:
                 raise ValueError('Target was set to render inexistent fields')
 
@@ -269,15 +325,13 @@ class ExploreMarket(QFrame):
             growth = 100 * (currentPrice - previousPrice) / previousPrice
 
             chartInputs = ([point['date'] for point in target], [point['adjClose'] for point in target])
-            chartOutput = chartWithSense(chartInputs[0], chartInputs[1], self.chartDisplayWidth, self.chartDisplayHeigth)
-            chartPixmap = QPixmap(str(chartOutput))
 
             # Cut long names so they don't harm the display
             if len(indexName) > 30:
                 indexName = f'{indexName[:30]}.'
-            indexSymbol = indexData[0]['symbol']
+            indexSymbol = indexData['symbol']
 
-            return indexSymbol, indexName, currentPrice, growth, chartPixmap
+            return indexSymbol, indexName, currentPrice, growth, chartInputs
 
         def func_2(indexSymbol, indexName, currentPrice, growth, chartPixmap):
             item = IndexItem(
@@ -293,34 +347,36 @@ class ExploreMarket(QFrame):
         
         res = await ThreadRun(func_1, self.indices, indexName)
         if res:
-            item = func_2(*res)
-            self.indicesLayout.addWidget(item, row, col)
+            *card, chartInputs = res
+            item = func_2(*card, await self.renderChart(*chartInputs))
+            replaceGridWidget(self.indicesLayout, item, row, col)
 
-    @asyncSlot()
     async def cryptoTask(self, cryptoSymbol: str, row, col):
-        def func_1(cryptoList: List[Dict], cryptoSymbol: str):
-            cryptoData = [crypto for crypto in cryptoList if crypto.get("symbol")==cryptoSymbol]
+        def func_1(cryptos: Dict[str, Dict], cryptoSymbol: str):
+            preview = self.pricedPreview("crypto", cryptoSymbol)
+            cryptoData = preview or cryptos.get(cryptoSymbol)
 
             if not cryptoData:
                 return
 
             # Refactor crypto name 
-            cryptoName: str = cryptoData[0]["name"]
+            cryptoName: str = cryptoData["name"]
             cryptoName = cryptoName.strip().replace("USD", "/USD").replace(" ", "")
+            if preview:
+                return cryptoSymbol.replace("USD", ""), cryptoName, preview["price"], preview["growth"], self.previewChartInputs(preview)
 
-            quoteTarget = cryptoData[0]['historicalData']["quote"][0]
+            quoteTarget = cryptoData['historicalData']["quote"][0]
             price = quoteTarget["price"]
             growth = quoteTarget["changesPercentage"]
 
-            historicalTarget = cryptoData[0]['historicalData']["daily"]["historical"][::-1] # reverse to get a descending order (based on date)
+            historicalTarget = self.series.get("crypto", {}).get(cryptoSymbol) \
+                or cryptoData['historicalData']["daily"]["historical"][::-1] # reverse to get a descending order (based on date)
             chartInputs = ([point["date"] for point in historicalTarget], [point["adjClose"] for point in historicalTarget])
-            chartOutput = chartWithSense(chartInputs[0], chartInputs[1], self.chartDisplayWidth, self.chartDisplayHeigth)
-            chartPixmap = QPixmap(str(chartOutput))
 
             # symbol will probably end with 'USD' so we strip it away
             cryptoSymbol_ = cryptoSymbol.replace("USD", "")
             
-            return cryptoSymbol_, cryptoName, price, growth, chartPixmap
+            return cryptoSymbol_, cryptoName, price, growth, chartInputs
 
         def func_2(cryptoSymbol, cryptoName, price, growth, imagePixmap, chartPixmap):
             item = CryptoItem(
@@ -338,11 +394,12 @@ class ExploreMarket(QFrame):
         
         res = await ThreadRun(func_1, self.cryptos, cryptoSymbol)
         if res:
-            cryptoSymbol_, cryptoName, price, growth, chart = res
+            cryptoSymbol_, cryptoName, price, growth, chartInputs = res
+            chart = await self.renderChart(*chartInputs)
             imagePixmap = await self.getCryptoPixmap(cryptoSymbol_)
             item = func_2(cryptoSymbol, cryptoName, price, growth, imagePixmap, chart)
 
-            self.cryptosLayout.addWidget(item, row, col)
+            replaceGridWidget(self.cryptosLayout, item, row, col)
 
        
 
@@ -377,15 +434,14 @@ class ExploreMarket(QFrame):
             print(f"Error fetching data from CryptoCompare: {e}")
         return None
 
-    @asyncSlot()
     async def commodityTask(self, commoditySymbol, row, col):
-        def func_1(commoditiesList: List, commoditySymbol: str):
-            comData = [com for com in  commoditiesList if com.get("symbol")==commoditySymbol]
+        def func_1(commodities: Dict[str, Dict], commoditySymbol: str):
+            comData = self.previews.get("commodities", {}).get(commoditySymbol) or commodities.get(commoditySymbol)
         
             if not comData:
                 return
 
-            comName = comData[0]["name"]
+            comName = comData["name"]
             # some dummy data
             price = 100
             growth = 1.001
@@ -405,30 +461,99 @@ class ExploreMarket(QFrame):
         res = await ThreadRun(func_1, self.commodities, commoditySymbol)
         if res:
             item = func_2(*res)
-            self.commoditiesLayout.addWidget(item, row, col)
+            replaceGridWidget(self.commoditiesLayout, item, row, col)
+
+    def pricedPreview(self, collection: str, item: str) -> Optional[Dict]:
+        preview = self.previews.get(collection, {}).get(item)
+        if preview and preview.get("price") is not None and preview.get("growth") is not None:
+            return preview
+        return None
+
+    def previewChartInputs(self, preview: Dict) -> Tuple[List[Any], List[float]]:
+        points = preview.get("points") or []
+        return [point["date"] for point in points], [point["value"] for point in points]
+
+    async def renderChart(self, dates: List[Any], values: List[float]) -> QPixmap:
+        # rendered on the cpu-render executor, loaded into a pixmap on the GUI thread
+        image = await runIn(CPU_RENDER, chartImage, dates, values, self.chartDisplayWidth, self.chartDisplayHeigth)
+        pixmap = QPixmap()
+        if image:
+            pixmap.loadFromData(image)
+        return pixmap
+
+    def onPreviewsChanged(self, changed: List[Dict]):
+        for preview in changed:
+            collection, item = preview.get("source"), preview.get("key")
+            if collection not in self.cards:
+                continue
+            positions, rawSize, taskFunc = self.cards[collection]
+            if item not in positions:
+                continue
+            self.previews.setdefault(collection, {})[item] = preview
+            pos = positions[item]
+            self.tasks.append(taskFunc(item, pos // rawSize, pos % rawSize))
 
     async def getAllData(self):
-        asyncMongoGet = asyncWrap(mongoGet)
-        self.cryptos = await asyncMongoGet(collection="crypto", limit=int(5e4), connection=self.connection)
-        self.commodities = await asyncMongoGet(collection="commodities", limit=int(5e4), connection=self.connection)
-        self.indices = await asyncMongoGet(collection='indices', limit=int(5e4), connection=self.connection)
-        self.forexes = await asyncMongoGet(collection='forex', limit=int(5e4), connection=self.connection)
-        for l in self.cryptos, self.commodities, self.indices, self.forexes:
-            pass
+        if self.usePreviews is None:
+            # When the previews job maintains the `previews` collection, every card comes from one query
+            previews = await loadPreviews(
+                self.connection,
+                {collection: positions.keys() for collection, (positions, _, _) in self.cards.items()},
+                token=self.queries)
+            self.usePreviews = bool(previews)
+            if previews:
+                self.previewSync.seed(previews)
+                self.onPreviewsChanged(previews)
+        if self.usePreviews:
+            await self.previewSync.run(token=self.queries)
+            return
+
+        # Paint the last snapshots straight away, then let each delta sync push what changed since
+        for deltaSync in self.deltaSyncs:
+            if not deltaSync.documents:
+                cached = await deltaSync.restore()
+                deltaSync.publish(cached)
+        await asyncio.gather(*[deltaSync.run(token=self.queries) for deltaSync in self.deltaSyncs], return_exceptions=True)
+
+    def repaint(self):
+        if self.usePreviews:
+            self.onPreviewsChanged(list(self.previewSync.documents.values()))
+            return
+        for deltaSync in self.deltaSyncs:
+            deltaSync.publish(list(deltaSync.documents.values()))
 
     def syncGetAllData(self):
-        self.async_tasks.append(self.getAllData())
+        self.syncTasks.append(self.getAllData())
+
+    def hideEvent(self, event):
+        self.queries.cancel()
+        self.syncTasks.pause()
+        # cards still being painted are painted again once shown
+        self.interrupted = self.tasks.pause() > 0
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.started:
+            self.started = True
+            self.syncGetAllData()
+        elif self.queries.cancelled:
+            self.tasks.resume()
+            self.syncTasks.resume()
+            # catch up from the watermarks reached before the window was hidden
+            self.queries = CancellationToken()
+            if self.interrupted:
+                self.repaint()
+            self.syncGetAllData()
         
 
 
 if __name__ == "__main__":
     import sys
-    from pymongo.server_api import ServerApi
-
-    uri = getenv("MONGO_URI")
+    from utils.databases import getMongoClient
 
-    # Create a new client and connect to the server
-    mongo_client = MongoClient(uri, server_api=ServerApi('1'))
+    # Get the process-wide client and connect to the server
+    mongo_client = getMongoClient(getenv("MONGO_URI"))
 
 
     app = QApplication(sys.argv)
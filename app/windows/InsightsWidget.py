@@ -16,8 +16,8 @@ from app.config.fonts import RobotoRegular, MontserratRegular, FontSizePoint
 from app.windows.InsightItems import InsightItem
 from utils.paths import getFrozenPath
 from utils.appHelper import adjustForDPI, clearLayout
-from utils.databases import mongoGet
-from utils.asyncJobs import asyncWrap, enumerate_async
+from utils.asyncDatabases import asyncMongoStream
+from utils.asyncJobs import enumerate_async
 from utils.logs import timer
 from app.config.balancer import BatchBalance
 from app.config.renderer import ViewController
@@ -40,6 +40,10 @@ class Insight:
 class JanineInsights(QWidget):
     gatheredInsights = pyqtSignal(list)
     filterMessage = pyqtSignal(str)
+    # Only the fields mapped onto `Insight` are pulled from the insights collections
+    insightProjection = {
+        "_id": 0, "title": 1, "description": 1, "date": 1, "content": 1, "image": 1, "urls": 1, "labels": 1, "tags": 1
+    }
     def __init__(self, connection: MongoClient, async_tasks: list[asyncio.Task], parent=None):
         super(JanineInsights, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI" , "insightsWidget.ui"))
@@ -51,10 +55,14 @@ class JanineInsights(QWidget):
         self.connection = connection
 
         self.async_tasks = async_tasks
+        # the loads of this window, cancelled while it is hidden
+        self.tasks = async_tasks.group("JanineInsights")
+        self.loaded = False
+        self.interrupted = False
 
         self.debouncerTimer = QTimer()  # Initialize the debounce timer here
         self.debouncerTimer.setSingleShot(True)
-        self.debouncerTimer.timeout.connect(lambda: self.async_tasks.append(self.filterItems()))
+        self.debouncerTimer.timeout.connect(lambda: self.tasks.append(self.filterItems()))
         #self.debouncerTimer.timeout.connect(lambda: asyncio.ensure_future(self.filterItems()))
 
         self.initUI()
@@ -104,29 +112,34 @@ class JanineInsights(QWidget):
     
     @pyqtSlot()
     async def gatherInsights(self):
-        async_mongGet = asyncWrap(mongoGet)
         today = datetime.now().date().isoformat()
         yesterday = (datetime.now() - timedelta(days=1)).date().isoformat()
-        latest_collection = today
-
-        data = await async_mongGet(database='insights', collection=latest_collection, limit=int(1e6), connection=self.connection)
-        if not data:
-            latest_collection = yesterday
-            data = await async_mongGet(database='insights', collection=latest_collection, limit=int(1e6), connection=self.connection)
-            if not data:
-                yield {}
-        for doc in data:
-            yield {
-                "title": doc["title"],
-                "description": doc["description"],
-                "date": doc["date"],
-                "content": doc["content"],
-                "image": doc["image"],
-                "urls": doc["urls"],
-                "labels": set([label.lower() for label in doc["labels"]]),
-                "tags": set([tag.lower() for tag in doc["tags"]]),
-
-            }
+
+        # Stream today's insights (or yesterday's if there is none yet) so the first cards paint after one round trip
+        for latest_collection in (today, yesterday):
+            found = False
+            async for doc in asyncMongoStream(
+                database='insights', 
+                collection=latest_collection, 
+                limit=int(1e6), 
+                connection=self.connection, 
+                projection=self.insightProjection,
+                batchSize=BatchBalance.CURSOR_BATCH_SIZE):
+                found = True
+                yield {
+                    "title": doc["title"],
+                    "description": doc["description"],
+                    "date": doc["date"],
+                    "content": doc["content"],
+                    "image": doc["image"],
+                    "urls": doc["urls"],
+                    "labels": set([label.lower() for label in doc["labels"]]),
+                    "tags": set([tag.lower() for tag in doc["tags"]]),
+
+                }
+            if found:
+                return
+        yield {}
     
     @pyqtSlot()
     async def setContents(self):
@@ -139,11 +152,27 @@ class JanineInsights(QWidget):
                 insight_widget = InsightItem(insight, self)
                 self.insightslayout.addWidget(insight_widget, row, col)
             except TypeError: #  in case no  data was found
-                return
+                break
+        self.loaded = True
 
     @pyqtSlot()
     def syncSetContents(self):
-        self.async_tasks.append(self.setContents())
+        self.tasks.append(self.setContents())
+
+    def hideEvent(self, event):
+        self.interrupted = self.tasks.pause() > 0
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.tasks.paused:
+            self.tasks.resume()
+            if not self.loaded:
+                # the insights were interrupted, load them again
+                clearLayout(self.insightslayout)
+                self.syncSetContents()
+            elif self.interrupted:
+                self.tasks.append(self.filterItems())
 
 
     def setFonts(self):
@@ -27,6 +27,7 @@ from app.windows.WaiterFrame import Waiter
 from app.windows.ChatTitleFrame import ChatTitleSelector, ChatTitle
 from utils.appHelper import setRelativeToMainWindow, clearLayout, adjustForDPI, isEmptyLayout
 from utils.time import now
+from utils.taskScheduler import Priority
 from app.windows.AttachmentFrame import Attachment
 from app.config.renderer import ViewController
 
@@ -260,6 +261,7 @@ class JanineChat(QFrame):
             await self.textMessageFunc(message=response, origin="Janine")
         self.removeWaiter()
         self.resetMessageField()
+        self.async_tasks.submit(self.janine.trimHistory(), Priority.BACKGROUND)
 
     def disableAllActions(self):
         self.attach.setEnabled(False)
@@ -308,6 +310,7 @@ class JanineChat(QFrame):
         response = await self.janine.remoteCompleteMessage()
         self.removeWaiter()
         await self.textMessageFunc(message=response, origin="Janine")
+        self.async_tasks.submit(self.janine.trimHistory(), Priority.BACKGROUND)
         
     async def constructMessageFunc(self):
         if self.fileLoaded:
@@ -367,12 +370,13 @@ class JanineChat(QFrame):
         response = await self.janine.remoteCompleteMessage()
         self.removeWaiter()
         await self.voiceMailFunc(response, origin="Janine")
+        self.async_tasks.submit(self.janine.trimHistory(), Priority.BACKGROUND)
 
     def constructMessage(self):
-        self.async_tasks.append(self.constructMessageFunc())
+        self.async_tasks.submit(self.constructMessageFunc(), Priority.USER)
 
     def constructVoiceMail(self):
-        self.async_tasks.append(self.constructVoiceMailFunc())
+        self.async_tasks.submit(self.constructVoiceMailFunc(), Priority.USER)
 
 
     async def spawnWaiter(self):
@@ -403,7 +407,7 @@ class JanineChat(QFrame):
         if title:
             chatTitle = ChatTitle(
                 title=title,
-                db=self.db.database, 
+                db=self.db, 
                 func=self.showFullChat, 
                 parent=self,
             )
@@ -419,17 +423,13 @@ class JanineChat(QFrame):
             self.chatTitleList.append(chatTitle)
         
             #mongoUpdate(database=self.db.user, collection='chatHistory', update={'$set': {'chat': {'title': title, 'time': now()}}})
-            self.db.createChat(title=title)
-            print("title: ",self.db.title)
             try:
-                self.db.database['metadata'].insert_one({'chat': {'createdAt': now(), 'title': title}}) #  insert a metadata record to properly sort collections 
+                self.db.newChat(title) # registers the chat's metadata record (used to sort chats) and selects it
             except Exception: # if it fails because the database has not be initialized yet
                 self.logger.log("error", "error inserting metadata record", ValueError("No connection to Janine database found."))
-                print('unsed con.')
                 self.db.connect() # Connect to database
-                self.db.database['metadata'].insert_one({'chat': {'createdAt': now(), 'title': title}}) #  and retry
-            self.db.insert({'title': title}) # insert dummy data into collection to properly initialize collection
-            self.db.delete({'title': title}) # delete right away
+                self.db.newChat(title) #  and retry
+            print("title: ",self.db.title)
 
             # Then enable chat action buttons if they were disabled
             self.send.setEnabled(True)
@@ -457,7 +457,7 @@ class JanineChat(QFrame):
     def gatherChatHistory(self, collectionNames: List[str]):
         for collection in collectionNames:
             chat = ChatTitle(
-                db=self.db.database,
+                db=self.db,
                 title=collection, 
                 func=self.showFullChat, 
                 parent=self,
@@ -478,7 +478,7 @@ class JanineChat(QFrame):
     def showFullChat(self, collection: str):
         try:
             clearLayout(self.chatLayout)
-            chatItems = self.db.database[collection].find().sort("content.date", 1).limit(HISTORY_LIMIT)
+            chatItems = self.db.loadChat(collection, HISTORY_LIMIT)
             messages = list(map(lambda x: x['content'], chatItems))
             for message in messages:
                 textMsg = ""
@@ -499,7 +499,7 @@ class JanineChat(QFrame):
                 )
                 self.push(msg)
         finally:
-            self.db.chatHistory = self.db.database[collection] #switch to current collection to handle how messages are distributed accross chat
+            self.db.selectChat(collection) #switch to current chat to handle how messages are distributed accross chat
             # show that focus has changed
             try: # try the follwing (it raises an error if all chats have been deleted)
                 for chat in self.chatTitleList:
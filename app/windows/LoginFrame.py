@@ -18,7 +18,7 @@ from app.config.fonts import RobotoRegular, FontSizePoint
 from app.windows.NewAccountSetup import NewAccountSetup
 
 from databases.mongodb.UsersAuth import UserCredentials, userAuthInstance
-from utils.databases import mongoGet
+from utils.databases import mongoGet, MongoConnectionError
 
 # import resources
 import app.config.resources
@@ -133,7 +133,16 @@ class SignInFrame(QMainWindow):
         return email
 
     def retreiveAndSave(self, email: str):
-        users = mongoGet(database='UsersAuth', collection="users", connection=self.connection, limit=int(1e7))
+        try:
+            users = mongoGet(database='UsersAuth', collection="users", connection=self.connection, limit=int(1e7))
+        except MongoConnectionError:
+            messageBox = MessageBox()
+            messageBox.level("warning")
+            messageBox.title("Connection issue")
+            messageBox.message("Unable to reach the database.\nYour session could not be saved, you will have to log in again.")
+            messageBox.buttons(("ok",))
+            messageBox.exec_()
+            return
         this_user = [user for user in users if user['user']['email'] == email]
         user = this_user[0] if this_user else None
 
@@ -21,6 +21,9 @@ from app.windows.BottomWidget import Bottom
 from utils.appHelper import stackOnCurrentWindow, setRelativeToMainWindow, isFrozen, adjustForDPI, moveWidget
 from utils.paths import constructPath, getFrozenPath, getFileSystemPath
 from utils.envHandler import getenv
+from utils.databases import MongoRegistry
+from utils.marketCache import marketCache
+from utils.writeBehind import writeBehind
 from app.config.renderer import ViewController
 from app.versions.control import VersionController
 from app.versions.download import VersionDownloadManager
@@ -98,7 +101,9 @@ class MainWindow(QMainWindow):
 
     def closeAndExit(self):
         self.close()
-        self.connection.close()
+        writeBehind.close() # send the queued writes while the clients are still open
+        MongoRegistry.closeAll()
+        marketCache.close()
         if not isFrozen():
             exit(0)
         else:
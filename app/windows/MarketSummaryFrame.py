@@ -12,15 +12,19 @@ from PyQt5.QtCore import Qt, pyqtSignal
 from PyQt5.QtWidgets import QFrame, QVBoxLayout, QGridLayout, QWidget, QApplication
 
 
-from app.windows.Spinner import Spinner, Worker
+from app.windows.Spinner import Spinner
 from app.windows.ArticleItemFrame import ArticleItem
 from app.windows.Outliners import MarketOutliner, Outline, OutlineTitle
 from app.handlers.ExportAssets import IndexList
-from utils.databases import mongoGet
-from utils.asyncJobs import quickFetchBytes, asyncWrap
+from utils.asyncDatabases import asyncMongoStream
+from utils.asyncJobs import quickFetchBytes, enumerate_async, ThreadRun
+from utils.marketCache import marketCache
 from utils.paths import getFrozenPath
-from utils.appHelper import adjustForDPI
+from utils.appHelper import adjustForDPI, clearLayout
+from utils.taskScheduler import Priority
+from utils.workers import spinnerTask
 from app.config.renderer import ViewController
+from app.config.balancer import BatchBalance
 
 # import resources
 import app.config.resources
@@ -40,6 +44,10 @@ class MarketSummary(QFrame):
         self.connection = connection
 
         self.async_tasks = async_tasks
+        # the loads of this window, cancelled while it is hidden
+        self.tasks = async_tasks.group("MarketSummary")
+        self.outlinesLoaded = False
+        self.focusLoaded = False
 
         self.outliner = MarketOutliner(connection)
         self.initUI()
@@ -108,7 +116,7 @@ class MarketSummary(QFrame):
             self.addSectorPerformances(items)
 
     def handleNewsFetched(self):
-        self.async_tasks.append(self.setFocus())
+        self.tasks.submit(self.setFocus(), Priority.USER)
 
     def addGainers(self, gainers):
         title = OutlineTitle(self)
@@ -209,40 +217,72 @@ class MarketSummary(QFrame):
         layout.addWidget(outline)
 
     async def setOutlinesContents(self):
-        await self.gainers()
-        await self.losers()
-        await self.mostactives()
-        await self.sectorPerformances()
+        # the four lists come from a single aggregation
+        outlines = await self.outliner.outlines()
+        self.dataFetched.emit('gainers', outlines.get("biggestGainers") or [])
+        self.dataFetched.emit('losers', outlines.get("biggestLosers") or [])
+        self.dataFetched.emit('mostactives', outlines.get("mostActives") or [])
+        self.dataFetched.emit('sectors', outlines.get("sectorPerformance") or [])
 
     async def setFocus(self):
-        asyncMomgoGet = asyncWrap(mongoGet)
-        articles: List[Dict] = await asyncMomgoGet(collection='articles',limit=100, connection=self.connection)
-
-        for pos, article in enumerate(articles):
-            title = article.get('title', '')
-            imageUrl = article.get('image', '')
-            author = article.get('author', '')
-            content = article.get('content', None) or article.get('text')
-            date = article.get('date', None) or article.get('publishedAt')
-            link = article.get('link', None) or article.get('url')
-            tickers = article.get('tickers', [])
-            source = article.get('site', '')
-
-            imagePixmap = await self.getPixmap(imageUrl)
-            item  = ArticleItem(
-                title=title,
-                imagePixmap=imagePixmap,
-                author=author,
-                source=source,
-                date=date,
-                content=content,
-                link=link,
-                tickers=tickers,
-                parent=self
-            )
-            row = pos // 3
-            col = pos % 3
-            self.gridScrollLayout.addWidget(item, row, col)
+        # Paint the last snapshot straight away, then refresh it from the database in the background
+        cached = await ThreadRun(marketCache.load, "articles")
+        for pos, article in enumerate(cached):
+            await self.renderArticle(pos, article)
+
+        # Without a snapshot, articles are rendered as the cursor batches arrive, otherwise once the stream is done
+        fresh: List[Dict] = []
+        articles = asyncMongoStream(collection='articles',limit=100, connection=self.connection, batchSize=BatchBalance.CURSOR_BATCH_SIZE)
+        async for pos, article in enumerate_async(articles):
+            fresh.append(article)
+            if not cached:
+                await self.renderArticle(pos, article)
+
+        if cached:
+            # repaint only the positions whose article changed since the snapshot
+            for pos, article in enumerate(fresh):
+                if pos >= len(cached) or cached[pos] != article:
+                    self.removeArticle(pos)
+                    await self.renderArticle(pos, article)
+            for pos in range(len(fresh), len(cached)):
+                self.removeArticle(pos)
+
+        if fresh:
+            await ThreadRun(marketCache.save, "articles", fresh)
+        self.focusLoaded = True
+
+    def removeArticle(self, pos: int):
+        item = self.gridScrollLayout.itemAtPosition(pos // 3, pos % 3)
+        if item is not None and item.widget() is not None:
+            widget = item.widget()
+            self.gridScrollLayout.removeWidget(widget)
+            widget.deleteLater()
+
+    async def renderArticle(self, pos: int, article: Dict):
+        title = article.get('title', '')
+        imageUrl = article.get('image', '')
+        author = article.get('author', '')
+        content = article.get('content', None) or article.get('text')
+        date = article.get('date', None) or article.get('publishedAt')
+        link = article.get('link', None) or article.get('url')
+        tickers = article.get('tickers', [])
+        source = article.get('site', '')
+
+        imagePixmap = await self.getPixmap(imageUrl)
+        item  = ArticleItem(
+            title=title,
+            imagePixmap=imagePixmap,
+            author=author,
+            source=source,
+            date=date,
+            content=content,
+            link=link,
+            tickers=tickers,
+            parent=self
+        )
+        row = pos // 3
+        col = pos % 3
+        self.gridScrollLayout.addWidget(item, row, col)
 
     async def getPixmap(self, url):
         response = await quickFetchBytes(url)
@@ -254,18 +294,31 @@ class MarketSummary(QFrame):
         pixmap.loadFromData(BytesIO(bytesObj).read())
         return pixmap
 
+    def hideEvent(self, event):
+        self.tasks.pause()
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.tasks.paused:
+            self.tasks.resume()
+            if not self.outlinesLoaded:
+                # the outlines were interrupted, the articles follow them
+                clearLayout(self.vboxScrollLayout)
+                self.runAllAsync()
+            elif not self.focusLoaded:
+                # the articles were interrupted, render them again
+                clearLayout(self.gridScrollLayout)
+                self.handleNewsFetched()
+
     async def allAsync(self):
         await self.setOutlinesContents()
+        self.outlinesLoaded = True
         self.updateFocus.emit()
 
     def runAllAsync(self):
-        spinner = Spinner(parent=self)
-        self.worker = Worker(self.allAsync, 'async')
-
-        self.worker.start()
-
-        self.worker.started.connect(spinner.start)
-        self.worker.finished.connect(spinner.stop)
+        # on the application loop, with the other loads of this window
+        spinnerTask(Spinner(parent=self), self.allAsync(), lambda _: None, self.tasks)
         
 
 if __name__ == "__main__":
@@ -15,7 +15,7 @@ from utils.appHelper import setRelativeToMainWindow, adjustForDPI, showWindow
 from utils.paths import getFrozenPath
 from utils.paths import getFrozenPath, getFileSystemPath
 from utils.envHandler import getenv
-from utils.databases import mongoGet
+from utils.databases import mongoGet, MongoConnectionError
 
 # import resources
 import app.config.resources
@@ -86,6 +86,9 @@ class AccountMenu(QFrame):
         except FileNotFoundError:
             sign_in = SignInFrame(connection=self.connection)
             showWindow(sign_in)
+        except MongoConnectionError:
+            # already logged, the plan is shown once the database is back
+            pass
             
     def connectSlots(self):
         self.logoutButton.clicked.connect(self.logout)
@@ -10,7 +10,7 @@ from pymongo import MongoClient
 
 from app.windows.MessageBox import MessageBox
 from utils.appHelper import setRelativeToMainWindow, adjustForDPI
-from utils.databases import mongoUpdate
+from utils.databases import mongoUpdate, MongoConnectionError
 from utils.paths import getFrozenPath
 from app.config.fonts import RobotoMedium, RobotoBold, QuicksandMedium, RobotoLight, FontSizePoint
 from app.windows.PaymentForm import PaymentForm
@@ -74,13 +74,17 @@ class NewAccountPlan(QFrame):
         parent = self.parent()
         email = self.getEmail()
         if email:
-            res = mongoUpdate(
-                connection=self.connection,
-                database='UsersAuth', 
-                collection='users', 
-                query={'user.email': email}, 
-                update={'$set': {'subscription': 'free', 'status': 'ACTIVE', 'authorizationLevel': 1}}
-            )
+            try:
+                res = mongoUpdate(
+                    connection=self.connection,
+                    database='UsersAuth', 
+                    collection='users', 
+                    query={'user.email': email}, 
+                    update={'$set': {'subscription': 'free', 'status': 'ACTIVE', 'authorizationLevel': 1}}
+                )
+            except MongoConnectionError:
+                # already logged, shown as any other failure
+                res = False
             if res:
                 allSet = AccountAllSet()
                 allSet.hide()
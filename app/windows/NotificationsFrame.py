@@ -10,7 +10,9 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtCore import QTimer, QEvent, Qt, pyqtSlot, pyqtSignal
 from PyQt5.QtWidgets import QFrame, QVBoxLayout, QScrollArea, QWidget
 
-from utils.databases import mongoGet, mongoUpdate
+from utils.asyncDatabases import asyncMongoGet
+from utils.databases import getGateway
+from utils.writeBehind import writeBehind
 
 from app.config.renderer import ViewController
 from app.config.scheduler import Schedule
@@ -18,7 +20,7 @@ from app.config.fonts import FontSizePoint, QuicksandRegular, RobotoBold
 from app.windows.Styles import chatScrollBarStyle
 from utils.paths import getFrozenPath
 from utils.appHelper import adjustForDPI, moveWidget, clearLayout, stackOnCurrentWindow, setRelativeToMainWindow
-from utils.asyncJobs import asyncWrap
+from utils.taskScheduler import Priority
 from app.handlers.AuthHandler import sync_read_user_cred_file
 
 # import resources
@@ -178,18 +180,14 @@ class NotificationItem(QFrame):
         QTimer.singleShot(Schedule.DEFAULT_DELAY, self.syncMongoUpdate)
 
     def syncMongoUpdate(self):
-        self.async_tasks.append(self.updateMessageStatus())
+        self.async_tasks.submit(self.updateMessageStatus(), Priority.BACKGROUND)
 
     async def updateMessageStatus(self):
-        print(f"Updating status for message ID: {self.message._id}")
-        asyncMongoUpdate = asyncWrap(mongoUpdate)
-        res = await asyncMongoUpdate(
-            database=self.dbName, 
-            collection=self.collection, 
-            query={"_id": self.message._id}, 
-            update={"$set": {"status": "read"}}, 
-            connection=self.connection)
-        print(f"Update result: {res}")
+        # queued, the write-behind worker batches the status updates of every opened notification
+        writeBehind.updateOne(
+            getGateway(self.connection).collection(self.dbName, self.collection),
+            {"_id": self.message._id},
+            {"$set": {"status": "read"}})
 
     def setFonts(self):
         size = FontSizePoint
@@ -201,6 +199,9 @@ class NotificationItem(QFrame):
         self.timeLabel.setFont(smallFont)
 
 class Notifications(QFrame):
+    # Exactly the fields of `Unread` / `Read`
+    messageProjection = {"_id": 1, "email": 1, "status": 1, "title": 1, "content": 1, "date": 1, "time": 1}
+
     def __init__(self, connection: MongoClient, async_tasks: list, parent=None):
         super(Notifications, self).__init__(parent)
         path = getFrozenPath(os.path.join("assets", "UI" , "notifications.ui"))
@@ -211,6 +212,8 @@ class Notifications(QFrame):
         
         self.connection = connection
         self.async_tasks = async_tasks
+        # the loads of this window, paused while it is hidden
+        self.tasks = async_tasks.group("Notifications")
         self.dbName = 'notifications'
         self.collection = 'from_system'
         self.unreadsCount = 0
@@ -259,12 +262,28 @@ class Notifications(QFrame):
 
     @pyqtSlot()
     def syncSetContents(self):
-        self.async_tasks.append(self.setContents())
+        self.tasks.append(self.setContents())
 
     def hotReload(self):
+        # load once for the unread count, then only refresh while on screen
+        self.syncSetContents()
         self.hotReloader = QTimer()
         self.hotReloader.start(Schedule.DEFAULT_DELAY)
-        self.hotReloader.timeout.connect(self.syncSetContents)
+        self.hotReloader.timeout.connect(self.reloadIfVisible)
+
+    def reloadIfVisible(self):
+        if self.isVisible():
+            self.syncSetContents()
+
+    def hideEvent(self, event):
+        self.tasks.pause()
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.tasks.paused:
+            self.tasks.resume()
+        self.syncSetContents()
 
 
     async def setContents(self):
@@ -299,8 +318,7 @@ class Notifications(QFrame):
         user_email = user_creds.get('email', '')
         if not user_email:
             return [], []
-        asyncMoongoGet = asyncWrap(mongoGet)
-        data = await asyncMoongoGet(database=self.dbName, collection=self.collection, limit=int(1e2), email=user_email, connection=self.connection)
+        data = await asyncMongoGet(database=self.dbName, collection=self.collection, limit=int(1e2), email=user_email, connection=self.connection, projection=self.messageProjection)
         if not data:
             return [], []
         unreads = [d for d in data if d.get('status', None).lower() == 'unread']
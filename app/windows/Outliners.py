@@ -1,6 +1,6 @@
 import os
 import asyncio
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from pymongo.mongo_client import MongoClient
 
@@ -9,8 +9,10 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import QFrame
 
 from app.config.fonts import QuicksandRegular, FontSizePoint
-from utils.databases import mongoGet
-from utils.asyncJobs import asyncWrap
+import databases.mongodb.Previews as previews
+from utils.asyncDatabases import asyncMongoAggregate
+from utils.asyncJobs import ThreadRun
+from utils.marketCache import marketCache
 from utils.logs import Logger
 from utils.paths import getFrozenPath
 from utils.appHelper import adjustForDPI
@@ -18,25 +20,112 @@ from utils.appHelper import adjustForDPI
 # import resources
 import app.config.resources
 
+# The lists of the market summary, with the fields an outline renders
+MOVER_FIELDS = ("ticker", "companyName", "price", "changes", "changesPercentage")
+SECTOR_FIELDS = ("sector", "changesPercentage")
+OUTLINE_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "biggestGainers": MOVER_FIELDS,
+    "biggestLosers": MOVER_FIELDS,
+    "mostActives": MOVER_FIELDS,
+    "sectorPerformance": SECTOR_FIELDS,
+}
+
+def outlinesPipeline(limit: Optional[int] = None) -> List[Dict]:
+    """
+    Builds the aggregation returning the four lists of the latest market summary, trimmed to the rendered fields.
+    """
+    project: Dict[str, Any] = {"_id": 0}
+    for endpoint, fields in OUTLINE_FIELDS.items():
+        items: Dict[str, Any] = {"$ifNull": [f"$content.performances.{endpoint}", []]}
+        if limit:
+            items = {"$slice": [items, limit]}
+        project[endpoint] = {"$map": {"input": items, "as": "item", "in": {field: f"$$item.{field}" for field in fields}}}
+    return [
+        {"$sort": {"date": -1}},
+        {"$limit": 1},
+        {"$project": project},
+    ]
+
+def topMoversPipeline(k: int, descending: bool = True) -> List[Dict]:
+    """
+    Builds the aggregation returning the `k` tickers that moved the most, from the Explore previews, shaped like the
+    movers of the market summary.
+    """
+    return [
+        {"$match": {"source": "ticker", "growth": {"$ne": None}}},
+        {"$sort": {"growth": -1 if descending else 1}},
+        {"$limit": k},
+        {"$project": {
+            "_id": 0,
+            "ticker": "$key",
+            "companyName": "$name",
+            "price": "$price",
+            "changes": {"$round": [{"$subtract": ["$price", "$previousPrice"]}, 2]},
+            "changesPercentage": {"$concat": [{"$toString": {"$round": ["$growth", 2]}}, "%"]},
+        }},
+    ]
+
 class MarketOutliner:
-    def __init__(self, connection: MongoClient) -> None:
+    # Movers computed from the previews when the market summary lacks a list
+    TOP_MOVERS = 10
+
+    def __init__(self, connection: MongoClient, limit: Optional[int] = None) -> None:
         self.logger = Logger("Market-Outlines")
         self.default_outline_type = "default_void"
         self.default_outline_data = [{self.default_outline_type: None}]
 
         self.connection = connection
+        self.limit = limit
 
-    async def get(self, endpoint: str) -> List[Dict]:
-        await asyncio.sleep(0.1)
+    async def outlines(self) -> Dict[str, List[Dict]]:
+        """
+        Fetches the gainers, losers, most actives and sector performances in a single round trip.
+
+        Returns:
+        - Dict[str, List[Dict]]: The lists by endpoint ("biggestGainers", "biggestLosers", "mostActives",
+          "sectorPerformance"). The last snapshots are returned if the database cannot be read.
+        """
         try:
-            asyncMongoGet = asyncWrap(mongoGet)
-            res: Any = await asyncMongoGet(database="market", collection="marketSummary", connection=self.connection)
-            doc: Dict = res[0] if res else {}
-            target = doc["content"]["performances"]
-            return target[endpoint]
+            res = await asyncMongoAggregate(
+                database="market",
+                collection="marketSummary",
+                pipeline=outlinesPipeline(self.limit),
+                connection=self.connection)
+            if not res:
+                raise ValueError("No market summary found.")
+            outlines: Dict[str, List[Dict]] = res[0]
+            if not outlines.get("biggestGainers"):
+                outlines["biggestGainers"] = await self.topMovers(self.limit or self.TOP_MOVERS, descending=True)
+            if not outlines.get("biggestLosers"):
+                outlines["biggestLosers"] = await self.topMovers(self.limit or self.TOP_MOVERS, descending=False)
+            await ThreadRun(self.snapshot, outlines)
+            return outlines
         except Exception as e:
             self.logger.log("error", "Asset:: Outline Creation error ", e)
-            return []
+            # fall back on the last snapshot of each outline
+            return await ThreadRun(self.lastSnapshot)
+
+    async def topMovers(self, k: int, descending: bool = True) -> List[Dict]:
+        """
+        Returns the `k` biggest gainers (or losers if not `descending`) among the tickers, sorted on the server.
+        """
+        res = await asyncMongoAggregate(
+            database=previews.DATABASE,
+            collection=previews.COLLECTION,
+            pipeline=topMoversPipeline(k, descending),
+            connection=self.connection)
+        return res or []
+
+    def snapshot(self, outlines: Dict[str, List[Dict]]):
+        for endpoint in OUTLINE_FIELDS:
+            marketCache.save(f"marketSummary.{endpoint}", outlines.get(endpoint))
+
+    def lastSnapshot(self) -> Dict[str, List[Dict]]:
+        return {endpoint: marketCache.load(f"marketSummary.{endpoint}") for endpoint in OUTLINE_FIELDS}
+
+    async def get(self, endpoint: str) -> List[Dict]:
+        outlines = await self.outlines()
+        return outlines.get(endpoint)
 
     async def gainers(self):
         return await self.get("biggestGainers")
@@ -98,14 +187,10 @@ class OutlineTitle(QFrame):
 
 async def main():
     outliner = MarketOutliner()
-    gainers = await outliner.gainers()
-    losers = await outliner.losers()
-    most_active = await outliner.mostactive()
-    sector_performances = await outliner.sectorPerformances()
-
+    outlines = await outliner.outlines()
 
     # Do something with the data
-    print(gainers[0])
+    print(outlines["biggestGainers"][0])
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
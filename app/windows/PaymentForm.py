@@ -14,7 +14,7 @@ from app.windows.MessageBox import MessageBox
 from app.config.fonts import RobotoBold, FontSizePoint
 from app.windows.NewAccountOk import AccountAllSet, AccountInitFailure
 from utils.appHelper import setRelativeToMainWindow
-from utils.databases import mongoGet
+from utils.databases import mongoGet, MongoConnectionError
 from utils.appHelper import browse
 from utils.system import restoreSystemPath, killPortProcess
 from utils.paths import getFrozenPath, resourcePath
@@ -89,7 +89,11 @@ class PaymentForm(QFrame):
     def validatePayment(self) -> bool:
         if not self.email:
            return False
-        data = mongoGet(database="UsersAuth", collection="users", query={"user.email": self.email}, connection=self.connection)
+        try:
+            data = mongoGet(database="UsersAuth", collection="users", query={"user.email": self.email}, connection=self.connection)
+        except MongoConnectionError:
+            # already logged, the payment is checked again on the next attempt
+            return False
         if not data:
             return False
         subscriptionField = data[0].get('subscription', {}) 
@@ -1,19 +1,19 @@
 import os
 import json
-import asyncio
 from typing import Any
 from datetime import datetime
 
 from PyQt5 import uic
 from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, QEvent, QThread, pyqtSignal, pyqtSlot, QObject, QTimer
+from PyQt5.QtCore import Qt, QEvent, pyqtSlot, QTimer
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QFrame, QTextEdit
 from pymongo import MongoClient
 
 from utils.databases import mongoGet
 from app.windows.Spinner import Spinner
 from app.handlers.Patterns import Index, Symbol
-from utils.workers import spinnerWork
+from utils.workers import spinnerTask
+from utils.executors import DB_IO, runIn
 from app.config.fonts import RobotoRegular, FontSizePoint
 from app.windows.Styles import chatScrollBarStyle
 from utils.appHelper import clearLayout, adjustForDPI
@@ -35,16 +35,16 @@ class SingleFocus(QWidget):
         self.connection = connection
         self.symbol = symbol
         self.targetCollection = targetCollection
-        target = mongoGet(collection=targetCollection, symbol=self.symbol, connection=self.connection)
         if self.targetCollection =='forex':
-            start = 'price'
+            self.section = 'price'
         elif self.targetCollection in ['commodities', 'indices']:
-            start = 'historical'
+            self.section = 'historical'
         elif self.targetCollection == 'crypto':
-            start = 'historicalData'
+            self.section = 'historicalData'
         else:
             raise ValueError(f"Collection {self.targetCollection} not supported")
-        self.target = target[0][start] if target else None
+        # queried with the quote, off the GUI thread
+        self.target = None
 
         self.initUI()
         QTimer.singleShot(0, self.makeQuoteWithSpinner)
@@ -74,8 +74,12 @@ class SingleFocus(QWidget):
     def setWFlags(self):
         self.setWindowFlags(Qt.FramelessWindowHint)
 
+    def queryTarget(self):
+        target = mongoGet(collection=self.targetCollection, symbol=self.symbol, connection=self.connection)
+        return target[0][self.section] if target else None
+
     async def fetchQuote(self):
-        await asyncio.sleep(2)
+        self.target = await runIn(DB_IO, self.queryTarget)
         if not self.target:
             end = ''
             return
@@ -131,23 +135,5 @@ class SingleFocus(QWidget):
 
     def makeQuoteWithSpinner(self):
         self.spinner = Spinner()
-
-        self.thread = QThread()
-        self.worker = Worker(self.fetchQuote)
-
-        spinnerWork(self.spinner, self.thread, self.worker, self.populateQuote)
-
-class Worker(QObject):
-    finished = pyqtSignal()
-    result = pyqtSignal(list)
-
-    def __init__(self, async_func):
-        super(Worker, self).__init__()
-        self.async_func = async_func
-
-    def run(self):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        financials = loop.run_until_complete(self.async_func())
-        self.result.emit(financials)
-        self.finished.emit()
+        # on the application loop, not a new loop in a new thread
+        self.quoteTask = spinnerTask(self.spinner, self.fetchQuote(), self.populateQuote)
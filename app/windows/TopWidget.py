@@ -23,6 +23,7 @@ from app.windows.HelpFrame import Help
 from app.windows.MenuFrame import Menu
 from app.config.fonts import QuicksandBold, RobotoBold, RobotoRegular, FontSizePoint
 from utils.paths import getFrozenPath
+from utils.taskScheduler import Priority
 
 # import resources
 import app.config.resources
@@ -39,7 +40,7 @@ class PressChatFrame(QFrame):
     def openChat(self):
         if not self.janineWindow:
             self.janineWindow = JanineChat(connection=self.connection, async_tasks=self.async_tasks, parent=self.parent())
-            self.async_tasks.append(handleAuth(self.connection, 1, stackOnCurrentWindow, self.janineWindow))
+            self.async_tasks.submit(handleAuth(self.connection, 1, stackOnCurrentWindow, self.janineWindow), Priority.USER)
         else:
             self.janineWindow = None
 
@@ -61,7 +62,7 @@ class PressExploreFrame(QFrame):
     def openExploreArea(self):
         if not self.summaryWindow:
             self.summaryWindow = MarketSummary(connection=self.connection, async_tasks=self.async_tasks, parent=self.parent())
-            self.async_tasks.append(handleAuth(self.connection, 1, stackOnCurrentWindow, self.summaryWindow))
+            self.async_tasks.submit(handleAuth(self.connection, 1, stackOnCurrentWindow, self.summaryWindow), Priority.USER)
         else:
             self.summaryWindow = None
 
@@ -134,13 +135,13 @@ class Header(QMainWindow):
         assets = ExploreAsset(connection=self.connection, async_tasks=self.async_tasks, parent=self)
         assets.hide()
         self.assetButton.clicked.connect(
-            lambda: self.async_tasks.append(handleAuth(self.connection, 1, stackOnCurrentWindow, assets))
+            lambda: self.async_tasks.submit(handleAuth(self.connection, 1, stackOnCurrentWindow, assets), Priority.USER)
         )
 
         market = ExploreMarket(connection=self.connection, async_tasks=self.async_tasks, parent=self)
         market.hide()
         self.marketButton.clicked.connect(
-            lambda: self.async_tasks.append(handleAuth(self.connection, 1, stackOnCurrentWindow, market))
+            lambda: self.async_tasks.submit(handleAuth(self.connection, 1, stackOnCurrentWindow, market), Priority.USER)
         )
 
         self.docWebEngineView = DocWebEngineView()
@@ -1,6 +1,6 @@
 import sys
 import asyncio
-from PyQt5.QtCore import pyqtSignal, QObject, QThread, Qt, QTimer
+from PyQt5.QtCore import pyqtSignal, QObject, QThread, Qt
 from qasync import QEventLoop, QApplication as QAsyncApplication
 
 from pymongo.mongo_client import MongoClient
@@ -11,6 +11,7 @@ from app.config.scheduler import Schedule
 from app.windows.WarningFrame import Warning
 from utils.connection import deviceIsConnected
 from utils.logs import Logger
+from utils.taskScheduler import TaskScheduler
 
 INIT_TIMEOUT = 3
 SLEEP_SEC = 1
@@ -48,10 +49,6 @@ class Client(QObject):
     """
     The main client class that initializes the application, handles connection errors, and starts the worker thread.
     """
-    async_tasks = []
-    old_len = 0
-    accumulated_tasks_cont = 0 
-
     logger = Logger("Client")
 
     def __init__(self, connection: MongoClient):
@@ -62,6 +59,8 @@ class Client(QObject):
         self.app.setStyle("Oxygen")
 
         self.connection = connection
+        # every frame submits its coroutines here
+        self.async_tasks = TaskScheduler(Schedule.MAX_CONCURRENT_TASKS, Schedule.USER_RESERVED_TASKS)
 
         self.spinner = Spinner()
         self.worker_thread = WorkerThread()
@@ -75,46 +74,13 @@ class Client(QObject):
         """
         self.window = MainWindow(connection=self.connection, async_tasks=self.async_tasks)
         self.window.show()
-        # then schedule async tasks to complete
-        QTimer.singleShot(Schedule.NO_DELAY, self.activelyCompleteNewTasks)
+        # then run the tasks the frames submitted
+        self.async_tasks.start()
         if getattr(sys, 'frozen', False):
             # If the application is frozen (bundled executable) the pyinstall bootloader will close the splash screen
             import pyi_splash
             pyi_splash.close()
 
-    def checkForNewTasks(self):
-        if len(self.async_tasks) > self.old_len:
-            async_tasks_len = len(self.async_tasks)
-            diff = async_tasks_len - self.old_len
-            start_pos = self.old_len
-            end_pos = async_tasks_len
-            self.old_len = async_tasks_len
-            return diff, start_pos, end_pos
-            
-        
-    async def completeNewTasks(self):
-        result = self.checkForNewTasks()
-        if result:
-            diff, start_pos, end_pos = result
-            self.accumulated_tasks_cont += diff
-            if self.accumulated_tasks_cont >= Schedule.ACCUMULATED_TASKS:
-                self.logger.log(
-                    "info", 
-                    f"Completing {self.accumulated_tasks_cont} tasks | Parallel Execution > [completed: {self.accumulated_tasks_cont - diff}] [pending: {diff}]"
-                )
-                self.accumulated_tasks_cont = 0
-            news_tasks = self.async_tasks[start_pos:end_pos]
-            try:
-                await asyncio.gather(*news_tasks, return_exceptions=True)
-            except Exception:
-                raise
-
-    def activelyCompleteNewTasks(self):
-        self.timer = QTimer()
-        self.timer.setInterval(Schedule.NO_DELAY) 
-        self.timer.timeout.connect(lambda: asyncio.ensure_future(self.completeNewTasks()))
-        self.timer.start()
-
     def raiseConnectionError(self):
         """
         Raises a connection error warning.
@@ -1,19 +1,14 @@
 import os
 
-from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 from pymongo.collection import Collection
-from pymongo.database import Database
 
+from utils.databases import getGateway, getMongoClient
 from utils.logs import Logger
 
 logger = Logger("MongoDB-Common")
 
 uri = os.getenv("MONGO_URI")
 
-# Create a new client and connect to the server
-client = MongoClient(uri, server_api=ServerApi('1'))
-
 def mongoGet(database: str = "market", collection: str = ..., sortField: str = "date", limit: int = 1, **kwargs):
     """
     Retrieves documents from a MongoDB collection based on the provided parameters.
@@ -29,24 +24,17 @@ def mongoGet(database: str = "market", collection: str = ..., sortField: str = "
         List[Dict]: A list of dictionaries representing the retrieved documents. If no documents are found, an empty list is returned.
 
     Raises:
-        Exception: If the connection to the MongoDB server fails or an error occurs while fetching the documents.
+        MongoConnectionError: If the MongoDB deployment cannot be reached.
+        Exception: If an error occurs while fetching the documents.
 
     Note:
-        The MongoDB client is created using the `client` object, which is assumed to be defined elsewhere in the codebase.
+        The MongoDB client is the process-wide one handed out by `utils.databases.getMongoClient`.
     """
+    client = getMongoClient(uri)
     try:
-        #confirm successful connection
-        state = client.admin.command('ping')
-        if state['ok'] == 1:
-            db: Database = client[database]
-            collection: Collection = db[collection]
-
-            documents = collection.find(kwargs).sort([(sortField, -1)]).limit(limit=limit)
-        
-            return list(documents)
-        else:
-           e = Exception("MongoDB > Retrieval:: Connection failed.")
-           logger.log(level='error', message="", error=e)
+        target: Collection = getGateway(client).collection(database, collection)
+        documents = target.find(kwargs).sort([(sortField, -1)]).limit(limit=limit)
+        return list(documents)
     except Exception as e:
         logger.log(
             level='error',
@@ -0,0 +1,196 @@
+import json
+import hashlib
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING
+from pymongo.database import Database
+from pymongo.mongo_client import MongoClient
+
+from utils.logs import Logger
+from utils.envHandler import getenv
+from utils.paths import constructPath, forcePath, getFileSystemPath
+
+logger = Logger("MongoDB-Indexes")
+
+@dataclass(frozen=True)
+class IndexSpec:
+    """
+    Declares an index the client relies on, along with the hot query it serves.
+
+    Attributes:
+        database (Optional[str]): The database name. None for the per-user Janine database.
+        collection (str): The collection name.
+        keys (Tuple[Tuple[str, int], ...]): The index keys and directions.
+        unique (bool): Whether the index is unique.
+        probe (Dict[str, Any]): A representative filter of the hot query, explained to detect collection scans.
+        sort (Tuple[Tuple[str, int], ...]): The sort of the hot query.
+    """
+    database: Optional[str]
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    unique: bool = False
+    probe: Dict[str, Any] = field(default_factory=dict, hash=False, compare=False)
+    sort: Tuple[Tuple[str, int], ...] = ()
+
+    @property
+    def name(self) -> str:
+        # Same naming scheme as the server's default, so existing indexes are recognised
+        return "_".join(f"{key}_{direction}" for key, direction in self.keys)
+
+# Every collection the client queries by something else than `_id`
+INDEXES: List[IndexSpec] = [
+    IndexSpec("market", "ticker", (("symbol", ASCENDING),), probe={"symbol": {"$in": ["AAPL"]}}),
+    IndexSpec("market", "crypto", (("symbol", ASCENDING),), probe={"symbol": {"$in": ["BTCUSD"]}}),
+    IndexSpec("market", "commodities", (("symbol", ASCENDING),), probe={"symbol": {"$in": ["GOLDUSD"]}}),
+    IndexSpec("market", "forex", (("name", ASCENDING),), probe={"name": {"$in": ["ARS/MXN"]}}),
+    IndexSpec("market", "indices", (("name", ASCENDING),), probe={"name": {"$in": ["NASDAQ Composite"]}}),
+    IndexSpec("market", "previews", (("source", ASCENDING), ("growth", DESCENDING)), probe={"source": "ticker"}, sort=(("growth", DESCENDING),)),
+    IndexSpec("notifications", "from_system", (("email", ASCENDING), ("status", ASCENDING)), probe={"email": ""}),
+    IndexSpec("UsersAuth", "users", (("user.email", ASCENDING),), probe={"user.email": ""}),
+]
+
+# Indexes of the per-user Janine database
+JANINE_INDEXES: List[IndexSpec] = [
+    IndexSpec(None, "metadata", (("chat.createdAt", DESCENDING),), sort=(("chat.createdAt", DESCENDING),)),
+]
+
+# Indexes of the per-user Janine database, when every chat is stored in the `messages` collection
+JANINE_MESSAGES_INDEXES: List[IndexSpec] = JANINE_INDEXES + [
+    IndexSpec(None, "messages", (("chatId", ASCENDING), ("ts", DESCENDING), ("_id", DESCENDING)), probe={"chatId": ""}, sort=(("ts", DESCENDING), ("_id", DESCENDING))),
+]
+
+def registryVersion(specs: List[IndexSpec]) -> str:
+    """
+    A fingerprint of the declared indexes, so that changing the registry triggers a new verification.
+    """
+    return hashlib.sha1(repr([(spec.database, spec.collection, spec.keys, spec.unique) for spec in specs]).encode()).hexdigest()
+
+def usesCollectionScan(plan: Any) -> bool:
+    """
+    Returns True if a query plan (or any of its input stages) is a collection scan.
+    """
+    if isinstance(plan, dict):
+        if plan.get("stage") == "COLLSCAN":
+            return True
+        return any(usesCollectionScan(value) for value in plan.values())
+    if isinstance(plan, list):
+        return any(usesCollectionScan(value) for value in plan)
+    return False
+
+class IndexManager:
+    """
+    Creates the declared indexes and checks that the hot queries use them, once per install.
+
+    The scopes already verified are recorded with the registry fingerprint in `APP_BASE_PATH/static/indexes.json`,
+    so later launches skip both the `index_information` round trips and the `explain` calls.
+
+    Methods:
+    -------
+    ensure(database: Database, specs: List[IndexSpec]): Creates the missing indexes and warns about collection scans.
+    ensureOnce(scope: str, specs: List[IndexSpec], database: Optional[Database] = None): Runs `ensure` unless `scope` was verified.
+    """
+    _lock = threading.Lock()
+    # scopes verified by this process, to skip even the marker read
+    _verified: Dict[str, str] = {}
+
+    def __init__(self, connection: MongoClient, markerPath: Optional[Path] = None):
+        self.connection = connection
+        self.markerPath = markerPath
+
+    def _markerPath(self) -> Path:
+        if self.markerPath is None:
+            basePath = Path(getFileSystemPath(getenv("APP_BASE_PATH")))
+            self.markerPath = constructPath(basePath, "static", "indexes.json")
+        return self.markerPath
+
+    def _readMarker(self) -> Dict[str, str]:
+        try:
+            with self._markerPath().open("r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _writeMarker(self, marker: Dict[str, str]):
+        path = self._markerPath()
+        forcePath(path)
+        with path.open("w") as f:
+            json.dump(marker, f, indent=2)
+
+    def ensure(self, specs: List[IndexSpec], database: Optional[Database] = None) -> bool:
+        """
+        Creates the missing indexes of `specs`, then explains each hot query and warns if it scans the collection.
+
+        Parameters:
+        - specs (List[IndexSpec]): The indexes to verify.
+        - database (Database): The database of the specs whose `database` is None.
+
+        Returns:
+        - bool: True if every index exists.
+        """
+        ok = True
+        for spec in specs:
+            target = database if spec.database is None else self.connection[spec.database]
+            if target is None:
+                continue
+            collection = target[spec.collection]
+            try:
+                if spec.name not in collection.index_information():
+                    collection.create_index(list(spec.keys), name=spec.name, unique=spec.unique)
+                    logger.log("info", f"Created index {spec.name} on {target.name}.{spec.collection}")
+            except Exception as e:
+                ok = False
+                logger.log("error", "Unable to create index", e, {"database": target.name, "collection": spec.collection, "index": spec.name})
+                continue
+
+            try:
+                cursor = collection.find(spec.probe)
+                if spec.sort:
+                    cursor = cursor.sort(list(spec.sort))
+                plan = cursor.limit(1).explain().get("queryPlanner", {}).get("winningPlan", {})
+                if usesCollectionScan(plan):
+                    logger.log(
+                        "warning",
+                        "Hot query falls back to a collection scan",
+                        params={"database": target.name, "collection": spec.collection, "probe": spec.probe, "sort": spec.sort})
+            except Exception as e:
+                logger.log("error", "Unable to explain hot query", e, {"database": target.name, "collection": spec.collection})
+        return ok
+
+    def ensureOnce(self, scope: str, specs: List[IndexSpec], database: Optional[Database] = None) -> bool:
+        """
+        Runs `ensure` unless `scope` was already verified against the current registry on this install.
+
+        Returns:
+        - bool: True if the indexes are known to exist.
+        """
+        version = registryVersion(specs)
+        with self._lock:
+            if self._verified.get(scope) == version:
+                return True
+            marker = self._readMarker()
+            if marker.get(scope) == version:
+                self._verified[scope] = version
+                return True
+
+        ok = self.ensure(specs, database)
+        if ok:
+            with self._lock:
+                marker = self._readMarker()
+                marker[scope] = version
+                self._verified[scope] = version
+                try:
+                    self._writeMarker(marker)
+                except Exception as e:
+                    logger.log("error", "Unable to record verified indexes", e, {"scope": scope})
+        return ok
+
+def ensureIndexes(connection: MongoClient):
+    """
+    Verifies the shared indexes of `INDEXES` in a background thread, so the startup path is not delayed.
+    """
+    thread = threading.Thread(target=lambda: IndexManager(connection).ensureOnce("shared", INDEXES), daemon=True)
+    thread.start()
+    return thread
@@ -1,15 +1,19 @@
+from datetime import datetime, timezone
 from typing import Dict, Any
 
+from bson import ObjectId
 from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 from pymongo.database import Database
 from pymongo.collection import Collection
-from pymongo import DESCENDING
 from pymongo.errors import ConnectionFailure, CollectionInvalid
 
 from databases.mongodb.Operations import *
+from databases.mongodb.Indexes import IndexManager, JANINE_INDEXES, JANINE_MESSAGES_INDEXES
+from utils.databases import getMongoClient
+from utils.writeBehind import writeBehind
 from utils.envHandler import getenv
 from utils.logs import Logger
+from utils.time import now
 from models.reader.cache import cached_credentials
 from models.config.args import ModelsArgs
 
@@ -21,7 +25,11 @@ if not ID or not EMAIL:
     logger.log('warning', 'Empty user credentials.', ValueError('User credentials not found in cache.'))
 
 class JanineMongoDatabase:
-    def __init__(self, uri: str = connectionStr, user: str=f'{ID}-{EMAIL}', title: str = None, connection: MongoClient = None):
+    # `createdAt` only exists for the TTL index and `chatId`/`ts` for the messages storage, none is part of the chat context
+    historyProjection = {"_id": 0, "createdAt": 0, "chatId": 0, "ts": 0}
+    messagesCollection = "messages"
+
+    def __init__(self, uri: str = connectionStr, user: str=f'{ID}-{EMAIL}', title: str = None, connection: MongoClient = None, storage: str = ModelsArgs.CHAT_STORAGE):
         self.uri = uri
         self.user = user.split('.')[0][:36] # Comply with mongodb db name max length
         self.id: str  = ID
@@ -31,6 +39,15 @@ class JanineMongoDatabase:
         self.chatCollections: list[str] = None
         self.chatHistory: Collection = None
         self.title = title
+        # "collections": one collection per chat, `chatHistory` is the active chat's collection
+        # "messages": every chat in `messagesCollection`, `chatHistory` is that collection and `chatId` the active chat
+        self.storage = storage
+        self.chatId: Any = None
+        self.chatIds: Dict[str, Any] = {}
+
+    @property
+    def singleCollection(self) -> bool:
+        return self.storage == "messages"
 
     def connect(self):
         """
@@ -38,7 +55,7 @@ class JanineMongoDatabase:
         """
         try:
             if not self.client:
-                self.client = MongoClient(self.uri, server_api=ServerApi('1'))
+                self.client = getMongoClient(self.uri)
             self.database = self.client[self.user]
         except ConnectionFailure as  conn_failure:
             logger.log("error", "Failed to connect to MongoDB", conn_failure)
@@ -52,27 +69,129 @@ class JanineMongoDatabase:
         try:
             self.connect()
             if self.title is not None:
-                self.chatHistory = self.database[self.title]
+                title = self.title
+            if title:
+                self.selectChat(title)
+                if not self.singleCollection:
+                    self.applyRetention(title)
             else:
-                if title:
-                    self.chatHistory = self.database[title]
-                else:
-                    logger.log("error", "Chat title not provided", ValueError("Chat title not provided"))
+                logger.log("error", "Chat title not provided", ValueError("Chat title not provided"))
         except CollectionInvalid as col_invalid:
             logger.log("error", "Invalid title: Failed to create chat history collection", col_invalid)
         except Exception as e:
             logger.log("error", "Failed to create chat", e)
 
+    def newChat(self, title: str):
+        """
+        Registers a new chat in the metadata collection and makes it the active chat.
+
+        Parameters:
+        title : str
+            The chat title.
+        """
+        if self.database is None:
+            self.connect()
+        chat = {'createdAt': now(), 'title': title}
+        if self.singleCollection:
+            # born in the messages collection, there is nothing to migrate
+            chat['migrated'] = True
+        result = self.database['metadata'].insert_one({'chat': chat}) #  insert a metadata record to properly sort collections
+        self.chatIds[title] = result.inserted_id
+        self.createChat(title=title)
+        if self.singleCollection:
+            if ModelsArgs.CHAT_RETENTION == "ttl":
+                self.applyRetention(self.messagesCollection)
+        else:
+            # written directly, a queued insert could land after the delete
+            insert(self.chatHistory, {'title': title}) # insert dummy data into collection to properly initialize collection
+            self.delete({'title': title}) # delete right away
+
+    def selectChat(self, title: str):
+        """
+        Makes `title` the active chat: the target of `insert`, `history` and `deleteExcess`.
+        """
+        if self.singleCollection:
+            self.chatHistory = self.database[self.messagesCollection]
+            self.chatId = self.resolveChatId(title)
+        else:
+            self.chatHistory = self.database[title]
+
+    def resolveChatId(self, title: str) -> Any:
+        if title not in self.chatIds:
+            doc = self.database['metadata'].find_one({'chat.title': title}, {'_id': 1})
+            if doc is None:
+                raise Exception(f"Chat not found: {title}")
+            self.chatIds[title] = doc['_id']
+        return self.chatIds[title]
+
+    def loadChat(self, title: str, limit: int):
+        """
+        Retrieves the first `limit` messages of a chat, in chronological order, for display.
+        """
+        # the messages just sent may still be queued
+        writeBehind.flush(ModelsArgs.WRITE_FLUSH_TIMEOUT)
+        if self.singleCollection:
+            return list(
+                self.database[self.messagesCollection]
+                .find({'chatId': self.resolveChatId(title)}, self.historyProjection)
+                .sort([('ts', 1), ('_id', 1)]) # migrated messages share `ts` within a second
+                .limit(limit))
+        return list(self.database[title].find().sort("content.date", 1).limit(limit))
+
+    def renameChat(self, title: str, newTitle: str):
+        """
+        Renames a chat. With the messages storage, only its metadata record changes.
+        """
+        # a queued insert landing afterwards would recreate the old collection
+        writeBehind.flush(ModelsArgs.WRITE_FLUSH_TIMEOUT)
+        self.database['metadata'].update_one({'chat.title': title}, {'$set': {'chat.title': newTitle}})
+        if self.singleCollection:
+            if title in self.chatIds:
+                self.chatIds[newTitle] = self.chatIds.pop(title)
+        else:
+            self.database[title].rename(newTitle)
+
+    def dropChat(self, title: str):
+        """
+        Deletes a chat and its messages.
+        """
+        # a queued insert landing afterwards would bring messages of the chat back
+        writeBehind.flush(ModelsArgs.WRITE_FLUSH_TIMEOUT)
+        if self.singleCollection:
+            self.database[self.messagesCollection].delete_many({'chatId': self.resolveChatId(title)})
+            self.chatIds.pop(title, None)
+        else:
+            self.database.drop_collection(title)
+        self.database['metadata'].delete_one({'chat.title': title})
+
+    def applyRetention(self, title: str):
+        """
+        Let the server bound a new chat according to `ModelsArgs.CHAT_RETENTION`.
+
+        In "capped" mode, the chat is created as a capped collection holding at most `ModelsArgs.MAX_CHAT_DOCS` messages.
+        In "ttl" mode, a TTL index on 'createdAt' expires messages after `ModelsArgs.CHAT_TTL_SECONDS`.
+        In "trim" mode (the default), nothing is done here and `deleteExcess` trims the chat after each reply.
+        Capped collections cannot bound a chat sharing the messages storage, which then falls back to trimming.
+        """
+        if ModelsArgs.CHAT_RETENTION == "capped" and not self.singleCollection:
+            if title not in self.database.list_collection_names(filter={"name": title}):
+                self.database.create_collection(
+                    title, capped=True, size=ModelsArgs.CHAT_CAPPED_SIZE_BYTES, max=ModelsArgs.MAX_CHAT_DOCS)
+        elif ModelsArgs.CHAT_RETENTION == "ttl":
+            self.database[title].create_index("createdAt", expireAfterSeconds=ModelsArgs.CHAT_TTL_SECONDS)
+
     def getCollections(self):
         try:
             self.ensureMetadataIndex()
+            if self.singleCollection:
+                self.migrateToMessages()
             self.chatCollections = self.getSortedCollections()
             if self.chatCollections and len(self.chatCollections) > 0:
                 if self.title is not None:
-                    self.chatHistory = self.database[self.title]
+                    self.selectChat(self.title)
                 else:
                     recentChat = self.chatCollections[-1]
-                    self.chatHistory = self.database[recentChat]
+                    self.selectChat(recentChat)
             else:
                 self.chatHistory = None
                 self.chatCollections = None
@@ -83,28 +202,72 @@ class JanineMongoDatabase:
     
     def ensureMetadataIndex(self):
         """
-        Ensure that a metadata collection exists and has an index on 'createdAt' field.
+        Ensure that the metadata collection has an index on the 'chat.createdAt' field (verified once per install),
+        as well as the messages collection on `(chatId, ts)` with the messages storage.
         """
         try:
-            metadataCollection = self.database['metadata']
-            # Create index on 'createdAt' field if it does not exist
-            index = metadataCollection.index_information()
-            if 'createdAt_DESC' not in index:
-                # Create index on 'createdAt' field
-                metadataCollection.create_index([('chat.createdAt', DESCENDING)])
+            if self.singleCollection:
+                IndexManager(self.client).ensureOnce(f"janine-messages:{self.user}", JANINE_MESSAGES_INDEXES, self.database)
+            else:
+                IndexManager(self.client).ensureOnce(f"janine:{self.user}", JANINE_INDEXES, self.database)
         except Exception as e:
             logger.log("error", "Failed to create metadata index", e)
     
     def getSortedCollections(self, limit: int = ModelsArgs.MAX_CHAT_COLLECTIONS):
         metadataCollection = self.database['metadata']
-        recentCollections = metadataCollection.find().sort('chat.createdAt', -1).limit(limit)
+        recentCollections = metadataCollection.find({}, {'chat.title': 1}).sort('chat.createdAt', -1).limit(limit)
         # Extract collection names
-        titles = [doc['chat']['title'] for doc in recentCollections]
+        titles = []
+        for doc in recentCollections:
+            titles.append(doc['chat']['title'])
+            self.chatIds[doc['chat']['title']] = doc['_id']
         return titles
 
+    def migrateToMessages(self):
+        """
+        Moves the chats stored one collection per chat into the `messages` collection.
+
+        Each chat's documents are copied in insertion order with its `chatId` and a `ts` taken from the original `_id`,
+        then the chat is flagged as migrated in its metadata record and its collection is dropped. Chats already
+        flagged are skipped, so the migration resumes where it stopped and costs a single query once done.
+        Chats without a legacy collection are flagged without touching their messages.
+
+        Returns:
+            int: The number of migrated chats.
+        """
+        metadataCollection = self.database['metadata']
+        messages = self.database[self.messagesCollection]
+        migrated = 0
+        pending = list(metadataCollection.find({'chat.migrated': {'$ne': True}}, {'chat.title': 1}))
+        if not pending:
+            return migrated
+        legacy = set(self.database.list_collection_names())
+        for doc in pending:
+            title = doc['chat']['title']
+            try:
+                if title not in legacy:
+                    # nothing to copy: the messages of this chat, if any, are already the only copy
+                    metadataCollection.update_one({'_id': doc['_id']}, {'$set': {'chat.migrated': True}})
+                    continue
+                # a copy interrupted half way is redone from scratch, the legacy collection replaces those rows
+                messages.delete_many({'chatId': doc['_id']})
+                items = []
+                for item in self.database[title].find().sort('_id', 1):
+                    _id = item.pop('_id')
+                    items.append({**item, 'chatId': doc['_id'], 'ts': _id.generation_time if isinstance(_id, ObjectId) else datetime.now(timezone.utc)})
+                if items:
+                    messages.insert_many(items, ordered=True)
+                metadataCollection.update_one({'_id': doc['_id']}, {'$set': {'chat.migrated': True}})
+                self.database.drop_collection(title)
+                migrated += 1
+            except Exception as e:
+                logger.log("error", "Failed to migrate chat to the messages collection", e, {"title": title})
+        return migrated
+
     def insert(self, item: Dict[str, Any]):
         """
-        Inserts a chat history item into the MongoDB collection.
+        Queues a chat history item for insertion into the MongoDB collection. The write is sent in the background
+        by the write-behind queue; call `writeBehind.flush()` before reading the history back.
 
         Parameters:
         item : Dict[str, Any]
@@ -112,41 +275,71 @@ class JanineMongoDatabase:
         """
         if self.chatHistory is None:
             raise Exception("Chat history collection not initialized")
-        insert(self.chatHistory, item)
+        if ModelsArgs.CHAT_RETENTION == "ttl":
+            item = {**item, "createdAt": datetime.now(timezone.utc)}
+        if self.singleCollection:
+            item = {**item, "chatId": self.chatId, "ts": datetime.now(timezone.utc)}
+        writeBehind.insertOne(self.chatHistory, item)
 
-    def history(self):
+    def history(self, limit: int = ModelsArgs.CONTEXT_MESSAGES, crossChatLimit: int = ModelsArgs.CROSS_CHAT_MESSAGES, crossChats: int = ModelsArgs.CROSS_CHAT_COLLECTIONS):
         """
-        Retrieves all chat history items from the MongoDB collection.
+        Retrieves the chat context: the most recent messages of the active chat, optionally preceded by a bounded
+        window over the most recent other chats.
+
+        Every read walks an index backwards in insertion order (`_id`, or `(chatId, ts)` with the messages storage)
+        and stops at its limit, so the cost stays flat however many chats and messages the user accumulates.
+
+        Parameters:
+        limit : int
+            The number of most recent messages of the active chat.
+        crossChatLimit : int
+            The total number of messages taken from other chats. 0 disables the cross-chat window.
+        crossChats : int
+            The number of most recent other chats the cross-chat window looks into.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries representing the chat history items.
+            List[Dict[str, Any]]: The chat history items, oldest first.
         """
         if self.chatHistory is None:
             raise Exception("Chat history collection not initialized")
-        elif self.chatCollections:
+
+        if self.singleCollection:
             history = []
-            hist_list =[fetchAll(self.database[collection]) for collection in self.chatCollections]
-            for hist in hist_list:
-                if isinstance(hist, list):
-                    for item in hist:
-                        history.append(item)
-                else:
-                    history.append(hist)
-            return history
-        elif not self.chatCollections and self.chatHistory is not None:
-            return fetchAll(self.chatHistory)
-        else:
-            return []
-    
+            if crossChatLimit > 0 and self.chatCollections:
+                others = [self.chatIds[title] for title in self.chatCollections if self.chatIds.get(title) not in (None, self.chatId)][:crossChats]
+                history = fetchLatest(self.chatHistory, crossChatLimit, self.historyProjection, {'chatId': {'$in': others}}, 'ts')
+            return history + fetchLatest(self.chatHistory, limit, self.historyProjection, {'chatId': self.chatId}, 'ts')
+
+        history = []
+        if crossChatLimit > 0 and self.chatCollections:
+            remaining = crossChatLimit
+            others = [title for title in self.chatCollections if title != self.chatHistory.name][:crossChats]
+            for title in others:
+                if remaining <= 0:
+                    break
+                items = fetchLatest(self.database[title], remaining, self.historyProjection)
+                history = items + history
+                remaining -= len(items)
+
+        return history + fetchLatest(self.chatHistory, limit, self.historyProjection)
+
     def deleteExcess(self, max:int=ModelsArgs.MAX_CHAT_DOCS):
-        """Chat context up to specified max chat items. Delete the excess."""
+        """
+        Chat context up to specified max chat items. Delete the excess.
+
+        The oldest messages are removed with a single `delete_many` below an `_id` (or `ts`) cutoff. Capped chats are
+        bounded by the server, so nothing is done in "capped" mode.
+
+        Returns:
+            int: The number of deleted messages.
+        """
         if self.chatHistory is None:
             raise Exception("Chat history collection not initialized")
-        count = self.chatHistory.count_documents({})
-        excess = count-max
-        print(f"Database contains {count} documents")
-        if excess > 0:
-            deleteMany(self.chatHistory, limit=excess)
+        if self.singleCollection:
+            return keepLatest(self.chatHistory, max, {'chatId': self.chatId}, 'ts')
+        if ModelsArgs.CHAT_RETENTION == "capped":
+            return 0
+        return keepLatest(self.chatHistory, max)
 
     def delete(self, query: Dict[str, Any]):
         """
@@ -158,4 +351,6 @@ class JanineMongoDatabase:
         """
         if self.chatHistory is None:
             raise Exception("Chat history collection not initialized")
-        delete(self.chatHistory, query)
\ No newline at end of file
+        if self.singleCollection:
+            query = {**query, "chatId": self.chatId}
+        delete(self.chatHistory, query)
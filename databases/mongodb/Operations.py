@@ -24,12 +24,13 @@ def insert(collection: Collection, item: Dict[str, Any]) -> None:
     except Exception as e:
         print(f"An error occurred while inserting the item: {e}")
 
-def fetchAll(collection: Collection):
+def fetchAll(collection: Collection, projection: Dict[str, Any] = {"_id": 0}):
     """
     Retrieves all documents from a specified MongoDB collection.
 
     Args:
         collection (Collection): The MongoDB collection to fetch documents from.
+        projection (Dict[str, Any], optional): The fields to retrieve. Defaults to every field but '_id'.
 
     Returns:
         list: A list of documents from the specified collection. If an error occurs, an empty list is returned.
@@ -41,11 +42,37 @@ def fetchAll(collection: Collection):
         str: A message indicating that an error occurred while fetching documents.
     """
     try:
-        return list(collection.find({}, {"_id": 0}))
+        return list(collection.find({}, projection))
     except Exception as e:
         print(f"An error occurred while fetching all documents: {e}")
         return []
 
+def fetchLatest(collection: Collection, limit: int, projection: Dict[str, Any] = {"_id": 0}, query: Dict[str, Any] = {}, sortField: str = '_id') -> list:
+    """
+    Retrieves the most recent documents of a MongoDB collection, in insertion order.
+
+    Args:
+        collection (Collection): The MongoDB collection to fetch documents from.
+        limit (int): The maximum number of documents to fetch.
+        projection (Dict[str, Any], optional): The fields to retrieve. Defaults to every field but '_id'.
+        query (Dict[str, Any], optional): The query to filter the documents. Defaults to every document.
+        sortField (str, optional): The field holding the insertion order. Defaults to '_id'.
+
+    Returns:
+        list: The `limit` most recent documents, oldest first. If an error occurs, an empty list is returned.
+
+    The documents are read backwards on an index ending with `sortField` (then `_id`, which breaks the ties of a
+    coarse `sortField`), so only `limit` documents are scanned.
+    """
+    if limit <= 0:
+        return []
+    sort = [(sortField, -1)] if sortField == '_id' else [(sortField, -1), ('_id', -1)]
+    try:
+        return list(collection.find(query, projection).sort(sort).limit(limit))[::-1]
+    except Exception as e:
+        print(f"An error occurred while fetching the latest documents: {e}")
+        return []
+
 def fetchOne(collection: Collection, query: Dict[str, Any]) -> Any:
     """
     Fetches a single document from a MongoDB collection based on the provided query.
@@ -95,31 +122,60 @@ def deleteFirst(collection: Collection):
 
 def deleteMany(collection: Collection, limit:int):
     """
-    Deletes multiple documents from a MongoDB collection based on the provided limit.
+    Deletes the oldest documents of a MongoDB collection, up to the provided limit.
 
     Args:
         collection (Collection): The MongoDB collection to delete the documents from.
         limit (int): The maximum number of documents to delete.
 
     Returns:
-        None
+        int: The number of deleted documents.
 
-    This function retrieves the specified number of documents from the collection, sorted by the '_id' field in ascending order, and deletes them. If the collection is empty or an error occurs, no action is taken.
+    This function looks up the `_id` of the limit-th oldest document and removes every document up to it with a single
+    `delete_many`, so the cost is two round trips whatever the limit. If the collection is empty, no action is taken.
 
     Note:
         The '_id' field is used to sort and delete the documents. If the collection does not have an '_id' field, this function may not work as expected.
 
     Example:
         >>> deleteMany(collection, 10)
-        Deleted at id ObjectId('...')
-        Deleted at id ObjectId('...')
-            ...
+        10
     """
-    l = collection.find().sort('_id', 1).limit(limit)
-    if l:
-        for i in l:
-            collection.delete_one({'_id': i['_id']})
-            print(f"Deleted at id {i['_id']}")
+    if limit <= 0:
+        return 0
+    cutoff = list(collection.find({}, {'_id': 1}).sort('_id', 1).skip(limit - 1).limit(1))
+    if not cutoff:
+        # fewer documents than the limit, delete them all
+        return collection.delete_many({}).deleted_count
+    return collection.delete_many({'_id': {'$lte': cutoff[0]['_id']}}).deleted_count
+
+def keepLatest(collection: Collection, keep: int, query: Dict[str, Any] = {}, sortField: str = '_id'):
+    """
+    Deletes every document of a MongoDB collection but the `keep` most recent ones.
+
+    Args:
+        collection (Collection): The MongoDB collection to trim.
+        keep (int): The number of most recent documents to keep.
+        query (Dict[str, Any], optional): The query restricting the documents to trim. Defaults to every document.
+        sortField (str, optional): The field holding the insertion order. Defaults to '_id'.
+
+    Returns:
+        int: The number of deleted documents.
+
+    The `sortField` value of the oldest document to keep is looked up with a single indexed query, then everything
+    older is removed with one `delete_many`. No count is needed beforehand.
+
+    Example:
+        >>> keepLatest(collection, 50)
+        3
+    """
+    if keep <= 0:
+        return collection.delete_many(query).deleted_count
+    cutoff = list(collection.find(query, {sortField: 1}).sort(sortField, -1).skip(keep - 1).limit(1))
+    if not cutoff:
+        # not more documents than `keep`
+        return 0
+    return collection.delete_many({**query, sortField: {'$lt': cutoff[0][sortField]}}).deleted_count
 
 
 def delete(collection: Collection, query: Dict[str, Any]):
@@ -0,0 +1,166 @@
+import os
+import argparse
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo.mongo_client import MongoClient
+
+from utils.databases import getMongoClient, getGateway
+from utils.asyncDatabases import asyncMongoGet
+from utils.deltaSync import DeltaSync
+from utils.logs import Logger
+from app.config.balancer import BatchBalance
+
+logger = Logger("MongoDB-Previews")
+
+DATABASE = "market"
+COLLECTION = "previews"
+# Sparkline points kept per preview, the window drawn by the Explore cards
+WINDOW = BatchBalance.SERIES_WINDOW
+
+@dataclass(frozen=True)
+class PreviewSource:
+    """
+    Describes how the preview of an Explore card is derived from a market collection.
+
+    Attributes:
+        collection (str): The source collection.
+        key (str): The field identifying a card (e.g. "symbol").
+        series (Optional[str]): The path of the embedded quotes array. None if the cards draw no chart.
+        newestFirst (bool): Whether `series` is sorted newest first.
+        logo (Optional[str]): The path of the logo URL.
+        quote (Optional[str]): The path of a `[{price, changesPercentage}]` quote, preferred over the series for the
+            price and growth.
+    """
+    collection: str
+    key: str
+    series: Optional[str] = None
+    newestFirst: bool = False
+    logo: Optional[str] = None
+    quote: Optional[str] = None
+
+# The collections the Explore cards are painted from
+PREVIEW_SOURCES: List[PreviewSource] = [
+    PreviewSource("ticker", "symbol", "ticker.historical.price.historical", newestFirst=True, logo="ticker.general.outlook.image"),
+    PreviewSource("crypto", "symbol", "historicalData.daily.historical", newestFirst=True, quote="historicalData.quote"),
+    PreviewSource("indices", "name", "historical.quotes"),
+    PreviewSource("forex", "name", "price.historical.quotes", quote="price.quote"),
+    PreviewSource("commodities", "symbol"),
+]
+
+def previewId(collection: str, key: Any) -> str:
+    return f"{collection}:{key}"
+
+def previewPipeline(source: PreviewSource, window: int = WINDOW) -> List[Dict]:
+    """
+    Builds the aggregation that writes the previews of `source` into the previews collection.
+
+    Each preview holds what a card shows: `name`, `symbol`, `logo`, `price`, `previousPrice`, `growth` and the last
+    `window` `points` (`{date, value}`, oldest first), along with `source`, `key` and `updatedAt`.
+    """
+    if source.series:
+        series = {"$ifNull": [f"${source.series}", []]}
+        if source.newestFirst:
+            latest = {"$reverseArray": {"$slice": [series, window]}}
+        else:
+            latest = {"$slice": [series, -window]}
+        points = {"$map": {"input": latest, "as": "point", "in": {"date": "$$point.date", "value": "$$point.adjClose"}}}
+    else:
+        points = {"$literal": []}
+
+    price = {"$arrayElemAt": ["$points.value", -1]}
+    previousPrice = {"$arrayElemAt": ["$points.value", -2]}
+    growth = {"$cond": [
+        {"$and": [{"$gt": ["$previousPrice", 0]}, {"$ne": [{"$type": "$price"}, "missing"]}]},
+        {"$multiply": [100, {"$divide": [{"$subtract": ["$price", "$previousPrice"]}, "$previousPrice"]}]},
+        None,
+    ]}
+
+    return [
+        # a document without a key would merge into a single shared `null` preview
+        {"$match": {source.key: {"$exists": True, "$ne": None}}},
+        {"$project": {
+            "_id": {"$concat": [f"{source.collection}:", {"$toString": f"${source.key}"}]},
+            "source": {"$literal": source.collection},
+            "key": f"${source.key}",
+            "symbol": "$symbol",
+            "name": "$name",
+            "logo": f"${source.logo}" if source.logo else {"$literal": None},
+            "quote": {"$arrayElemAt": [f"${source.quote}", 0]} if source.quote else {"$literal": None},
+            "points": points,
+        }},
+        {"$set": {"price": price, "previousPrice": previousPrice}},
+        {"$set": {"growth": growth}},
+        {"$set": {
+            # the source's own quote is more recent than the last daily point
+            "price": {"$ifNull": ["$quote.price", "$price"]},
+            "growth": {"$ifNull": ["$quote.changesPercentage", "$growth"]},
+            "updatedAt": "$$NOW",
+        }},
+        {"$unset": "quote"},
+        {"$merge": {"into": {"db": DATABASE, "coll": COLLECTION}, "on": "_id", "whenMatched": "replace", "whenNotMatched": "insert"}},
+    ]
+
+def refreshPreviews(connection: MongoClient, window: int = WINDOW, sources: Optional[List[PreviewSource]] = None) -> int:
+    """
+    Rewrites the previews collection from the market collections. The aggregations run entirely on the server.
+
+    Returns:
+    - int: The number of previews in the collection.
+    """
+    for source in sources or PREVIEW_SOURCES:
+        try:
+            getGateway(connection).collection(DATABASE, source.collection).aggregate(previewPipeline(source, window))
+            logger.log("info", f"Refreshed the previews of {DATABASE}.{source.collection}")
+        except Exception as e:
+            logger.log("error", "Unable to refresh previews", e, {"collection": source.collection})
+    return connection[DATABASE][COLLECTION].estimated_document_count()
+
+def previewIds(items: Dict[str, Iterable[Any]]) -> List[str]:
+    return [previewId(collection, key) for collection, keys in items.items() for key in keys]
+
+async def loadPreviews(connection: MongoClient, items: Dict[str, Iterable[Any]], **kwargs) -> List[Dict]:
+    """
+    Loads the previews of the given cards with a single query.
+
+    Parameters:
+    - items (Dict[str, Iterable[Any]]): The card keys, by source collection (e.g. {"indices": ["NASDAQ Composite"]}).
+    - kwargs: Passed to `asyncMongoGet` (e.g. `token`).
+
+    Returns:
+    - List[Dict]: The previews found. Empty if the collection is missing or not maintained.
+    """
+    ids = previewIds(items)
+    previews = await asyncMongoGet(
+        database=DATABASE,
+        collection=COLLECTION,
+        sortField="_id",
+        limit=len(ids),
+        connection=connection,
+        _id={"$in": ids},
+        **kwargs)
+    return previews or []
+
+def previewSync(connection: MongoClient, items: Dict[str, Iterable[Any]], snapshot: str, **kwargs) -> DeltaSync:
+    """
+    A `DeltaSync` following the previews of the given cards, refreshed by each run of the job.
+    """
+    return DeltaSync(
+        connection=connection,
+        collection=COLLECTION,
+        key="_id",
+        keys=previewIds(items),
+        database=DATABASE,
+        watermarkField="updatedAt",
+        snapshot=snapshot,
+        **kwargs)
+
+if __name__ == "__main__":
+    # e.g. python -m databases.mongodb.Previews --uri mongodb://localhost:27017
+    parser = argparse.ArgumentParser(description="Rewrite the previews collection read by the Explore cards.")
+    parser.add_argument("--uri", default=os.getenv("MONGO_URI"), help="MongoDB connection string. Default is MONGO_URI.")
+    parser.add_argument("--window", type=int, default=WINDOW, help="Sparkline points kept per preview.")
+    args = parser.parse_args()
+
+    count = refreshPreviews(getMongoClient(args.uri), window=args.window)
+    print(f"{count} previews in {DATABASE}.{COLLECTION}")
@@ -5,11 +5,11 @@ from typing import Dict
 from pathlib import Path
 
 from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 from pymongo.collection import Collection
 from pymongo.database import Database
 
 from app.handlers.HashWorker import Hasher
+from utils.databases import getMongoClient, queryCache
 from utils.fileHelper import hideFolder
 from utils.paths import constructPath, getFileSystemPath
 from utils.envHandler import getenv
@@ -92,7 +92,7 @@ class UserAuthentification:
     Attributes:
     -----------
     client : MongoClient
-        A MongoDB client instance for connecting to the database.
+        A MongoDB client instance for connecting to the database. Resolved lazily from the shared registry.
     database : Database
         The MongoDB database instance for storing user credentials.
     users : Collection
@@ -112,12 +112,25 @@ class UserAuthentification:
         Deletes a user from the database based on their email.
     """
     def __init__(self, connection_str: str, connection: MongoClient = None):
-        self.client = connection or MongoClient(connection_str, server_api=ServerApi('1'))
-        self.database: Database = self.client.UsersAuth
-        self.users: Collection = self.database.users
+        self.connection_str = connection_str
+        self._client = connection
 
         self.hasher = Hasher()
 
+    @property
+    def client(self) -> MongoClient:
+        if self._client is None:
+            self._client = getMongoClient(self.connection_str)
+        return self._client
+
+    @property
+    def database(self) -> Database:
+        return self.client.UsersAuth
+
+    @property
+    def users(self) -> Collection:
+        return self.database.users
+
     def login(self, email: str, password: str) -> bool:
         """
         Authenticates a user with the provided email and password.
@@ -171,6 +184,7 @@ class UserAuthentification:
         credentials = credentials.integratePswdHash(hashedPassword)
         credDict = credentials.toDict(id=uuid.uuid4().hex)
         self.users.insert_one(credDict)
+        queryCache.invalidate("UsersAuth", "users")
 
         # welcome user by sending a notification targeted to them
         user_welcomed = self.welcome_user(
@@ -236,6 +250,7 @@ class UserAuthentification:
             bool: True if the user was successfully deleted, False otherwise.
         """
         result = self.users.delete_one({"user.email": email})
+        queryCache.invalidate("UsersAuth", "users")
         return result.deleted_count > 0
     
     def welcome_user(self, connection: MongoClient, email: str, firstname: str ):
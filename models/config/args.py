@@ -2,6 +2,21 @@ class ModelsArgs:
     MIN_TOKENS_COUNT_FOR_CONTEXT = 24
     MAX_CHAT_DOCS = 50
     MAX_CHAT_COLLECTIONS = 50
+    # Context sent with each completion: the latest messages of the active chat,
+    # plus an optional window over the latest other chats (disabled when 0)
+    CONTEXT_MESSAGES = 20
+    CROSS_CHAT_MESSAGES = 0
+    CROSS_CHAT_COLLECTIONS = 3
+    # How chats are kept under MAX_CHAT_DOCS: "trim" (client side, after each reply),
+    # "capped" (capped collections) or "ttl" (messages expire after CHAT_TTL_SECONDS)
+    CHAT_RETENTION = "trim"
+    CHAT_CAPPED_SIZE_BYTES = 16 * 1024 * 1024
+    CHAT_TTL_SECONDS = 30 * 24 * 3600
+    # How chats are stored: "collections" (one collection per chat) or "messages"
+    # (one `messages` collection per user, keyed by (chatId, ts)); see JanineMongoDatabase.migrateToMessages
+    CHAT_STORAGE = "collections"
+    # Seconds a completion waits for queued chat inserts before reading the history
+    WRITE_FLUSH_TIMEOUT = 5
 
 class EndpointsArgs:
     MAX_QUEUE_SIZE = 1000
@@ -9,6 +9,8 @@ from janine.models.RichFile import FileCompletion
 from models.config.args import ModelsArgs
 from models.api.requests import RequestManager
 from databases.mongodb.JanineDB import JanineMongoDatabase
+from utils.asyncJobs import ThreadRun
+from utils.writeBehind import writeBehind
 from utils.logs import Logger
 
 logger = Logger("Janine")
@@ -105,8 +107,10 @@ class Janine(TextCompletion, AudioStreamCompletion, VisionCompletion, FileComple
         Returns:
         Any: The completion result based on the message type.
         """
-        self.database.deleteExcess()
-        history = self.database.history()
+        # trimming is done by `trimHistory` once the reply is shown, off the request path
+        # the latest messages may still sit in the write-behind queue
+        await ThreadRun(writeBehind.flush, ModelsArgs.WRITE_FLUSH_TIMEOUT)
+        history = await ThreadRun(self.database.history)
 
         message = await self.requestManager.getLast()
         body = message['body']['content']
@@ -131,3 +135,12 @@ class Janine(TextCompletion, AudioStreamCompletion, VisionCompletion, FileComple
                 # constanly check for title changes in chat  by reinitalizing the database
                 self.database.connect()
 
+    async def trimHistory(self):
+        """
+        Deletes the messages of the active chat beyond `ModelsArgs.MAX_CHAT_DOCS`, in a worker thread.
+        """
+        try:
+            await ThreadRun(writeBehind.flush, ModelsArgs.WRITE_FLUSH_TIMEOUT)
+            await ThreadRun(self.database.deleteExcess)
+        except Exception as e:
+            logger.log('error', "Error while trimming chat history", e)
@@ -1,12 +1,12 @@
 import os
 import sys
 import ctypes
+import multiprocessing
 import subprocess
 import threading
 
 # 0-.
 from pymongo.mongo_client import MongoClient
-from pymongo.server_api import ServerApi
 # Help pyinstaller detect used packages
 # 1- Pypi packages
 import asyncio, PyQt5, qasync, pyqtspinner, json, pathlib, requests, aiohttp, audioread, bcrypt, numpy, plotly, pymongo, pyaudio, waitress, dotenv, flask
@@ -26,7 +26,7 @@ from janine.models import RichText, RichAudio, RichFile, RichVision, BaseRemote,
 #5 - Dispatched imports from utils
 from utils.logs import Logger
 #6- Dispatched imports from databases
-from databases.mongodb import UsersAuth, Operations, JanineDB
+from databases.mongodb import UsersAuth, Operations, JanineDB, Indexes, Previews
 #7- Dispatched imports from models
 from models.janine import JanineModel
 from models.api.requests import RequestManager
@@ -44,6 +44,8 @@ from utils.system import restoreSystemPath
 from utils.paths import getFrozenPath, getFrozenPath2
 from utils.appHelper import getScreenSize, getDPI
 from utils.envHandler import getenv
+from utils.databases import getMongoClient
+from databases.mongodb.Indexes import ensureIndexes
 from utils.logs import Logger, timer
 
 _cwd = os.getcwd()
@@ -76,13 +78,15 @@ def system_check(resolution_check_enabled: bool = True):
 def create_mongo_connection():
     uri = getenv("MONGO_URI")
 
-    # Create a new client and connect to the server
-    mongo_client = MongoClient(uri, server_api=ServerApi('1'))
+    # Get the process-wide client (shared with every other module) and connect to the server
+    mongo_client = getMongoClient(uri)
 
     # Send a ping to confirm a successful connection
     try:
         mongo_client.admin.command('ping')
         main_logger.log("info", "MongoDB connected successfully!")
+        # Create the missing indexes in the background (only on the first launch of an install)
+        ensureIndexes(mongo_client)
         return mongo_client
     except Exception as e:
         main_logger.log("error", "MongoDB connection attempt failed", e)
@@ -152,6 +156,8 @@ def exec_all():
         exec_client()
 
 if __name__ == "__main__":
+    # Lets a frozen build start the workers of a process pool (e.g. EXECUTOR_CPU_RENDER_PROCESSES=1)
+    multiprocessing.freeze_support()
     # Calls the exec_all function to execute both the API and client components.
     exec_all()
 
@@ -252,6 +252,25 @@ def clearLayout(layout: QVBoxLayout | QHBoxLayout | QGridLayout):
     # Ensure the layout is fully cleared
     layout.update()
 
+def replaceGridWidget(layout: QGridLayout, widget: QWidget, row: int, col: int):
+    """
+	Places a widget in a grid cell, deleting the widget that previously occupied it.
+	Args:
+		layout (QGridLayout): The grid layout.
+		widget (QWidget): The new widget.
+		row (int): The row of the cell.
+		col (int): The column of the cell.
+	Returns:
+		None
+	"""
+    item = layout.itemAtPosition(row, col)
+    previous = item.widget() if item else None
+    if previous and previous is not widget:
+        previous.setParent(None)
+        previous.deleteLater()  # Safely delete the widget
+        layout.removeWidget(previous)  # Remove from layout
+    layout.addWidget(widget, row, col)
+
 def isEmptyLayout(layout: QVBoxLayout | QHBoxLayout | QGridLayout, mode: str = 'delay') -> bool:
     # if we are using deleteLater() to remove a widget
     # chcking layout count right after might unexpectedly return the count before delaetion
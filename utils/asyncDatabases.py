@@ -0,0 +1,385 @@
+import asyncio
+import threading
+from contextlib import nullcontext
+from typing import Any, AsyncIterator, List, Dict, Optional, Set, Tuple
+
+from pymongo import AsyncMongoClient
+from pymongo.mongo_client import MongoClient
+from pymongo.server_api import ServerApi
+from pymongo.errors import ConnectionFailure, ExecutionTimeout
+
+from utils.databases import (
+    MongoRegistry, MongoConnectionError, QueryCache, queryCache, getGateway, heartbeatMonitor, trackLiveness, _connectionError,
+    CancellationToken, DEFAULT_MAX_TIME_MS, deadline, readTarget
+)
+from utils.envHandler import getenv
+from utils.mongoTelemetry import telemetry
+from utils.logs import Logger
+
+logger = Logger("Utils-AsyncDatabases")
+
+# The loop only keeps weak references to its tasks: the background revalidations are held here until they finish
+_revalidations: Set[asyncio.Future] = set()
+
+
+class AsyncMongoRegistry:
+    """
+    Hands out one `AsyncMongoClient` per connection string and event loop.
+
+    Async clients are bound to the loop they are first used on, so the qasync loop and any worker loop
+    each get their own client. Pool sizes follow `MongoRegistry.poolOptions`.
+
+    Methods:
+    -------
+    client(uri: Optional[str] = None) -> AsyncMongoClient: Returns the client for `uri` on the running loop.
+    """
+    _clients: Dict[Tuple[str, int], AsyncMongoClient] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def client(cls, uri: Optional[str] = None) -> AsyncMongoClient:
+        uri = uri or getenv("MONGO_URI")
+        key = (uri, id(asyncio.get_running_loop()))
+        with cls._lock:
+            client = cls._clients.get(key)
+            if client is None:
+                options = MongoRegistry.poolOptions()
+                # shares the liveness state of the synchronous client for the same connection string
+                monitor = heartbeatMonitor(uri)
+                client = AsyncMongoClient(uri, server_api=ServerApi('1'), event_listeners=[monitor, *telemetry.listeners(uri)], **options)
+                trackLiveness(client, monitor)
+                cls._clients[key] = client
+                logger.log('info', "MongoDB > Async Registry:: Client created.", params=options)
+            return client
+
+def getAsyncMongoClient(connection: Optional[Any] = None) -> AsyncMongoClient:
+    """
+    Resolves the async client to use for a call.
+
+    Parameters:
+    - connection (AsyncMongoClient | MongoClient): An async client is used as is. A synchronous client from
+      `MongoRegistry` is mapped to the async client for the same connection string. Default is `MONGO_URI`.
+
+    Returns:
+    - AsyncMongoClient: The client bound to the running event loop.
+    """
+    if isinstance(connection, AsyncMongoClient):
+        return connection
+    uri = MongoRegistry.uriOf(connection) if isinstance(connection, MongoClient) else None
+    return AsyncMongoRegistry.client(uri)
+
+
+async def _asyncMongoFind(database: str, collection: str, sortField: str, limit: int, connection: Any, projection: Optional[Dict], query: Dict, maxTimeMS: Optional[int] = None, token: Optional[CancellationToken] = None, raw: bool = False) -> List[Dict]:
+    target = readTarget(getGateway(getAsyncMongoClient(connection)).collection(database, collection), raw)
+    cursor = target.find(query, projection).sort([(sortField, -1)]).limit(limit)
+    if maxTimeMS:
+        cursor = cursor.max_time_ms(maxTimeMS)
+    if token is None:
+        return await cursor.to_list(length=None)
+
+    # cancelling the token cancels this task, the cursor is then killed on the server
+    with token.bind():
+        try:
+            return await cursor.to_list(length=None)
+        finally:
+            await cursor.close()
+
+async def _asyncRevalidate(key: Tuple, database: str, collection: str, sortField: str, limit: int, connection: Any, projection: Optional[Dict], query: Dict, maxTimeMS: Optional[int] = None, raw: bool = False):
+    try:
+        queryCache.store(key, await _asyncMongoFind(database, collection, sortField, limit, connection, projection, query, maxTimeMS, raw=raw))
+    except Exception as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Retrieval:: Background revalidation failed, the stale entry is kept.",
+            error=e,
+            params={'database': database, 'collection': collection})
+    finally:
+        queryCache.endRevalidation(key)
+
+async def asyncMongoGet(database: str = "market", collection: str = ..., sortField: str = "date", limit: int = 1, connection: Optional[MongoClient] = None, projection: Optional[Dict] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None, raw: bool = False, **kwargs) -> List[Dict]:
+    """
+    Awaitable counterpart of `utils.databases.mongoGet`, run natively on the event loop instead of an executor thread.
+
+    Parameters:
+    - database (str): The name of the MongoDB database. Default is "market".
+    - collection (str): The name of the MongoDB collection. This parameter is required.
+    - sortField (str): The field to sort the documents by. Default is "date".
+    - limit (int): The maximum number of documents to retrieve. Default is 1.
+    - connection (MongoClient): The MongoDB client the call is made for.
+    - projection (Dict): The fields to return, as a MongoDB projection. Default is None (whole documents).
+    - maxTimeMS (int): The server-side deadline of the query, in milliseconds. Default is `DEFAULT_MAX_TIME_MS`.
+    - token (CancellationToken): Cancels the awaiting task and kills the cursor once cancelled. Default is None.
+    - raw (bool): Returns lazily decoded `RawBSONDocument`s, see `utils.databases.mongoGet`. Default is False.
+    - kwargs (Dict): Additional query parameters to filter the documents.
+
+    Returns:
+    - List[Dict]: A list of dictionaries representing the retrieved documents. None if an error occurred or the deadline was exceeded.
+      Results of the collections listed in `QueryCache.TTLS` may be served from `queryCache`.
+
+    Raises:
+    - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - asyncio.CancelledError: If `token` was cancelled.
+    """
+    if connection is None:
+        raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+
+    key = QueryCache.key(database, collection, kwargs, projection, sortField, limit, raw)
+    cached, state = queryCache.lookup(key)
+    if state == "stale" and queryCache.startRevalidation(key):
+        task = asyncio.ensure_future(_asyncRevalidate(key, database, collection, sortField, limit, connection, projection, kwargs, maxTimeMS, raw))
+        _revalidations.add(task)
+        task.add_done_callback(_revalidations.discard)
+    if cached is not None:
+        return cached
+
+    try:
+        documents = await _asyncMongoFind(database, collection, sortField, limit, connection, projection, kwargs, maxTimeMS, token, raw)
+        queryCache.store(key, documents)
+        return documents
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Retrieval:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Retrieval", e)
+    except ExecutionTimeout as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Retrieval:: Query deadline exceeded.",
+            error=e,
+            params={'database': database, 'collection': collection, 'maxTimeMS': maxTimeMS})
+        return
+    except Exception as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Retrieval:: An error occurred while fetching documents.",
+            error=e,
+            params={
+                'database': database,
+                'collection': collection,
+                'kwargs': kwargs,
+                'projection': projection,
+                'limit': limit,
+                'sortField': sortField,
+            })
+        return
+
+async def asyncMongoStream(database: str = "market", collection: str = ..., sortField: str = "date", limit: int = 1, connection: Optional[MongoClient] = None, projection: Optional[Dict] = None, batchSize: int = 20, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None, raw: bool = False, **kwargs) -> AsyncIterator[Dict]:
+    """
+    Streaming variant of `asyncMongoGet`: yields documents as the cursor batches arrive instead of returning a list
+    once the last document is decoded.
+
+    Parameters:
+    - batchSize (int): The number of documents fetched per cursor round trip. Default is 20.
+    - The other parameters are the same as `asyncMongoGet`.
+
+    Yields:
+    - Dict: The retrieved documents, in sort order. Nothing more is yielded once an error occurred or the deadline was exceeded.
+
+    Raises:
+    - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - asyncio.CancelledError: If `token` was cancelled.
+
+    Example:
+    >>> async for doc in asyncMongoStream(collection="articles", limit=100, connection=client, batchSize=12):
+    >>>     render(doc)
+    """
+    if connection is None:
+        raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+
+    gateway = getGateway(getAsyncMongoClient(connection))
+
+    cursor = None
+    try:
+        target = readTarget(gateway.collection(database, collection), raw)
+        cursor = target.find(kwargs, projection).sort([(sortField, -1)]).limit(limit).batch_size(batchSize)
+        if maxTimeMS:
+            cursor = cursor.max_time_ms(maxTimeMS)
+        with token.bind() if token is not None else nullcontext():
+            async for document in cursor:
+                yield document
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Stream:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Stream", e)
+    except ExecutionTimeout as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Stream:: Query deadline exceeded.",
+            error=e,
+            params={'database': database, 'collection': collection, 'maxTimeMS': maxTimeMS})
+        return
+    except Exception as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Stream:: An error occurred while streaming documents.",
+            error=e,
+            params={
+                'database': database,
+                'collection': collection,
+                'kwargs': kwargs,
+                'projection': projection,
+                'limit': limit,
+                'sortField': sortField,
+            })
+        return
+    finally:
+        if cursor is not None:
+            await cursor.close()
+
+async def asyncMongoAggregate(database: str = "market", collection: str = ..., pipeline: List[Dict] = [], connection: Optional[MongoClient] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None) -> List[Dict]:
+    """
+    Runs an aggregation pipeline on the server and returns its results.
+
+    Parameters:
+    - database (str): The name of the MongoDB database. Default is "market".
+    - collection (str): The name of the MongoDB collection. This parameter is required.
+    - pipeline (List[Dict]): The aggregation stages.
+    - connection (MongoClient): The MongoDB client the call is made for.
+    - maxTimeMS (int): The server-side deadline of the aggregation, in milliseconds. Default is `DEFAULT_MAX_TIME_MS`.
+    - token (CancellationToken): Cancels the awaiting task once cancelled. Default is None.
+
+    Returns:
+    - List[Dict]: The documents output by the pipeline. None if an error occurred or the deadline was exceeded.
+
+    Raises:
+    - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - asyncio.CancelledError: If `token` was cancelled.
+    """
+    if connection is None:
+        raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+
+    gateway = getGateway(getAsyncMongoClient(connection))
+
+    try:
+        target = gateway.collection(database, collection)
+        options = {"maxTimeMS": maxTimeMS} if maxTimeMS else {}
+        with token.bind() if token is not None else nullcontext():
+            cursor = await target.aggregate(pipeline, **options)
+            return await cursor.to_list(length=None)
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Aggregation:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Aggregation", e)
+    except ExecutionTimeout as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Aggregation:: Deadline exceeded.",
+            error=e,
+            params={'database': database, 'collection': collection, 'maxTimeMS': maxTimeMS})
+        return
+    except Exception as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Aggregation:: An error occurred while running the pipeline.",
+            error=e,
+            params={
+                'database': database,
+                'collection': collection,
+                'pipeline': pipeline,
+            })
+        return
+
+async def asyncMongoUpdate(database: str = "market", collection: str = ..., query: Dict = {}, update: Dict = {}, scale: str = 'one', connection: Optional[MongoClient] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None) -> bool:
+    """
+    Awaitable counterpart of `utils.databases.mongoUpdate`.
+
+    Returns:
+    - bool: True if the update operation is successful and at least one document is modified, False otherwise.
+
+    Raises:
+    - ValueError: If the connection argument is not provided or the scale argument is not 'one' or 'many'.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - QueryCancelled: If `token` was cancelled.
+    """
+    if connection is None:
+        raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+    if token is not None:
+        token.raiseIfCancelled()
+
+    gateway = getGateway(getAsyncMongoClient(connection))
+
+    try:
+        target = gateway.collection(database, collection)
+        with deadline(maxTimeMS):
+            if scale == 'one':
+                result = await target.update_one(query, update)
+            elif scale == 'many':
+                result = await target.update_many(query, update)
+            else:
+                raise ValueError('Invalid scale')
+        queryCache.invalidate(database, collection)
+        return result.modified_count > 0
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Update:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Update", e)
+    except Exception as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Update:: An error occurred while updating documents.",
+            error=e,
+            params={
+                'database': database,
+                'collection': collection,
+                'query': query,
+                'update': update
+            })
+        return False
+
+async def asyncMongoDeleteOne(database: str, collection: str, filter: Dict, connection: Optional[MongoClient] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None) -> bool:
+    """
+    Awaitable counterpart of `utils.databases.mongoDeleteOne`.
+
+    Returns:
+    - bool: Returns True if the deletion operation is successful. Returns False if the deletion operation fails.
+
+    Raises:
+    - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - QueryCancelled: If `token` was cancelled.
+    """
+    if connection is None:
+        raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+    if token is not None:
+        token.raiseIfCancelled()
+
+    gateway = getGateway(getAsyncMongoClient(connection))
+
+    try:
+        target = gateway.collection(database, collection)
+        with deadline(maxTimeMS):
+            result = await target.delete_one(filter)
+        queryCache.invalidate(database, collection)
+        return result.deleted_count > 0
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Delete:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Delete", e)
+    except Exception as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Delete:: An error occurred while deleting documents.",
+            error=e,
+            params={
+                'database': database,
+                'collection': collection,
+                'filter': filter
+            })
+        return False
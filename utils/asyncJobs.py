@@ -4,6 +4,7 @@ from functools import wraps, partial
 from typing import Dict, Callable
 
 from utils.logs import Logger
+from utils.executors import Executors, runIn, DB_IO
 
 async def async_generate(arg):
     """
@@ -94,7 +95,8 @@ def asyncWrap(func):
 
     Keyword Args:
         loop (asyncio.AbstractEventLoop, optional): The event loop to use. Defaults to `asyncio.get_event_loop()`.
-        executor (concurrent.futures.Executor, optional): The executor to use. Defaults to `None`.
+        executor (concurrent.futures.Executor | str, optional): The executor to use, or the name of one of `Executors`
+            (e.g. "http-io"). Defaults to `None`, the loop's default executor.
 
     Example:
     >>> import time
@@ -118,15 +120,18 @@ def asyncWrap(func):
     async def run(*args, loop=None, executor=None, **kwargs):
         if loop is None:
             loop = asyncio.get_event_loop()
+        if isinstance(executor, str):
+            executor = Executors.get(executor)
         pfunc = partial(func, *args, **kwargs)
         return await loop.run_in_executor(executor, pfunc)
     return run
 
 async def ThreadRun(func: Callable, *args, **kwargs):
     """
-    Runs a function in a separate thread and waits for its result.
+    Runs a function on the `db-io` executor and waits for its result.
 
-    This is a convenient way to run I/O-bound operations without blocking the event loop.
+    This is a convenient way to run blocking database and cache calls without blocking the event loop. Use
+    `utils.executors.runIn` to pick another executor (e.g. `cpu-render` for charts).
 
     Args:
         func (callable): The function to run in a separate thread.
@@ -143,7 +148,7 @@ async def ThreadRun(func: Callable, *args, **kwargs):
 
     >>>  "result":  None
     """
-    result = await asyncio.to_thread(func, *args, **kwargs)
+    result = await runIn(DB_IO, func, *args, **kwargs)
     return result
 
 
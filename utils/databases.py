@@ -1,15 +1,473 @@
-from typing import List, Dict, Optional
+import copy
+import json
+import time
+import asyncio
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Any, List, Dict, Mapping, Optional, Tuple
 
+from bson.raw_bson import DEFAULT_RAW_BSON_OPTIONS
+
+from pymongo import monitoring, timeout as operationTimeout
 from pymongo.mongo_client import MongoClient
 from pymongo.server_api import ServerApi
 from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import ConnectionFailure, ExecutionTimeout
 
+from utils.envHandler import getenv
+from utils.mongoTelemetry import telemetry
 from utils.logs import Logger
 
 logger = Logger("Utils-Databases")
 
-def mongoGet(database: str = "market", collection: str = ..., sortField: str = "date", limit: int = 1, connection: Optional[MongoClient] = None, **kwargs) -> List[Dict]:
+
+class MongoConnectionError(ConnectionError):
+    """
+    Raised when the MongoDB deployment cannot be reached.
+
+    It is raised either before a query is sent, when the heartbeat monitor already knows every server is down,
+    or when the driver itself fails to connect while running the query.
+    """
+
+
+class HeartbeatMonitor(monitoring.ServerHeartbeatListener):
+    """
+    Tracks server liveness from the heartbeats pymongo already sends on its background monitor threads.
+
+    One monitor is kept per connection string (see `heartbeatMonitor`) and passed to the clients the registries create
+    for it, so one-off clients and other deployments do not report into its state.
+
+    Attributes:
+    ----------
+    lastFailure (Optional[Exception]): The error reported by the most recent failed heartbeat.
+
+    Methods:
+    -------
+    alive -> Optional[bool]: None until a first heartbeat completes, then whether any server answered its last heartbeat.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._servers: Dict[Any, bool] = {}
+        self.lastFailure: Optional[Exception] = None
+
+    def started(self, event: monitoring.ServerHeartbeatStartedEvent):
+        pass
+
+    def succeeded(self, event: monitoring.ServerHeartbeatSucceededEvent):
+        with self._lock:
+            self._servers[event.connection_id] = True
+
+    def failed(self, event: monitoring.ServerHeartbeatFailedEvent):
+        with self._lock:
+            wasAlive = self._servers.get(event.connection_id, True)
+            self._servers[event.connection_id] = False
+            self.lastFailure = event.reply
+        if wasAlive:
+            logger.log(
+                level='warning',
+                message="MongoDB > Heartbeat:: Server stopped answering heartbeats.",
+                error=event.reply,
+                params={'server': event.connection_id})
+
+    @property
+    def alive(self) -> Optional[bool]:
+        with self._lock:
+            if not self._servers:
+                return None
+            return any(self._servers.values())
+
+
+_monitors: Dict[Optional[str], HeartbeatMonitor] = {}
+# id of a registered client -> (client, monitor of its connection string)
+_clientMonitors: Dict[int, Tuple[Any, HeartbeatMonitor]] = {}
+_monitorsLock = threading.Lock()
+
+def heartbeatMonitor(uri: Optional[str]) -> HeartbeatMonitor:
+    """
+    Returns the heartbeat monitor of a connection string, creating it on first use.
+    """
+    with _monitorsLock:
+        monitor = _monitors.get(uri)
+        if monitor is None:
+            monitor = _monitors[uri] = HeartbeatMonitor()
+        return monitor
+
+def trackLiveness(client: Any, monitor: HeartbeatMonitor):
+    """
+    Records that `client` reports its heartbeats to `monitor`, for the gateway of the client.
+    """
+    with _monitorsLock:
+        _clientMonitors[id(client)] = (client, monitor)
+
+def monitorOf(client: Any) -> Optional[HeartbeatMonitor]:
+    with _monitorsLock:
+        entry = _clientMonitors.get(id(client))
+    return entry[1] if entry is not None and entry[0] is client else None
+
+
+class MongoGateway:
+    """
+    A shared entry point around a `MongoClient`.
+
+    Queries go straight to the collection: liveness comes from the heartbeat monitor instead of a `ping`
+    sent before every query.
+
+    Attributes:
+    ----------
+    client (MongoClient): The wrapped MongoDB client.
+    monitor (Optional[HeartbeatMonitor]): The monitor reporting the deployment's liveness. None for clients created
+        outside the registries.
+    """
+    def __init__(self, client: MongoClient, monitor: Optional[HeartbeatMonitor] = None):
+        self.client = client
+        self.monitor = monitor
+
+    @property
+    def alive(self) -> bool:
+        """
+        Whether queries should be attempted. Before any heartbeat completed, or without a monitor, server selection decides.
+        """
+        state = self.monitor.alive if self.monitor is not None else None
+        return True if state is None else state
+
+    def collection(self, database: str, collection: str) -> Collection:
+        """
+        Returns the requested collection, failing fast if the deployment is known to be down.
+
+        Raises:
+        - MongoConnectionError: If the heartbeat monitor reports every server as unreachable.
+        """
+        if not self.alive:
+            raise MongoConnectionError(f"MongoDB > Gateway:: Deployment unreachable. Last heartbeat error: {self.monitor.lastFailure}")
+        db: Database = self.client[database]
+        return db[collection]
+
+
+_gateways: Dict[int, MongoGateway] = {}
+_gatewaysLock = threading.Lock()
+
+def getGateway(connection: MongoClient) -> MongoGateway:
+    """
+    Returns the gateway shared by every query made through the given client, creating it on first use.
+    """
+    with _gatewaysLock:
+        gateway = _gateways.get(id(connection))
+        if gateway is None or gateway.client is not connection:
+            gateway = MongoGateway(connection, monitorOf(connection))
+            _gateways[id(connection)] = gateway
+        return gateway
+
+class MongoRegistry:
+    """
+    A process-wide registry handing out a single, lazily created `MongoClient` per connection string.
+
+    Every module shares the same connection pool, TLS sessions and monitor threads instead of building its own client.
+    Pool sizes can be tuned with the `MONGO_MIN_POOL_SIZE` and `MONGO_MAX_POOL_SIZE` environment variables.
+
+    Attributes:
+    ----------
+    MIN_POOL_SIZE (int): Default number of connections opened and kept warm in the background.
+    MAX_POOL_SIZE (int): Default upper bound on concurrent connections per server.
+
+    Methods:
+    -------
+    client(uri: Optional[str] = None) -> MongoClient: Returns the shared client for `uri` (defaults to `MONGO_URI`).
+    uriOf(client: MongoClient) -> Optional[str]: Returns the connection string a registered client was created with.
+    closeAll() -> None: Closes and forgets every registered client.
+    """
+    MIN_POOL_SIZE = 2
+    MAX_POOL_SIZE = 20
+
+    _clients: Dict[str, MongoClient] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def poolOptions(cls) -> Dict[str, int]:
+        return {
+            'minPoolSize': int(getenv("MONGO_MIN_POOL_SIZE", cls.MIN_POOL_SIZE)),
+            'maxPoolSize': int(getenv("MONGO_MAX_POOL_SIZE", cls.MAX_POOL_SIZE)),
+        }
+
+    @classmethod
+    def client(cls, uri: Optional[str] = None) -> MongoClient:
+        uri = uri or getenv("MONGO_URI")
+        with cls._lock:
+            client = cls._clients.get(uri)
+            if client is None:
+                options = cls.poolOptions()
+                monitor = heartbeatMonitor(uri)
+                client = MongoClient(uri, server_api=ServerApi('1'), event_listeners=[monitor, *telemetry.listeners(uri)], **options)
+                trackLiveness(client, monitor)
+                cls._clients[uri] = client
+                logger.log('info', "MongoDB > Registry:: Client created.", params=options)
+            return client
+
+    @classmethod
+    def uriOf(cls, client: Any) -> Optional[str]:
+        with cls._lock:
+            for uri, registered in cls._clients.items():
+                if registered is client:
+                    return uri
+        return None
+
+    @classmethod
+    def closeAll(cls):
+        with cls._lock:
+            clients = list(cls._clients.values())
+            cls._clients.clear()
+        for client in clients:
+            with _monitorsLock:
+                _clientMonitors.pop(id(client), None)
+            client.close()
+
+def getMongoClient(uri: Optional[str] = None) -> MongoClient:
+    """
+    Returns the process-wide `MongoClient` for the given connection string (defaults to `MONGO_URI`).
+    """
+    return MongoRegistry.client(uri)
+
+def _connectionError(action: str, error: Exception) -> MongoConnectionError:
+    if isinstance(error, MongoConnectionError):
+        return error
+    wrapped = MongoConnectionError(f"MongoDB > {action}:: Connection failed: {error}")
+    wrapped.__cause__ = error
+    return wrapped
+
+# Server-side deadline of every query unless the caller passes its own `maxTimeMS` (None disables it)
+DEFAULT_MAX_TIME_MS = int(getenv("MONGO_MAX_TIME_MS", 30000))
+
+def materialize(value: Any) -> Any:
+    """
+    Converts lazily decoded documents (as returned with `raw=True`) into plain dicts and lists, e.g. before
+    serializing them to JSON. Only the part of the document passed in is decoded.
+    """
+    if isinstance(value, Mapping):
+        return {key: materialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [materialize(item) for item in value]
+    return value
+
+def readTarget(target: Collection, raw: bool) -> Collection:
+    """
+    Returns `target` as is, or decoding its documents as `RawBSONDocument` if `raw` is True.
+    """
+    return target.with_options(codec_options=DEFAULT_RAW_BSON_OPTIONS) if raw else target
+
+class QueryCancelled(asyncio.CancelledError):
+    """
+    Raised by a query whose cancellation token was cancelled.
+
+    It derives from `asyncio.CancelledError`, so an awaiting coroutine unwinds as cancelled and the data layer's
+    `except Exception` handlers don't report it as a failure.
+    """
+
+class CancellationToken:
+    """
+    Lets the window owning a set of queries abandon them, typically when it is hidden or closed.
+
+    Synchronous queries check the token between documents and close their cursor (which kills it on the server) once it
+    is cancelled. Asynchronous queries also register the task awaiting them, which is cancelled right away, so a pending
+    round trip is not waited for. A cancelled token stays cancelled: owners create a new one to query again.
+
+    Methods:
+    -------
+    cancel(): Cancels the token and the tasks awaiting its queries.
+    cancelled -> bool: Whether the token was cancelled.
+    raiseIfCancelled(): Raises `QueryCancelled` if the token was cancelled.
+    bind(): Context manager registering the running task for the duration of a query.
+
+    Example:
+    >>> token = CancellationToken()
+    >>> docs = await ThreadRun(mongoGet, collection="ticker", limit=100, connection=client, token=token)
+    >>> token.cancel() # from hideEvent/closeEvent
+    """
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._tasks = set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        self._event.set()
+        with self._lock:
+            tasks = list(self._tasks)
+            self._tasks.clear()
+        for task in tasks:
+            # the task may run on another thread's loop (e.g. a worker QThread)
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+    def raiseIfCancelled(self):
+        if self.cancelled:
+            raise QueryCancelled("MongoDB > Query:: Cancelled by its owner.")
+
+    @contextmanager
+    def bind(self):
+        self.raiseIfCancelled()
+        task = asyncio.current_task()
+        if task is not None:
+            with self._lock:
+                self._tasks.add(task)
+        try:
+            yield self
+        finally:
+            if task is not None:
+                with self._lock:
+                    self._tasks.discard(task)
+
+class QueryCache:
+    """
+    An in-process, stale-while-revalidate cache in front of `mongoGet` and `asyncMongoGet`.
+
+    Entries are keyed by (database, collection, filter, projection, sort, limit) and live for the TTL of their collection
+    (`TTLS`, in seconds; collections without a TTL are not cached). A fresh entry is served as is. An entry past its TTL
+    but younger than `STALE_FACTOR` times the TTL is served stale while a single background query revalidates it. Older
+    entries are fetched again. `mongoUpdate` and `mongoDeleteOne` invalidate every entry of the collection they write to.
+    Each lookup returns copies of the cached documents, so callers may modify what they get.
+
+    Collections written by other processes, such as the user records updated by the payment server, are never cached:
+    their writes cannot invalidate the entries.
+
+    Attributes:
+    ----------
+    TTLS (Dict[Tuple[str, str], float]): The TTL of each cached (database, collection).
+    STALE_FACTOR (float): How long past its TTL an entry may be served stale, as a multiple of the TTL.
+
+    Methods:
+    -------
+    lookup(key) -> Tuple[Optional[List[Dict]], str]: Returns the entry and its state: "fresh", "stale" or "miss".
+    store(key, documents): Stores the result of a query.
+    invalidate(database, collection): Drops every entry of a collection.
+    stats() -> Dict[str, int]: Returns the hit/miss counters.
+    """
+    TTLS: Dict[Tuple[str, str], float] = {
+        # quotes
+        ("market", "ticker"): 15,
+        ("market", "crypto"): 10,
+        ("market", "forex"): 10,
+        ("market", "indices"): 15,
+        ("market", "commodities"): 15,
+        ("market", "marketSummary"): 60,
+        # news and fundamentals
+        ("market", "articles"): 5 * 60,
+        ("market", "fundamentals"): 6 * 3600,
+    }
+    STALE_FACTOR = 10
+
+    def __init__(self):
+        self._entries: Dict[Tuple, Tuple[List[Dict], float]] = {}
+        self._revalidating = set()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "staleHits": 0, "misses": 0, "revalidations": 0, "invalidations": 0}
+
+    @staticmethod
+    def key(database: str, collection: str, query: Dict, projection: Optional[Dict], sortField: str, limit: int, raw: bool = False) -> Tuple:
+        return (
+            database,
+            collection,
+            json.dumps(query, sort_keys=True, default=str),
+            json.dumps(projection, sort_keys=True, default=str),
+            sortField,
+            limit,
+            raw,
+        )
+
+    def ttl(self, database: str, collection: str) -> float:
+        return self.TTLS.get((database, collection), 0)
+
+    def lookup(self, key: Tuple) -> Tuple[Optional[List[Dict]], str]:
+        ttl = self.ttl(key[0], key[1])
+        if ttl <= 0:
+            return None, "miss"
+        with self._lock:
+            entry = self._entries.get(key)
+            age = time.monotonic() - entry[1] if entry else None
+            if entry is not None and age < ttl:
+                self.counters["hits"] += 1
+                return self.copy(entry[0]), "fresh"
+            if entry is not None and age < ttl * self.STALE_FACTOR:
+                self.counters["staleHits"] += 1
+                return self.copy(entry[0]), "stale"
+            self.counters["misses"] += 1
+            return None, "miss"
+
+    @staticmethod
+    def copy(documents: List[Dict]) -> List[Dict]:
+        # lazily decoded documents are read-only and can be shared
+        return [copy.deepcopy(doc) if isinstance(doc, dict) else doc for doc in documents]
+
+    def store(self, key: Tuple, documents: Optional[List[Dict]]):
+        if documents is None or self.ttl(key[0], key[1]) <= 0:
+            return
+        documents = self.copy(documents)
+        with self._lock:
+            self._entries[key] = (documents, time.monotonic())
+
+    def startRevalidation(self, key: Tuple) -> bool:
+        """
+        Returns True if the caller should revalidate `key`, False if another revalidation is already running.
+        """
+        with self._lock:
+            if key in self._revalidating:
+                return False
+            self._revalidating.add(key)
+            self.counters["revalidations"] += 1
+            return True
+
+    def endRevalidation(self, key: Tuple):
+        with self._lock:
+            self._revalidating.discard(key)
+
+    def invalidate(self, database: str, collection: str):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == database and key[1] == collection]:
+                del self._entries[key]
+            self.counters["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.counters, "entries": len(self._entries)}
+
+# Process-wide query cache
+queryCache = QueryCache()
+
+def _mongoFind(database: str, collection: str, sortField: str, limit: int, connection: MongoClient, projection: Optional[Dict], query: Dict, maxTimeMS: Optional[int] = None, token: Optional[CancellationToken] = None, raw: bool = False) -> List[Dict]:
+    if token is not None:
+        token.raiseIfCancelled()
+    target: Collection = readTarget(getGateway(connection).collection(database, collection), raw)
+    cursor = target.find(query, projection).sort([(sortField, -1)]).limit(limit=limit)
+    if maxTimeMS:
+        cursor = cursor.max_time_ms(maxTimeMS)
+    if token is None:
+        return list(cursor)
+
+    documents = []
+    with cursor: # closing the cursor kills it on the server
+        for document in cursor:
+            token.raiseIfCancelled()
+            documents.append(document)
+    return documents
+
+def _revalidate(key: Tuple, database: str, collection: str, sortField: str, limit: int, connection: MongoClient, projection: Optional[Dict], query: Dict, maxTimeMS: Optional[int] = None, raw: bool = False):
+    try:
+        queryCache.store(key, _mongoFind(database, collection, sortField, limit, connection, projection, query, maxTimeMS, raw=raw))
+    except Exception as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Retrieval:: Background revalidation failed, the stale entry is kept.",
+            error=e,
+            params={'database': database, 'collection': collection})
+    finally:
+        queryCache.endRevalidation(key)
+
+def mongoGet(database: str = "market", collection: str = ..., sortField: str = "date", limit: int = 1, connection: Optional[MongoClient] = None, projection: Optional[Dict] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None, raw: bool = False, **kwargs) -> List[Dict]:
     """
     This function retrieves documents from a specified MongoDB collection based on the provided parameters.
 
@@ -19,33 +477,55 @@ def mongoGet(database: str = "market", collection: str = ..., sortField: str = "
     - sortField (str): The field to sort the documents by. Default is "date".
     - limit (int): The maximum number of documents to retrieve. Default is 1.
     - connection (MongoClient): The MongoDB client to use. If not provided, a new client will be created.
+    - projection (Dict): The fields to return, as a MongoDB projection. Default is None (whole documents).
+    - maxTimeMS (int): The server-side deadline of the query, in milliseconds. Default is `DEFAULT_MAX_TIME_MS`.
+    - token (CancellationToken): Abandons the query once cancelled. Default is None (not cancellable).
+    - raw (bool): Returns read-only `RawBSONDocument`s, whose fields and sub-documents are only decoded when accessed.
+      Suited to large documents of which a few fields are read; use `materialize` to get plain dicts. Default is False.
     - kwargs (Dict): Additional query parameters to filter the documents.
 
     Returns:
     - List[Dict]: A list of dictionaries representing the retrieved documents. If no documents are found, an empty list is returned.
+      Results of the collections listed in `QueryCache.TTLS` may be served from `queryCache`.
+      None if an error occurred or the deadline was exceeded.
     
     Raises:
     - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - QueryCancelled: If `token` was cancelled.
     """
 
     if connection is None:
         raise ValueError("MongoDB > Retrieval:: Connection not provided.")
     
-    client = connection
+    key = QueryCache.key(database, collection, kwargs, projection, sortField, limit, raw)
+    cached, state = queryCache.lookup(key)
+    if state == "stale" and queryCache.startRevalidation(key):
+        threading.Thread(
+            target=_revalidate, 
+            args=(key, database, collection, sortField, limit, connection, projection, kwargs, maxTimeMS, raw), 
+            daemon=True).start()
+    if cached is not None:
+        return cached
     
     try:
-        #confirm successful connection
-        state = client.admin.command('ping')
-        if state['ok'] == 1:
-            db: Database = client[database]
-            collection: Collection = db[collection]
-
-            documents = collection.find(kwargs).sort([(sortField, -1)]).limit(limit=limit)
-        
-            return list(documents)
-        else:
-           e = Exception("MongoDB > Retrieval:: Connection failed.")
-           logger.log(level='error', message="", error=e)
+        documents = _mongoFind(database, collection, sortField, limit, connection, projection, kwargs, maxTimeMS, token, raw)
+        queryCache.store(key, documents)
+        return documents
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Retrieval:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Retrieval", e)
+    except ExecutionTimeout as e:
+        logger.log(
+            level='warning',
+            message="MongoDB > Retrieval:: Query deadline exceeded.",
+            error=e,
+            params={'database': database, 'collection': collection, 'maxTimeMS': maxTimeMS})
+        return
     except Exception as e:
         logger.log(
             level='error',
@@ -55,6 +535,7 @@ def mongoGet(database: str = "market", collection: str = ..., sortField: str = "
                 'database': database,
                 'collection': collection,
                 'kwargs': kwargs,
+                'projection': projection,
                 'limit': limit,
                 'sortField': sortField,
             })
@@ -64,7 +545,29 @@ def mongoGet(database: str = "market", collection: str = ..., sortField: str = "
         #client.close()
         pass
 
-def mongoUpdate(database: str = "market", collection: str = ..., query: Dict = {}, update: Dict = {}, scale: str = 'one', connection: Optional[MongoClient] = None):
+def indexDocuments(documents: Optional[List[Dict]], key: str) -> Dict[Any, Dict]:
+    """
+    Indexes documents by the value of one of their fields, keeping the first document seen for each value.
+
+    Parameters:
+    - documents (List[Dict]): The documents to index, typically as returned (newest first) by `mongoGet`.
+    - key (str): The field to index the documents by (e.g. "symbol" or "name").
+
+    Returns:
+    - Dict[Any, Dict]: A dictionary mapping each value of `key` to its document.
+    """
+    index = {}
+    for document in documents or []:
+        index.setdefault(document.get(key), document)
+    return index
+
+def deadline(maxTimeMS: Optional[int]):
+    """
+    Bounds every operation run in the `with` block to `maxTimeMS` milliseconds (no bound if None).
+    """
+    return operationTimeout(maxTimeMS / 1000) if maxTimeMS else nullcontext()
+
+def mongoUpdate(database: str = "market", collection: str = ..., query: Dict = {}, update: Dict = {}, scale: str = 'one', connection: Optional[MongoClient] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None):
     """
     This function updates documents in a specified MongoDB collection based on the provided parameters.
 
@@ -74,6 +577,8 @@ def mongoUpdate(database: str = "market", collection: str = ..., query: Dict = {
     - query (Dict): A dictionary representing the query to identify the documents to update.
     - update (Dict): A dictionary representing the update operations to be performed.
     - scale (str): The scale of the update operation. It can be either 'one' or 'many'. Default is 'one'.
+    - maxTimeMS (int): The deadline of the update, in milliseconds. Default is `DEFAULT_MAX_TIME_MS`.
+    - token (CancellationToken): Skips the update if cancelled before it is sent. Default is None.
 
     Returns:
     - bool: Returns True if the update operation is successful and at least one document is modified.
@@ -81,32 +586,35 @@ def mongoUpdate(database: str = "market", collection: str = ..., query: Dict = {
 
     Raises:
     - ValueError: If the connection argument is not provided or the scale argument is not 'one' or 'many'.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - QueryCancelled: If `token` was cancelled.
     """
     if connection is None:
         raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+    if token is not None:
+        token.raiseIfCancelled()
     
-    client = connection
+    gateway = getGateway(connection)
 
     try:
-        #confirm successful connection
-        state = client.admin.command('ping')
-        if state['ok'] == 1:
-            db: Database = client[database]
-            collection: Collection = db[collection]
+        target: Collection = gateway.collection(database, collection)
+        with deadline(maxTimeMS):
             if scale == 'one':
-                result = collection.update_one(query, update)
-                return result.modified_count > 0
+                result = target.update_one(query, update)
             elif scale == 'many':
-                result = collection.update_many(query, update)
-                return result.modified_count > 0
-            
+                result = target.update_many(query, update)
             else:
                 raise ValueError('Invalid scale')            
-        else:
-            e = Exception("MongoDB > Update:: Connection failed.")
-            logger.log(level='error', message="", error=e)
-            return False
+        queryCache.invalidate(database, collection)
+        return result.modified_count > 0
         
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Update:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Update", e)
     except Exception as e:
         logger.log(
             level='error',
@@ -125,7 +633,7 @@ def mongoUpdate(database: str = "market", collection: str = ..., query: Dict = {
         pass
 
 
-def mongoDeleteOne(database: str, collection: str, filter: Dict, connection: Optional[MongoClient] = None):
+def mongoDeleteOne(database: str, collection: str, filter: Dict, connection: Optional[MongoClient] = None, maxTimeMS: Optional[int] = DEFAULT_MAX_TIME_MS, token: Optional[CancellationToken] = None):
     """
     This function deletes one document from a specified MongoDB collection based on the provided filter.
     
@@ -134,32 +642,39 @@ def mongoDeleteOne(database: str, collection: str, filter: Dict, connection: Opt
     - collection (str): The name of the MongoDB collection.
     - filter (Dict): A dictionary representing the filter to identify the document to delete.
     - connection (MongoClient): The MongoDB client to use. If not provided, a new client will be created.
+    - maxTimeMS (int): The deadline of the deletion, in milliseconds. Default is `DEFAULT_MAX_TIME_MS`.
+    - token (CancellationToken): Skips the deletion if cancelled before it is sent. Default is None.
     
     Returns:
     - bool: Returns True if the deletion operation is successful. Returns False if the deletion operation fails.
     
     Raises:
     - ValueError: If the connection argument is not provided.
+    - MongoConnectionError: If the MongoDB deployment cannot be reached.
+    - QueryCancelled: If `token` was cancelled.
     """
 
     if connection is None:
         raise ValueError("MongoDB > Retrieval:: Connection not provided.")
+    if token is not None:
+        token.raiseIfCancelled()
     
-    client = connection
+    gateway = getGateway(connection)
     
     try:
-        #confirm successful connection
-        state = client.admin.command('ping')
-        if state['ok'] == 1:
-            db: Database = client[database]
-            collection: Collection = db[collection]
-            result = collection.delete_one(filter)
-            return result.deleted_count > 0
-        else:
-            e = Exception("MongoDB > Delete:: Connection failed.")
-            logger.log(level='error', message="", error=e)
-            return False
+        target: Collection = gateway.collection(database, collection)
+        with deadline(maxTimeMS):
+            result = target.delete_one(filter)
+        queryCache.invalidate(database, collection)
+        return result.deleted_count > 0
         
+    except (MongoConnectionError, ConnectionFailure) as e:
+        logger.log(
+            level='error',
+            message="MongoDB > Delete:: Unable to reach the database.",
+            error=e,
+            params={'database': database, 'collection': collection})
+        raise _connectionError("Delete", e)
     except Exception as e:
         logger.log(
             level='error',
@@ -0,0 +1,298 @@
+import json
+import asyncio
+import hashlib
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo.mongo_client import MongoClient
+from pymongo.errors import ConnectionFailure, OperationFailure, PyMongoError
+
+from utils.databases import CancellationToken, MongoConnectionError, getGateway, indexDocuments
+from utils.asyncDatabases import asyncMongoStream, getAsyncMongoClient
+from utils.asyncJobs import ThreadRun
+from utils.marketCache import marketCache
+from utils.logs import Logger
+
+logger = Logger("Utils-DeltaSync")
+
+# (database, collection, field) of the watermark fields reported missing
+_missingWatermarks = set()
+
+class DeltaSync:
+    """
+    Keeps the watched documents of one collection up to date by fetching only the documents that changed.
+
+    The first sync starts from the market cache snapshot and its watermark, so a warm start only fetches what
+    changed since the last run (a cold start fetches every watched document). Afterwards, changes are followed
+    with a change stream when the deployment supports it, or by polling on the watermark every `interval` seconds.
+
+    The watermark is the pair (greatest `watermarkField`, greatest `_id`) seen so far: updates are detected through
+    `watermarkField` and inserts through `_id`. Changed documents are merged into the snapshot and pushed to every
+    subscriber, so refresh cost scales with the number of changed documents. Without `watermarkField` (None, or not
+    seen in any document yet), updates in place cannot be detected and every sync fetches all the watched documents
+    again; only those that differ from the snapshot are merged and pushed. A configured field that never shows up is
+    reported once per collection.
+
+    Parameters:
+    - connection (MongoClient): The MongoDB client.
+    - collection (str): The collection to follow.
+    - key (str): The field identifying a document (e.g. "symbol").
+    - keys (Iterable[str]): The values of `key` being watched.
+    - projection (Dict): The fields to retrieve. The watermark fields are added to it.
+    - database (str): The database name. Default is "market".
+    - watermarkField (Optional[str]): The last-modification field of the documents, None if the collection has
+      none. Default is "lastUpdated".
+    - interval (float): The polling period in seconds, when change streams are unavailable. Default is 30.
+    - snapshot (str): The market cache snapshot name. Default is the collection name, suffixed with a fingerprint of
+      the projection, so that a snapshot saved with another projection is not restored.
+    - batchSize (int): The number of documents fetched per cursor round trip. Default is 20.
+    - raw (bool): Whether documents are kept as lazily decoded `RawBSONDocument`s (read-only). Default is False.
+
+    Example:
+    >>> sync = DeltaSync(client, "ticker", "symbol", ["AAPL", "MSFT"], projection={"_id": 0, "symbol": 1})
+    >>> sync.subscribe(lambda changed: print([doc["symbol"] for doc in changed]))
+    >>> await sync.run()
+    """
+    def __init__(self, connection: MongoClient, collection: str, key: str, keys: Iterable[str], projection: Optional[Dict] = None, database: str = "market", watermarkField: Optional[str] = "lastUpdated", interval: float = 30, snapshot: Optional[str] = None, batchSize: int = 20, raw: bool = False):
+        self.connection = connection
+        self.database = database
+        self.collection = collection
+        self.key = key
+        self.keys = list(keys)
+        self.watermarkField = watermarkField
+        self.interval = interval
+        self.snapshot = snapshot or collection
+        if snapshot is None and projection is not None:
+            self.snapshot += "." + hashlib.sha1(json.dumps(projection, sort_keys=True).encode()).hexdigest()[:8]
+        self.batchSize = batchSize
+        self.raw = raw
+
+        self.projection = None
+        if projection is not None:
+            self.projection = {field: value for field, value in projection.items() if field != "_id"}
+            self.projection.update({"_id": 1, key: 1})
+            if watermarkField:
+                self.projection[watermarkField] = 1
+
+        self.documents: Dict[str, Dict] = {}
+        self.lastUpdated: Any = None
+        self.lastId: Optional[ObjectId] = None
+        self.subscribers: List[Callable[[List[Dict]], Any]] = []
+        self.running = False
+        self.token: Optional[CancellationToken] = None
+        self.ownsToken = False
+
+    def subscribe(self, callback: Callable[[List[Dict]], Any]):
+        """
+        Register `callback`, called on the event loop with the list of changed documents.
+        """
+        self.subscribers.append(callback)
+
+    def publish(self, changed: List[Dict]):
+        if not changed:
+            return
+        for callback in self.subscribers:
+            try:
+                callback(changed)
+            except Exception as e:
+                logger.log("error", "DeltaSync > Publish:: A subscriber failed.", e, {"collection": self.collection})
+
+    def encodeWatermark(self) -> str:
+        lastUpdated = self.lastUpdated
+        if isinstance(lastUpdated, datetime):
+            # keep the BSON type, a date never compares greater than a string on the server
+            lastUpdated = {"$date": lastUpdated.isoformat()}
+        return json.dumps({
+            "lastUpdated": lastUpdated,
+            "lastId": str(self.lastId) if self.lastId else None,
+        }, default=str)
+
+    def decodeWatermark(self, watermark: Optional[str]):
+        try:
+            state = json.loads(watermark) if watermark else {}
+        except (TypeError, ValueError):
+            state = {}
+        if not isinstance(state, dict):
+            state = {} # a plain timestamp written by the snapshot cache, start over
+        lastUpdated = state.get("lastUpdated")
+        if isinstance(lastUpdated, dict) and "$date" in lastUpdated:
+            lastUpdated = datetime.fromisoformat(lastUpdated["$date"])
+        self.lastUpdated = lastUpdated
+        self.lastId = ObjectId(state["lastId"]) if state.get("lastId") else None
+
+    def advanceWatermark(self, documents: List[Dict]):
+        for doc in documents:
+            updated = doc.get(self.watermarkField) if self.watermarkField else None
+            try:
+                if updated is not None and (self.lastUpdated is None or updated > self.lastUpdated):
+                    self.lastUpdated = updated
+            except TypeError:
+                self.lastUpdated = updated
+            _id = doc.get("_id")
+            if isinstance(_id, ObjectId) and (self.lastId is None or _id > self.lastId):
+                self.lastId = _id
+
+    def deltaQuery(self) -> Dict:
+        query = {self.key: {"$in": self.keys}}
+        if self.lastUpdated is None:
+            # without a modification field, `_id` only reveals inserts: fetch every watched document again
+            if self.watermarkField:
+                self.reportMissingWatermark()
+            return query
+        changed = []
+        if self.lastUpdated is not None:
+            changed.append({self.watermarkField: {"$gt": self.lastUpdated}})
+        if self.lastId is not None:
+            changed.append({"_id": {"$gt": self.lastId}})
+        if changed:
+            query["$or"] = changed
+        return query
+
+    def reportMissingWatermark(self):
+        if not self.documents:
+            return # nothing seen yet, e.g. a cold start
+        missing = (self.database, self.collection, self.watermarkField)
+        if missing not in _missingWatermarks:
+            _missingWatermarks.add(missing)
+            logger.log(
+                "warning",
+                f"DeltaSync > Watermark:: No `{self.watermarkField}` in {self.database}.{self.collection}, every sync refetches the watched documents.",
+                params={"keys": len(self.keys)})
+
+    def seed(self, documents: List[Dict]):
+        """
+        Start from documents the caller already fetched (and painted), so the first sync only fetches what changed since.
+        """
+        for doc in documents:
+            self.documents[doc.get(self.key)] = doc
+        self.advanceWatermark(documents)
+
+    async def restore(self) -> List[Dict]:
+        """
+        Load the cached snapshot and its watermark. Returns the cached documents.
+        """
+        cached = await ThreadRun(marketCache.load, self.snapshot, self.raw)
+        watermark = await ThreadRun(marketCache.watermark, self.snapshot)
+        self.documents = indexDocuments(cached, self.key)
+        if self.documents:
+            self.decodeWatermark(watermark)
+        return list(self.documents.values())
+
+    async def merge(self, changed: List[Dict]):
+        if not changed:
+            return
+        for doc in changed:
+            self.documents[doc.get(self.key)] = doc
+        self.advanceWatermark(changed)
+        # only the changed documents are written, the rest of the snapshot is already on disk
+        await ThreadRun(marketCache.upsert, self.snapshot, changed, self.key, self.encodeWatermark())
+        self.publish(changed)
+
+    async def sync(self) -> List[Dict]:
+        """
+        Fetch the documents changed since the watermark and push each of them to the subscribers as it arrives,
+        then merge them into the snapshot.
+        """
+        changed: List[Dict] = []
+        seen = set()
+        # newest `_id` first and uncapped: with several documents per key, the newest one is kept for every key
+        async for doc in asyncMongoStream(
+            database=self.database,
+            collection=self.collection,
+            sortField="_id",
+            limit=0,
+            connection=self.connection,
+            projection=self.projection,
+            batchSize=self.batchSize,
+            token=self.token,
+            raw=self.raw,
+            **self.deltaQuery()):
+            value = doc.get(self.key)
+            if value in seen:
+                continue
+            seen.add(value)
+            if self.documents.get(value) == doc:
+                continue # refetched without a watermark, but unchanged
+            changed.append(doc)
+            self.documents[value] = doc
+            self.publish([doc])
+
+        if changed:
+            self.advanceWatermark(changed)
+            await ThreadRun(marketCache.upsert, self.snapshot, changed, self.key, self.encodeWatermark())
+        return changed
+
+    def streamProjection(self) -> Dict:
+        """
+        The find projection, applied to the `fullDocument` of the change events.
+        """
+        project = {}
+        for field, value in self.projection.items():
+            if isinstance(value, dict) and "$slice" in value:
+                # the `$slice` projection operator is spelled as an expression inside a pipeline
+                window = value["$slice"]
+                window = window if isinstance(window, list) else [window]
+                project[f"fullDocument.{field}"] = {"$slice": [f"$fullDocument.{field}", *window]}
+            else:
+                project[f"fullDocument.{field}"] = 1
+        return project
+
+    async def watch(self):
+        """
+        Follow the watched documents through a change stream. Raises `OperationFailure` if the deployment
+        does not support change streams (e.g. a standalone server).
+        """
+        collection = getGateway(getAsyncMongoClient(self.connection)).collection(self.database, self.collection)
+        pipeline = [{"$match": {
+            "operationType": {"$in": ["insert", "update", "replace"]},
+            f"fullDocument.{self.key}": {"$in": self.keys},
+        }}]
+        if self.projection is not None:
+            pipeline.append({"$project": self.streamProjection()})
+
+        async with await collection.watch(pipeline, full_document="updateLookup") as stream:
+            with self.token.bind():
+                async for change in stream:
+                    if not self.running:
+                        return
+                    doc = change.get("fullDocument")
+                    if doc:
+                        await self.merge([doc])
+
+    async def poll(self):
+        while self.running:
+            with self.token.bind():
+                await asyncio.sleep(self.interval)
+            try:
+                await self.sync()
+            except MongoConnectionError:
+                continue # the heartbeat monitor reports the outage, try again on the next period
+
+    async def run(self, token: Optional[CancellationToken] = None):
+        """
+        Catch up from the cached watermark, then follow changes until `stop` is called or `token` is cancelled.
+        """
+        self.ownsToken = token is None
+        self.token = token or CancellationToken()
+        self.running = True
+        try:
+            await self.sync()
+        except MongoConnectionError:
+            pass # keep the snapshot, the next period catches up
+
+        try:
+            await self.watch()
+        except (OperationFailure, ConnectionFailure, MongoConnectionError, PyMongoError) as e:
+            logger.log(
+                "info",
+                "DeltaSync > Watch:: Change streams unavailable, polling on the watermark instead.",
+                e,
+                {"collection": self.collection})
+            await self.poll()
+
+    def stop(self):
+        self.running = False
+        # a token passed to `run` belongs to the caller, which may share it with other queries
+        if self.token is not None and self.ownsToken:
+            self.token.cancel()
@@ -0,0 +1,226 @@
+import os
+import time
+import atexit
+import asyncio
+import threading
+import contextvars
+from functools import partial
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Callable, Dict
+
+from utils.logs import Logger
+from utils.envHandler import getenv
+
+logger = Logger("Utils-Executors")
+
+# Blocking database and cache calls
+DB_IO = "db-io"
+# Blocking HTTP calls and file downloads
+HTTP_IO = "http-io"
+# Chart exports and other CPU-bound transforms
+CPU_RENDER = "cpu-render"
+
+class ExecutorStats:
+    """
+    Counters of an `InstrumentedExecutor`. Times are in milliseconds.
+    """
+    __slots__ = ("submitted", "completed", "failed", "queued", "running", "maxQueued", "waitMs", "maxWaitMs", "runMs", "maxRunMs")
+
+    def __init__(self):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.queued = 0
+        self.running = 0
+        self.maxQueued = 0
+        self.waitMs = 0.0
+        self.maxWaitMs = 0.0
+        self.runMs = 0.0
+        self.maxRunMs = 0.0
+
+    def asDict(self) -> Dict[str, Any]:
+        done = self.completed + self.failed
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "queued": self.queued,
+            "running": self.running,
+            "maxQueued": self.maxQueued,
+            "meanWaitMs": round(self.waitMs / done, 3) if done else None,
+            "maxWaitMs": round(self.maxWaitMs, 3),
+            "meanRunMs": round(self.runMs / done, 3) if done else None,
+            "maxRunMs": round(self.maxRunMs, 3),
+        }
+
+class InstrumentedExecutor(Executor):
+    """
+    A named thread or process pool that tracks its queue depth, wait and run times.
+
+    With threads, the wait is measured up to the moment a worker picks the call up. With processes, calls cannot be
+    observed in the child, so the whole time spent in the pool is reported as run time and `queued` counts every call
+    not finished yet beyond the workers.
+
+    Methods:
+    -------
+    submit(fn, *args, **kwargs) -> Future: Schedules a call.
+    stats() -> Dict: The current counters.
+    shutdown(wait, cancel_futures): Stops the pool.
+    """
+    def __init__(self, name: str, maxWorkers: int, processes: bool = False):
+        self.name = name
+        self.maxWorkers = maxWorkers
+        self.processes = processes
+        self._lock = threading.Lock()
+        self._stats = ExecutorStats()
+        if processes:
+            self._pool: Executor = ProcessPoolExecutor(max_workers=maxWorkers)
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=maxWorkers, thread_name_prefix=name)
+
+    def _started(self, submittedAt: float) -> float:
+        startedAt = time.perf_counter()
+        waitMs = (startedAt - submittedAt) * 1000
+        with self._lock:
+            self._stats.queued -= 1
+            self._stats.running += 1
+            self._stats.waitMs += waitMs
+            self._stats.maxWaitMs = max(self._stats.maxWaitMs, waitMs)
+        return startedAt
+
+    def _finished(self, startedAt: float, failed: bool):
+        runMs = (time.perf_counter() - startedAt) * 1000
+        with self._lock:
+            self._stats.running -= 1
+            self._stats.runMs += runMs
+            self._stats.maxRunMs = max(self._stats.maxRunMs, runMs)
+            if failed:
+                self._stats.failed += 1
+            else:
+                self._stats.completed += 1
+
+    def _processed(self, submittedAt: float, future: Future):
+        runMs = (time.perf_counter() - submittedAt) * 1000
+        failed = future.cancelled() or future.exception() is not None
+        with self._lock:
+            self._stats.queued -= 1
+            self._stats.runMs += runMs
+            self._stats.maxRunMs = max(self._stats.maxRunMs, runMs)
+            if failed:
+                self._stats.failed += 1
+            else:
+                self._stats.completed += 1
+
+    def _timed(self, submittedAt: float, fn: Callable, *args, **kwargs):
+        startedAt = self._started(submittedAt)
+        failed = True
+        try:
+            result = fn(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            self._finished(startedAt, failed)
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        submittedAt = time.perf_counter()
+        with self._lock:
+            self._stats.submitted += 1
+            self._stats.queued += 1
+            self._stats.maxQueued = max(self._stats.maxQueued, self._stats.queued)
+
+        if not self.processes:
+            return self._pool.submit(self._timed, submittedAt, fn, *args, **kwargs)
+
+        # the call runs in another process, only its round trip can be timed from here
+        future = self._pool.submit(fn, *args, **kwargs)
+        future.add_done_callback(lambda future: self._processed(submittedAt, future))
+        return future
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = self._stats.asDict()
+        stats.update({"name": self.name, "maxWorkers": self.maxWorkers, "processes": self.processes})
+        return stats
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False):
+        self._pool.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+class Executors:
+    """
+    The process-wide named executors, created on first use.
+
+    Sizes are read from `EXECUTOR_<NAME>_WORKERS` (e.g. `EXECUTOR_DB_IO_WORKERS`), and
+    `EXECUTOR_<NAME>_PROCESSES=1` turns a pool into a process pool. Only picklable module-level functions can be sent
+    to a process pool, so it is only worth enabling for CPU-bound stages such as `cpu-render`.
+
+    Methods:
+    -------
+    get(name: str) -> InstrumentedExecutor: The executor called `name`.
+    stats() -> Dict[str, Dict]: The counters of every executor created so far.
+    shutdown(): Stops every executor.
+    """
+    DEFAULT_WORKERS: Dict[str, int] = {
+        DB_IO: 8,
+        HTTP_IO: 8,
+        CPU_RENDER: max(1, min(4, (os.cpu_count() or 2) - 1)),
+    }
+
+    _executors: Dict[str, InstrumentedExecutor] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def options(cls, name: str):
+        prefix = f"EXECUTOR_{name.upper().replace('-', '_')}"
+        workers = int(getenv(f"{prefix}_WORKERS", cls.DEFAULT_WORKERS.get(name, 4)))
+        processes = str(getenv(f"{prefix}_PROCESSES", "")).lower() in ("1", "true", "yes")
+        return workers, processes
+
+    @classmethod
+    def get(cls, name: str) -> InstrumentedExecutor:
+        with cls._lock:
+            executor = cls._executors.get(name)
+            if executor is None:
+                workers, processes = cls.options(name)
+                executor = cls._executors[name] = InstrumentedExecutor(name, workers, processes)
+                logger.log("info", f"Executors > Get:: Executor {name} created.", params={"workers": workers, "processes": processes})
+            return executor
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        with cls._lock:
+            executors = list(cls._executors.values())
+        return {executor.name: executor.stats() for executor in executors}
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            executors = list(cls._executors.values())
+            cls._executors.clear()
+        for executor in executors:
+            logger.log("info", f"Executors > Shutdown:: {executor.name}", params=executor.stats())
+            executor.shutdown(wait=False, cancel_futures=True)
+
+async def runIn(name: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    Runs `func` on the executor called `name` and waits for its result.
+
+    Parameters:
+    - name (str): The executor, e.g. `DB_IO`, `HTTP_IO` or `CPU_RENDER`.
+    - func (Callable): The blocking function. It must be picklable if the executor is a process pool.
+
+    Returns:
+    - Any: The result of `func`.
+
+    Example:
+    >>> chart = await runIn(CPU_RENDER, chartImage, dates, values)
+    """
+    loop = asyncio.get_running_loop()
+    executor = Executors.get(name)
+    if executor.processes:
+        call = partial(func, *args, **kwargs)
+    else:
+        # like asyncio.to_thread, the call sees the caller's context variables
+        call = partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(executor, call)
+
+atexit.register(Executors.shutdown)
@@ -8,43 +8,10 @@ from utils.paths import getFileSystemPath
 
 APP_BASE_PATH = getFileSystemPath(getenv('APP_BASE_PATH'))
 
-def chartWithSense(dates: list[str], values: list[int], width=120, height=60):
+def chartFigure(dates: list[str], values: list[int], width=120, height=60) -> go.Figure:
     """
-    Generates a line chart with a sense of trend based on the given dates and values.
-
-    Args:
-        dates (list[str]): A list of dates in string format.
-        values (list[int]): A list of corresponding values.
-        width (int, optional): The width of the chart in pixels. Defaults to 120.
-        height (int, optional): The height of the chart in pixels. Defaults to 60.
-
-    Returns:
-        Path: The path to the saved chart image.
-
-    Raises:
-        None
-
-    Description:
-        This function generates a line chart with a sense of trend based on the given dates and values.
-        The color of the line is determined by the trend of the last two values. If the second last value
-        is greater than the last value, the line is colored red, otherwise it is colored green.
-
-        The chart is saved as a PNG image with the name "chart_with_sense" in the "static/charts" directory
-        of the APP_BASE_PATH. The directory is created if it does not exist.
-
-        The chart has no axis labels, tick labels, or grid lines. The background is transparent.
-
-        The chart is saved with the specified width and height.
-
-        The function returns the path to the saved chart image.
+    Builds the figure drawn by `chartWithSense` and `chartImage`.
     """
-    if  not dates or not values:
-        return ""
-    
-    if (not dates and values) or (dates and not values):
-        raise ValueError("Both dates and values must be provided")
-    
-    
     color = "red" if values[-2] > values[-1] else "green"
     
     trace = go.Scatter(
@@ -85,6 +52,47 @@ def chartWithSense(dates: list[str], values: list[int], width=120, height=60):
         paper_bgcolor='rgba(0,0,0,0)',  # Ensure the paper background is transparent
     )
 
+    return fig
+
+def chartWithSense(dates: list[str], values: list[int], width=120, height=60):
+    """
+    Generates a line chart with a sense of trend based on the given dates and values.
+
+    Args:
+        dates (list[str]): A list of dates in string format.
+        values (list[int]): A list of corresponding values.
+        width (int, optional): The width of the chart in pixels. Defaults to 120.
+        height (int, optional): The height of the chart in pixels. Defaults to 60.
+
+    Returns:
+        Path: The path to the saved chart image.
+
+    Raises:
+        None
+
+    Description:
+        This function generates a line chart with a sense of trend based on the given dates and values.
+        The color of the line is determined by the trend of the last two values. If the second last value
+        is greater than the last value, the line is colored red, otherwise it is colored green.
+
+        The chart is saved as a PNG image with the name "chart_with_sense" in the "static/charts" directory
+        of the APP_BASE_PATH. The directory is created if it does not exist.
+
+        The chart has no axis labels, tick labels, or grid lines. The background is transparent.
+
+        The chart is saved with the specified width and height.
+
+        The function returns the path to the saved chart image.
+    """
+    if  not dates or not values:
+        return ""
+    
+    if (not dates and values) or (dates and not values):
+        raise ValueError("Both dates and values must be provided")
+    
+    
+    fig = chartFigure(dates, values, width, height)
+
     name = "chart_with_sense"
     suffix = ""
     extension = ".png"
@@ -96,6 +104,19 @@ def chartWithSense(dates: list[str], values: list[int], width=120, height=60):
 
     return outputPath
 
+def chartImage(dates: list[str], values: list[int], width=120, height=60) -> bytes:
+    """
+    Renders the `chartWithSense` chart to PNG bytes. Nothing is written to the shared chart file, so charts can be
+    rendered concurrently, in threads or in another process.
+
+    Returns:
+        bytes: The PNG image. Empty if there is nothing to draw.
+    """
+    if not dates or not values:
+        return b""
+    fig = chartFigure(dates, values, width, height)
+    return pio.to_image(fig, format="png", width=width, height=height, scale=1)
+
 if __name__ == '__main__':
     # Example usage
     dates = ["2022", "2023", "2024", "2025", "2026", "2027", "2028", "2029"]  # Replace with your date data
@@ -0,0 +1,164 @@
+import time
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import bson
+from bson.raw_bson import RawBSONDocument
+
+from utils.logs import Logger
+from utils.envHandler import getenv
+from utils.paths import constructPath, forcePath, getFileSystemPath
+
+logger = Logger("Utils-MarketCache")
+
+class MarketCache:
+    """
+    Persistent on-disk snapshot of the market collections, stored in SQLite under `APP_BASE_PATH/static/cache`.
+
+    Each snapshot is a named list of documents (usually named after its collection) with a watermark recording
+    when, or up to which point, it was last refreshed. Documents are stored BSON-encoded so dates and ids survive
+    the round trip. Windows paint from `load` and refresh in the background with `save`, or `upsert` for the few
+    documents that changed.
+
+    The database is stamped with `SCHEMA_VERSION`; a file written by another version is wiped on open.
+    """
+    SCHEMA_VERSION = 1
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _defaultPath(self) -> Path:
+        basePath = Path(getFileSystemPath(getenv("APP_BASE_PATH")))
+        return constructPath(basePath, "static", "cache", "market.sqlite3")
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is not None:
+            return self._connection
+
+        path = self.path or self._defaultPath()
+        forcePath(path)
+        # Shared by the UI thread and the `ThreadRun` workers, serialized through `self._lock`
+        connection = sqlite3.connect(str(path), check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        row = connection.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+        if row is None or int(row[0]) != self.SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS documents")
+            connection.execute("DROP TABLE IF EXISTS watermarks")
+            connection.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('schema_version', ?)", (str(self.SCHEMA_VERSION),))
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "name TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL, document BLOB NOT NULL, "
+            "PRIMARY KEY (name, key))")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS watermarks (name TEXT PRIMARY KEY, watermark TEXT, savedAt REAL NOT NULL)")
+        connection.commit()
+
+        self._connection = connection
+        return connection
+
+    def load(self, name: str, raw: bool = False) -> List[Dict]:
+        """
+        Return the documents of the snapshot `name`, in the order they were saved. An empty list means a cache miss.
+        With `raw`, the documents are returned as `RawBSONDocument`s, decoded only when their fields are accessed.
+        """
+        try:
+            with self._lock:
+                rows = self._connect().execute(
+                    "SELECT document FROM documents WHERE name = ? ORDER BY position", (name,)).fetchall()
+            return [RawBSONDocument(row[0]) if raw else bson.decode(row[0]) for row in rows]
+        except Exception as e:
+            logger.log("error", "MarketCache > Load:: Unable to read the snapshot.", e, {"name": name})
+            return []
+
+    def save(self, name: str, documents: List[Dict], key: Optional[str] = None, watermark: Any = None):
+        """
+        Replace the snapshot `name` with `documents`.
+
+        Parameters:
+        - name (str): The snapshot name, usually the collection name.
+        - documents (List[Dict]): The documents to store.
+        - key (str): The field identifying a document. If omitted, documents are identified by their position.
+        - watermark (Any): The refresh watermark. Default is the current time.
+        """
+        if documents is None:
+            return
+        watermark = time.time() if watermark is None else watermark
+        try:
+            rows = [
+                (name, str(doc.get(key, pos)) if key else str(pos), pos, bson.encode(doc))
+                for pos, doc in enumerate(documents)
+            ]
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    connection.execute("DELETE FROM documents WHERE name = ?", (name,))
+                    connection.executemany(
+                        "INSERT OR REPLACE INTO documents (name, key, position, document) VALUES (?, ?, ?, ?)", rows)
+                    connection.execute(
+                        "INSERT OR REPLACE INTO watermarks (name, watermark, savedAt) VALUES (?, ?, ?)",
+                        (name, str(watermark), time.time()))
+        except Exception as e:
+            logger.log("error", "MarketCache > Save:: Unable to write the snapshot.", e, {"name": name})
+
+    def upsert(self, name: str, documents: List[Dict], key: str, watermark: Any = None):
+        """
+        Write `documents` into the snapshot `name`, replacing the stored documents with the same `key` and appending
+        the others, then record `watermark`. The rest of the snapshot is left as is.
+
+        Parameters:
+        - name (str): The snapshot name, usually the collection name.
+        - documents (List[Dict]): The changed documents.
+        - key (str): The field identifying a document.
+        - watermark (Any): The refresh watermark. Default is the current time.
+        """
+        if not documents:
+            return
+        watermark = time.time() if watermark is None else watermark
+        try:
+            rows = [(str(doc.get(key)), bson.encode(doc)) for doc in documents]
+            with self._lock:
+                connection = self._connect()
+                with connection:
+                    position = connection.execute(
+                        "SELECT COALESCE(MAX(position), -1) FROM documents WHERE name = ?", (name,)).fetchone()[0]
+                    for docKey, document in rows:
+                        updated = connection.execute(
+                            "UPDATE documents SET document = ? WHERE name = ? AND key = ?", (document, name, docKey))
+                        if updated.rowcount == 0:
+                            position += 1
+                            connection.execute(
+                                "INSERT INTO documents (name, key, position, document) VALUES (?, ?, ?, ?)",
+                                (name, docKey, position, document))
+                    connection.execute(
+                        "INSERT OR REPLACE INTO watermarks (name, watermark, savedAt) VALUES (?, ?, ?)",
+                        (name, str(watermark), time.time()))
+        except Exception as e:
+            logger.log("error", "MarketCache > Upsert:: Unable to write the documents.", e, {"name": name})
+
+    def watermark(self, name: str) -> Optional[str]:
+        """
+        Return the watermark of the snapshot `name`, or None if it was never saved.
+        """
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT watermark FROM watermarks WHERE name = ?", (name,)).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            logger.log("error", "MarketCache > Watermark:: Unable to read the watermark.", e, {"name": name})
+            return None
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+# Process-wide cache, opened on first use
+marketCache = MarketCache()
@@ -0,0 +1,294 @@
+import sys
+import json
+import time
+import queue
+import atexit
+import threading
+from pathlib import Path
+from bisect import bisect_left
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+from bson import encode, json_util
+from pymongo import monitoring
+
+from utils.logs import Logger
+from utils.envHandler import getenv
+from utils.paths import getFileSystemPath
+
+logger = Logger("Utils-MongoTelemetry")
+# explain output of the slow commands, in logs/Mongo-SlowQueries.log
+slowLogger = Logger("Mongo-SlowQueries")
+
+# Upper bounds, in milliseconds, of the latency histogram buckets (the last bucket is unbounded)
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Commands that can be explained, with the fields of the original command worth keeping
+EXPLAINABLE = {
+    "find": ("filter", "sort", "projection", "limit", "skip", "hint", "collation"),
+    "aggregate": ("pipeline", "hint", "collation"),
+    "count": ("query", "limit", "skip", "hint", "collation"),
+    "distinct": ("key", "query", "collation"),
+    "update": ("updates",),
+    "delete": ("deletes",),
+    "findAndModify": ("query", "sort", "update", "remove", "upsert", "fields", "new"),
+}
+
+# Frames of these modules are skipped when looking for the call site of a command
+_DRIVER_PATHS = ("pymongo", "bson", "asyncio", "concurrent", "threading", "contextlib", "qasync")
+_DATA_LAYER_FILES = ("databases.py", "asyncDatabases.py", "mongoTelemetry.py", "deltaSync.py", "writeBehind.py", "quoteSeries.py")
+
+def callSite(depth: int = 64) -> str:
+    """
+    Returns the first `file:line (function)` of the current stack outside the driver and the data layer.
+    """
+    frame = sys._getframe(1)
+    while frame is not None and depth > 0:
+        path = frame.f_code.co_filename
+        name = Path(path).name
+        if not any(part in path for part in _DRIVER_PATHS) and name not in _DATA_LAYER_FILES:
+            return f"{Path(path).parent.name}/{name}:{frame.f_lineno} ({frame.f_code.co_name})"
+        frame = frame.f_back
+        depth -= 1
+    return "unknown"
+
+class CallStats:
+    """
+    Latency histogram, document count and bytes returned of the commands sent from one call site.
+    """
+    __slots__ = ("count", "failures", "totalMs", "maxMs", "documents", "bytes", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.failures = 0
+        self.totalMs = 0.0
+        self.maxMs = 0.0
+        self.documents = 0
+        self.bytes = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def record(self, durationMs: float, documents: int, size: int):
+        self.count += 1
+        self.totalMs += durationMs
+        self.maxMs = max(self.maxMs, durationMs)
+        self.documents += documents
+        self.bytes += size
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, durationMs)] += 1
+
+    def percentile(self, rank: float) -> Optional[float]:
+        """
+        The upper bound of the bucket holding the `rank` percentile (None if it falls in the unbounded bucket).
+        """
+        target = self.count * rank / 100
+        seen = 0
+        for bound, hits in zip(LATENCY_BUCKETS_MS + (None,), self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return bound
+        return None
+
+    def asDict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "failures": self.failures,
+            "totalMs": round(self.totalMs, 3),
+            "meanMs": round(self.totalMs / self.count, 3) if self.count else None,
+            "maxMs": round(self.maxMs, 3),
+            "p50Ms": self.percentile(50),
+            "p95Ms": self.percentile(95),
+            "documents": self.documents,
+            "bytes": self.bytes,
+            "histogram": dict(zip([f"<={bound}ms" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}ms"], self.buckets)),
+        }
+
+class MongoTelemetry:
+    """
+    Collects per-call-site statistics of the MongoDB commands and explains the slow ones.
+
+    Statistics are keyed by call site (the first frame outside the driver and the data layer), command and namespace.
+    A `getMore` is attributed to the call site of the cursor it continues. Commands slower than `slowMs` are explained
+    in a background thread, at most once per key every `EXPLAIN_INTERVAL` seconds, and the winning plan is written to
+    `logs/Mongo-SlowQueries.log`.
+
+    Telemetry is enabled with the `MONGO_TELEMETRY` environment variable; the threshold is `MONGO_SLOW_MS`.
+
+    Methods:
+    -------
+    listener(uri: Optional[str]) -> TelemetryListener: A command listener reporting the commands of the client for `uri`.
+    summary() -> List[Dict]: The statistics of every key, slowest total first.
+    export(path: Optional[Path]) -> Path: Writes the summary as JSON (default `logs/mongo-telemetry.json`).
+    reset(): Forgets the statistics.
+    """
+    EXPLAIN_INTERVAL = 10 * 60
+    MAX_PENDING_EXPLAINS = 32
+    # cursors whose call site is remembered for their getMore
+    MAX_CURSORS = 1024
+
+    def __init__(self, enabled: bool = False, slowMs: float = 200):
+        self.enabled = enabled
+        self.slowMs = slowMs
+        self._lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str, str], CallStats] = {}
+        self._inflight: Dict[Tuple[Any, int], Tuple[str, str, Optional[Dict], Optional[str]]] = {}
+        self._cursors: Dict[int, str] = {}
+        self._explained: Dict[Tuple[str, str, str], float] = {}
+        self._explains: "queue.Queue[Tuple[Optional[str], str, Dict, str, float]]" = queue.Queue(self.MAX_PENDING_EXPLAINS)
+        self._worker: Optional[threading.Thread] = None
+
+    def listener(self, uri: Optional[str] = None) -> "TelemetryListener":
+        return TelemetryListener(self, uri)
+
+    def listeners(self, uri: Optional[str] = None) -> List[monitoring.CommandListener]:
+        """
+        The listeners to register on a new client, empty when telemetry is disabled.
+        """
+        return [self.listener(uri)] if self.enabled else []
+
+    def _started(self, uri: Optional[str], event: monitoring.CommandStartedEvent):
+        name = event.command_name
+        if name == "explain":
+            return
+        command = event.command
+        if name == "getMore":
+            with self._lock:
+                # put back once the reply shows the cursor is still open
+                site = self._cursors.pop(command.get("getMore"), "unknown")
+            namespace = f"{event.database_name}.{command.get('collection')}"
+        else:
+            site = callSite()
+            namespace = f"{event.database_name}.{command.get(name)}" if isinstance(command.get(name), str) else event.database_name
+        explainable = None
+        if name in EXPLAINABLE:
+            explainable = {name: command.get(name)}
+            explainable.update({field: command[field] for field in EXPLAINABLE[name] if field in command})
+            if name == "aggregate":
+                explainable["cursor"] = {}
+        with self._lock:
+            self._inflight[(event.connection_id, event.request_id)] = (site, namespace, explainable, uri)
+
+    def _finished(self, event: Any, failed: bool):
+        with self._lock:
+            started = self._inflight.pop((event.connection_id, event.request_id), None)
+        if started is None:
+            return
+        site, namespace, explainable, uri = started
+        durationMs = event.duration_micros / 1000
+
+        documents, size = 0, 0
+        if not failed:
+            reply = event.reply
+            # raw reads get their reply as a RawBSONDocument
+            cursor = reply.get("cursor") if isinstance(reply, Mapping) else None
+            if isinstance(cursor, Mapping):
+                documents = len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+                if cursor.get("id"):
+                    with self._lock:
+                        if len(self._cursors) >= self.MAX_CURSORS:
+                            self._cursors.pop(next(iter(self._cursors)))
+                        self._cursors[cursor["id"]] = site
+            elif isinstance(reply, Mapping) and "n" in reply:
+                documents = reply.get("n") or 0
+            try:
+                size = len(encode(reply))
+            except Exception:
+                size = 0
+
+        key = (site, event.command_name, namespace)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = CallStats()
+            if failed:
+                stats.failures += 1
+            else:
+                stats.record(durationMs, documents, size)
+
+        if durationMs >= self.slowMs and explainable is not None:
+            self._scheduleExplain(key, uri, event.database_name, explainable, durationMs)
+
+    def _scheduleExplain(self, key: Tuple[str, str, str], uri: Optional[str], database: str, command: Dict, durationMs: float):
+        now = time.monotonic()
+        with self._lock:
+            last = self._explained.get(key)
+            if last is not None and now - last < self.EXPLAIN_INTERVAL:
+                return
+            self._explained[key] = now
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._explainLoop, name="MongoTelemetry", daemon=True)
+                self._worker.start()
+        try:
+            self._explains.put_nowait((uri, database, command, key[0], durationMs))
+        except queue.Full:
+            pass
+
+    def _explainLoop(self):
+        # the listener must not send commands itself, explains run here on the synchronous client
+        from utils.databases import MongoRegistry
+
+        while True:
+            uri, database, command, site, durationMs = self._explains.get()
+            try:
+                plan = MongoRegistry.client(uri)[database].command({"explain": command, "verbosity": "queryPlanner"})
+                slowLogger.log("warning", f"Slow query ({durationMs:.1f} ms) from {site}", params={
+                    "database": database,
+                    "command": json.loads(json_util.dumps(command)),
+                    "winningPlan": json.loads(json_util.dumps(plan.get("queryPlanner", {}).get("winningPlan", plan))),
+                })
+            except Exception as e:
+                slowLogger.log("warning", f"Slow query ({durationMs:.1f} ms) from {site}, explain failed", e, {"database": database})
+
+    def summary(self) -> List[Dict]:
+        with self._lock:
+            items = [(key, stats.asDict()) for key, stats in self._stats.items()]
+        items.sort(key=lambda item: item[1]["totalMs"], reverse=True)
+        return [{"callSite": site, "command": command, "namespace": namespace, **stats} for (site, command, namespace), stats in items]
+
+    def export(self, path: Optional[Path] = None) -> Path:
+        if path is None:
+            path = Path(getFileSystemPath(base_directory=getenv("APP_BASE_PATH")), "logs", "mongo-telemetry.json")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump({"slowMs": self.slowMs, "calls": self.summary()}, f, indent=2)
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._explained.clear()
+
+class TelemetryListener(monitoring.CommandListener):
+    """
+    Reports the commands of one client to `MongoTelemetry`.
+    """
+    def __init__(self, telemetry: MongoTelemetry, uri: Optional[str] = None):
+        self.telemetry = telemetry
+        self.uri = uri
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        try:
+            self.telemetry._started(self.uri, event)
+        except Exception as e:
+            logger.log("error", "MongoTelemetry > Started:: Unable to record a command.", e)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        try:
+            self.telemetry._finished(event, failed=False)
+        except Exception as e:
+            logger.log("error", "MongoTelemetry > Succeeded:: Unable to record a command.", e)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        try:
+            self.telemetry._finished(event, failed=True)
+        except Exception as e:
+            logger.log("error", "MongoTelemetry > Failed:: Unable to record a command.", e)
+
+# Process-wide telemetry, off unless MONGO_TELEMETRY is set
+telemetry = MongoTelemetry(
+    enabled=str(getenv("MONGO_TELEMETRY", "")).lower() in ("1", "true", "yes"),
+    slowMs=float(getenv("MONGO_SLOW_MS", 200)))
+
+def exportTelemetry():
+    if telemetry.enabled:
+        path = telemetry.export()
+        logger.log("info", f"MongoTelemetry > Export:: Summary written to {path}")
+
+atexit.register(exportTelemetry)
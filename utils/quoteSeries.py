@@ -0,0 +1,173 @@
+import time
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo.mongo_client import MongoClient
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from utils.databases import DEFAULT_MAX_TIME_MS, MongoConnectionError, getGateway
+from utils.logs import Logger
+
+logger = Logger("Utils-QuoteSeries")
+
+class QuoteSeries:
+    """
+    Reads quotes from a MongoDB time-series collection, one document per (symbol, date), instead of the arrays
+    embedded in the per-symbol documents.
+
+    Range queries and bucketing run on the server. Every read returns None when the collection does not exist
+    (or cannot be read), so callers fall back to the embedded layout.
+
+    Attributes:
+    ----------
+    DATABASE (str): The database of the time-series collection.
+    COLLECTION (str): The time-series collection.
+    META_FIELD (str): The meta field of the collection, holding the symbol.
+    TIME_FIELD (str): The time field of the collection.
+    AVAILABILITY_TTL (float): How long, in seconds, the presence of the collection is remembered.
+
+    Methods:
+    -------
+    available() -> bool: Whether the time-series collection exists.
+    window(symbol, points, start, end) -> Optional[List[Dict]]: The quotes of a symbol, oldest first.
+    windows(symbols, points, start, end) -> Optional[Dict[Any, List[Dict]]]: The quotes of several symbols, in one query.
+    buckets(symbol, unit, start, end) -> Optional[List[Dict]]: OHLC bars of a symbol, aggregated by `unit`.
+
+    Example:
+    >>> series = QuoteSeries(client)
+    >>> quotes = series.window("AAPL", points=60) or embeddedQuotes
+    """
+    DATABASE = "market"
+    COLLECTION = "quotes"
+    META_FIELD = "symbol"
+    TIME_FIELD = "date"
+    AVAILABILITY_TTL = 10 * 60
+
+    _lock = threading.Lock()
+    _available: Dict[Tuple[int, str, str], Tuple[bool, float]] = {}
+
+    def __init__(self, connection: MongoClient, database: Optional[str] = None, collection: Optional[str] = None):
+        self.connection = connection
+        self.database = database or self.DATABASE
+        self.collection = collection or self.COLLECTION
+
+    def available(self) -> bool:
+        key = (id(self.connection), self.database, self.collection)
+        with self._lock:
+            state = self._available.get(key)
+            if state is not None and time.monotonic() - state[1] < self.AVAILABILITY_TTL:
+                return state[0]
+
+        try:
+            database = self.connection[self.database]
+            available = bool(database.list_collection_names(filter={"name": self.collection, "type": "timeseries"}))
+        except (ConnectionFailure, PyMongoError) as e:
+            logger.log("warning", "QuoteSeries > Available:: Unable to list collections, using the embedded quotes.", e)
+            return False
+
+        with self._lock:
+            self._available[key] = (available, time.monotonic())
+        return available
+
+    def _read(self, pipeline: List[Dict], symbol: Any) -> Optional[List[Dict]]:
+        if symbol is None or self.connection is None or not self.available():
+            return None
+        try:
+            target = getGateway(self.connection).collection(self.database, self.collection)
+            return list(target.aggregate(pipeline, maxTimeMS=DEFAULT_MAX_TIME_MS))
+        except (MongoConnectionError, ConnectionFailure, PyMongoError) as e:
+            logger.log("warning", "QuoteSeries > Read:: Unable to read the time series, using the embedded quotes.", e, {"symbol": symbol})
+            return None
+
+    def _match(self, symbol: Any, start: Optional[datetime], end: Optional[datetime]) -> Dict:
+        match: Dict[str, Any] = {self.META_FIELD: symbol}
+        if start is not None or end is not None:
+            match[self.TIME_FIELD] = {}
+            if start is not None:
+                match[self.TIME_FIELD]["$gte"] = start
+            if end is not None:
+                match[self.TIME_FIELD]["$lte"] = end
+        return match
+
+    def window(self, symbol: Any, points: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """
+        Returns the quotes of `symbol` between `start` and `end`, limited to the latest `points`, oldest first.
+
+        Returns:
+        - Optional[List[Dict]]: The quotes (the time-series documents without `_id` and the meta field). None if the
+          time-series collection is not available; an empty list if it holds no quote in the range.
+        """
+        pipeline: List[Dict] = [
+            {"$match": self._match(symbol, start, end)},
+            {"$sort": {self.TIME_FIELD: -1}},
+        ]
+        if points:
+            pipeline.append({"$limit": points})
+        pipeline += [
+            {"$sort": {self.TIME_FIELD: 1}},
+            {"$project": {"_id": 0, self.META_FIELD: 0}},
+        ]
+        return self._read(pipeline, symbol)
+
+    def windows(self, symbols: Iterable[Any], points: Optional[int] = None, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[Dict[Any, List[Dict]]]:
+        """
+        Returns the quotes of every symbol of `symbols` with a single aggregation, as `window` would for each of them.
+
+        Returns:
+        - Optional[Dict[Any, List[Dict]]]: The quotes by symbol, oldest first. Symbols without quotes are missing.
+          None if the time-series collection is not available.
+        """
+        symbols = [symbol for symbol in symbols if symbol is not None]
+        if not symbols:
+            return {}
+        # sorted newest first, so `$firstN` keeps only the latest `points` of each symbol in the group's memory
+        quotes = {"$firstN": {"input": "$$ROOT", "n": points}} if points else {"$push": "$$ROOT"}
+        pipeline = [
+            {"$match": self._match({"$in": symbols}, start, end)},
+            {"$sort": {self.META_FIELD: 1, self.TIME_FIELD: -1}},
+            {"$project": {"_id": 0}},
+            {"$group": {"_id": f"${self.META_FIELD}", "quotes": quotes}},
+            {"$project": {"quotes": {"$reverseArray": "$quotes"}}},
+        ]
+        rows = self._read(pipeline, symbols)
+        if rows is None:
+            return None
+        return {
+            row["_id"]: [{field: value for field, value in quote.items() if field != self.META_FIELD} for quote in row["quotes"]]
+            for row in rows
+        }
+
+    def buckets(self, symbol: Any, unit: str = "week", start: Optional[datetime] = None, end: Optional[datetime] = None) -> Optional[List[Dict]]:
+        """
+        Returns OHLC bars of `symbol`, one per `unit` ("hour", "day", "week", "month", ...), oldest first.
+
+        Returns:
+        - Optional[List[Dict]]: Bars with `date`, `open`, `high`, `low`, `close`, `adjClose` and `volume`. None if the
+          time-series collection is not available.
+        """
+        timeField = f"${self.TIME_FIELD}"
+        pipeline = [
+            {"$match": self._match(symbol, start, end)},
+            {"$sort": {self.TIME_FIELD: 1}},
+            {"$group": {
+                "_id": {"$dateTrunc": {"date": timeField, "unit": unit}},
+                "open": {"$first": "$open"},
+                "high": {"$max": "$high"},
+                "low": {"$min": "$low"},
+                "close": {"$last": "$close"},
+                "adjClose": {"$last": "$adjClose"},
+                "volume": {"$sum": "$volume"},
+            }},
+            {"$sort": {"_id": 1}},
+            {"$set": {self.TIME_FIELD: "$_id"}},
+            {"$project": {"_id": 0}},
+        ]
+        return self._read(pipeline, symbol)
+
+def since(days: int) -> datetime:
+    """
+    The start of a window of `days` days ending today.
+    """
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    return today - timedelta(days=days)
@@ -0,0 +1,251 @@
+import asyncio
+import heapq
+import itertools
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+
+from utils.logs import Logger
+
+class Priority(IntEnum):
+    """
+    Scheduling lanes, lowest value first.
+    """
+    USER = 0        # work the user is waiting on: chat sends, focus panels, opening windows
+    DEFAULT = 1
+    BACKGROUND = 2  # refreshes, history trimming, status updates
+
+class Job:
+    """
+    A coroutine waiting in, or run by, a `TaskScheduler`.
+    """
+    __slots__ = ("coro", "priority", "onDone", "onError", "task", "group")
+
+    def __init__(self, coro: Awaitable, priority: Priority, onDone: Optional[Callable[[Any], None]], onError: Optional[Callable[[BaseException], None]], group: Optional["TaskGroup"] = None):
+        self.coro = coro
+        self.priority = Priority(priority)
+        self.onDone = onDone
+        self.onError = onError
+        self.task: Optional[asyncio.Future] = None
+        self.group = group
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+        else:
+            # never started, close it so it is not reported as never awaited
+            close = getattr(self.coro, "close", None)
+            if close is not None:
+                close()
+            self.coro = None
+            if self.group is not None:
+                self.group._jobs.discard(self)
+
+class TaskGroup:
+    """
+    The jobs of one window, cancelled together when the window is hidden.
+
+    While the group is paused, its submissions are dropped: the window refreshes what it shows once resumed.
+
+    Methods:
+    -------
+    submit(coro, priority, onDone, onError) -> Optional[Job]: Queues a coroutine, unless the group is paused.
+    append(coro): Queues a coroutine in the default lane.
+    pause() -> int: Cancels the jobs of the group and drops the next submissions.
+    resume(): Accepts submissions again.
+    cancel(): Cancels the jobs of the group.
+    """
+    def __init__(self, scheduler: "TaskScheduler", name: str):
+        self.scheduler = scheduler
+        self.name = name
+        self.paused = False
+        self._jobs: Set[Job] = set()
+
+    def __len__(self) -> int:
+        return len(self._jobs)
+
+    def submit(self, coro: Awaitable, priority: Priority = Priority.DEFAULT, onDone: Optional[Callable[[Any], None]] = None, onError: Optional[Callable[[BaseException], None]] = None) -> Optional[Job]:
+        if self.paused:
+            close = getattr(coro, "close", None)
+            if close is not None:
+                close()
+            return None
+        return self.scheduler.submit(coro, priority, onDone, onError, group=self)
+
+    def append(self, coro: Awaitable):
+        self.submit(coro)
+
+    def extend(self, coros):
+        for coro in coros:
+            self.submit(coro)
+
+    def cancel(self):
+        for job in list(self._jobs):
+            job.cancel()
+
+    def pause(self) -> int:
+        """
+        Cancels the jobs of the group and drops the next submissions until `resume`.
+
+        Returns:
+        - int: The number of jobs cancelled, so the window knows whether what it shows was left half done.
+        """
+        self.paused = True
+        cancelled = len(self._jobs)
+        self.cancel()
+        return cancelled
+
+    def resume(self):
+        self.paused = False
+
+class TaskScheduler:
+    """
+    Runs the coroutines submitted by the frames on the event loop, by priority and with a bounded concurrency.
+
+    Jobs wait in a priority queue and are started as soon as a slot frees up, so nothing polls the loop while idle.
+    `Priority.USER` jobs skip ahead of the queued ones and may use `userReserve` extra slots, so a click is served
+    even while background loads fill the regular slots. Finished tasks are dropped straight away.
+
+    `append` and `extend` keep the list interface the frames were written against.
+
+    Methods:
+    -------
+    submit(coro, priority, onDone, onError) -> Job: Queues a coroutine.
+    append(coro): Queues a coroutine in the default lane.
+    run(coro, priority) -> Any: Queues a coroutine and waits for its result.
+    group(name) -> TaskGroup: A group of jobs a window can cancel when it is hidden.
+    start(loop): Starts running the queued jobs on `loop`.
+    join(): Waits until no job is queued or running.
+    cancelAll(): Cancels the queued and running jobs.
+    """
+    def __init__(self, maxConcurrent: int = 16, userReserve: int = 4):
+        self.logger = Logger("Utils-TaskScheduler")
+        self.maxConcurrent = maxConcurrent
+        self.userReserve = userReserve
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._queue: List[Tuple[int, int, Job]] = []
+        self._sequence = itertools.count()
+        self._running: Set[asyncio.Future] = set()
+        self._idle: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._queue) + len(self._running)
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.loop = loop or asyncio.get_event_loop()
+        self._idle = asyncio.Event()
+        if not self:
+            self._idle.set()
+        self.loop.call_soon(self._pump)
+
+    def group(self, name: str) -> TaskGroup:
+        return TaskGroup(self, name)
+
+    def submit(self, coro: Awaitable, priority: Priority = Priority.DEFAULT, onDone: Optional[Callable[[Any], None]] = None, onError: Optional[Callable[[BaseException], None]] = None, group: Optional[TaskGroup] = None) -> Job:
+        """
+        Queues `coro` in the `priority` lane.
+
+        Parameters:
+        - coro (Awaitable): The coroutine (or future) to run.
+        - priority (Priority): The lane of the job. Default is `Priority.DEFAULT`.
+        - onDone (Callable): Called with the result once the job succeeded.
+        - onError (Callable): Called with the exception if the job failed. Failures are logged otherwise.
+        - group (TaskGroup): The group the job belongs to. Default is None.
+
+        Returns:
+        - Job: The queued job, which can be cancelled.
+        """
+        job = Job(coro, priority, onDone, onError, group)
+        if group is not None:
+            group._jobs.add(job)
+        heapq.heappush(self._queue, (int(priority), next(self._sequence), job))
+        if self._idle is not None:
+            self._idle.clear()
+        if self.loop is not None:
+            if self.loop.is_running() and self._onLoop():
+                self._pump()
+            else:
+                self.loop.call_soon_threadsafe(self._pump)
+        return job
+
+    def append(self, coro: Awaitable):
+        self.submit(coro)
+
+    def extend(self, coros):
+        for coro in coros:
+            self.submit(coro)
+
+    async def run(self, coro: Awaitable, priority: Priority = Priority.DEFAULT) -> Any:
+        """
+        Queues `coro` and waits for its result. Errors are raised to the caller.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.submit(
+            coro,
+            priority,
+            onDone=lambda result: future.done() or future.set_result(result),
+            onError=lambda error: future.done() or future.set_exception(error))
+        return await future
+
+    async def join(self):
+        if self._idle is not None:
+            await self._idle.wait()
+
+    def cancelAll(self):
+        while self._queue:
+            heapq.heappop(self._queue)[2].cancel()
+        for task in list(self._running):
+            task.cancel()
+
+    def _onLoop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def _capacity(self, priority: int) -> int:
+        return self.maxConcurrent + (self.userReserve if priority == Priority.USER else 0)
+
+    def _pump(self):
+        while self._queue and len(self._running) < self._capacity(self._queue[0][0]):
+            _, _, job = heapq.heappop(self._queue)
+            if job.coro is None:
+                continue
+            try:
+                job.task = asyncio.ensure_future(job.coro, loop=self.loop)
+            except TypeError as e:
+                self.logger.log("error", "TaskScheduler > Submit:: Not an awaitable.", e, {"job": repr(job.coro)})
+                continue
+            self._running.add(job.task)
+            job.task.add_done_callback(lambda task, job=job: self._finished(job, task))
+        if not self and self._idle is not None:
+            self._idle.set()
+
+    def _finished(self, job: Job, task: asyncio.Future):
+        self._running.discard(task)
+        job.coro = None
+        if job.group is not None:
+            job.group._jobs.discard(job)
+        try:
+            error = asyncio.CancelledError() if task.cancelled() else task.exception()
+            if isinstance(error, asyncio.CancelledError) and job.onError is None:
+                return
+            if error is not None:
+                if job.onError is not None:
+                    job.onError(error)
+                else:
+                    self.logger.log("error", "TaskScheduler > Job:: A scheduled task failed.", error, {"priority": job.priority.name})
+            elif job.onDone is not None:
+                job.onDone(task.result())
+        except Exception as e:
+            self.logger.log("error", "TaskScheduler > Callback:: A completion callback failed.", e)
+        finally:
+            self._pump()
@@ -1,3 +1,10 @@
+import asyncio
+
+from utils.logs import Logger
+from utils.taskScheduler import Priority
+
+logger = Logger("Utils-Workers")
+
         
 def spinnerWork(spinner, thread, worker, func):
     """
@@ -28,4 +35,48 @@ def spinnerWork(spinner, thread, worker, func):
         thread.start()
     except Exception as e:
          return
-    
\ No newline at end of file
+    
+
+def spinnerTask(spinner, coro, func, tasks=None):
+    """
+    Starts a spinner and runs a coroutine on the application's event loop, instead of a new loop in a new thread.
+
+    Args:
+        spinner: The spinner object to display.
+        coro: The coroutine to run.
+        func: Called with the result of the coroutine, on the GUI thread.
+        tasks: The scheduler or task group to submit the coroutine to, in the user lane. Default is None (the
+            coroutine is scheduled on the running loop directly).
+
+    Returns:
+        The scheduled job (or future), which can be cancelled. None if `tasks` is paused.
+    """
+    def done(result):
+        spinner.stop()
+        func(result)
+
+    def failed(error):
+        spinner.stop()
+        if not isinstance(error, asyncio.CancelledError):
+            logger.log("error", "SpinnerTask:: The task failed.", error)
+
+    spinner.show()
+    spinner.start()
+    if tasks is not None:
+        job = tasks.submit(coro, Priority.USER, onDone=done, onError=failed)
+        if job is None:
+            # the group is paused, its window is hidden
+            spinner.stop()
+        return job
+
+    def finished(task: asyncio.Future):
+        if task.cancelled():
+            failed(asyncio.CancelledError())
+        elif task.exception() is not None:
+            failed(task.exception())
+        else:
+            done(task.result())
+
+    future = asyncio.ensure_future(coro)
+    future.add_done_callback(finished)
+    return future
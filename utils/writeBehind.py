@@ -0,0 +1,166 @@
+import time
+import atexit
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import InsertOne, UpdateOne, DeleteOne
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from utils.databases import queryCache
+from utils.logs import Logger
+
+logger = Logger("Utils-WriteBehind")
+
+class WriteBehindQueue:
+    """
+    Collects fire-and-forget writes and sends them from a background thread, one `bulk_write` per collection.
+
+    Writes are grouped per collection in arrival order and sent as ordered bulk writes, either every `FLUSH_INTERVAL`
+    seconds or as soon as `MAX_BATCH_SIZE` writes are pending. A failed batch is retried up to `MAX_RETRIES` times with
+    an exponential backoff; the writes the server acknowledged are not sent again. Pending writes are flushed on exit.
+
+    Attributes:
+    ----------
+    FLUSH_INTERVAL (float): The maximum time, in seconds, a write waits before being sent.
+    MAX_BATCH_SIZE (int): The number of pending writes that triggers an immediate flush.
+    MAX_RETRIES (int): The number of attempts made for a batch before it is dropped and logged.
+
+    Methods:
+    -------
+    insertOne(collection, document): Queues an insert.
+    updateOne(collection, filter, update): Queues an update.
+    deleteOne(collection, filter): Queues a delete.
+    flush(timeout) -> bool: Sends every pending write and waits for them to be acknowledged.
+    close(timeout): Flushes and stops the worker.
+    """
+    FLUSH_INTERVAL = 0.5
+    MAX_BATCH_SIZE = 100
+    MAX_RETRIES = 5
+
+    def __init__(self):
+        self._pending: "OrderedDict[Tuple[int, str, str], Tuple[Collection, List[Any]]]" = OrderedDict()
+        self._condition = threading.Condition()
+        self._inflight = 0
+        self._size = 0
+        self._closed = False
+        self._flushing = 0
+        self._worker: Optional[threading.Thread] = None
+
+    def _ensureWorker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name="WriteBehind", daemon=True)
+            self._worker.start()
+
+    def enqueue(self, collection: Collection, request: Any):
+        """
+        Queues a pymongo write request (`InsertOne`, `UpdateOne`, `DeleteOne`, ...) for `collection`.
+        """
+        key = (id(collection.database.client), collection.database.name, collection.name)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WriteBehind > Enqueue:: The queue is closed.")
+            self._pending.setdefault(key, (collection, []))[1].append(request)
+            self._size += 1
+            self._ensureWorker()
+            self._condition.notify_all()
+
+    def insertOne(self, collection: Collection, document: Dict):
+        self.enqueue(collection, InsertOne(document))
+
+    def updateOne(self, collection: Collection, filter: Dict, update: Dict, upsert: bool = False):
+        self.enqueue(collection, UpdateOne(filter, update, upsert=upsert))
+
+    def deleteOne(self, collection: Collection, filter: Dict):
+        self.enqueue(collection, DeleteOne(filter))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._pending and not self._closed:
+                    self._condition.wait()
+                deadline = time.monotonic() + self.FLUSH_INTERVAL
+                # leave a little time for related writes to join the batch
+                while self._pending and self._size < self.MAX_BATCH_SIZE and not (self._closed or self._flushing):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if not self._pending:
+                    if self._closed:
+                        return
+                    continue
+                batches = list(self._pending.values())
+                self._pending.clear()
+                self._inflight += self._size
+                self._size = 0
+
+            for collection, requests in batches:
+                self._write(collection, requests)
+                with self._condition:
+                    self._inflight -= len(requests)
+                    self._condition.notify_all()
+
+    def _write(self, collection: Collection, requests: List[Any]):
+        delay = 0.5
+        for attempt in range(1, self.MAX_RETRIES + 1):
+            try:
+                collection.bulk_write(requests, ordered=True)
+                queryCache.invalidate(collection.database.name, collection.name)
+                return
+            except BulkWriteError as e:
+                # an ordered bulk write stops at the first error, everything before it was applied
+                done = e.details.get("nInserted", 0) + e.details.get("nModified", 0) + e.details.get("nRemoved", 0) + e.details.get("nUpserted", 0)
+                errors = e.details.get("writeErrors") or []
+                failedIndex = errors[0].get("index", done) if errors else done
+                logger.log("error", "WriteBehind > Write:: A queued write was rejected and is dropped.", e, {
+                    "collection": collection.full_name, "request": str(requests[failedIndex]) if failedIndex < len(requests) else None})
+                requests = requests[failedIndex + 1:]
+                if not requests:
+                    queryCache.invalidate(collection.database.name, collection.name)
+                    return
+            except PyMongoError as e:
+                logger.log("warning", f"WriteBehind > Write:: Attempt {attempt} failed, retrying.", e, {"collection": collection.full_name})
+                time.sleep(delay)
+                delay = min(delay * 2, 10)
+        logger.log("error", "WriteBehind > Write:: Giving up on queued writes.", params={"collection": collection.full_name, "count": len(requests)})
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Sends every pending write and waits until they are acknowledged (or dropped).
+
+        Returns:
+        - bool: True if the queue drained within `timeout`.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            # shortcut the batching delay for the writes already queued
+            self._flushing += 1
+            self._condition.notify_all()
+            try:
+                while self._pending or self._inflight:
+                    if self._pending:
+                        self._ensureWorker()
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                return True
+            finally:
+                self._flushing -= 1
+
+    def close(self, timeout: Optional[float] = 10):
+        """
+        Flushes the pending writes and stops the worker thread.
+        """
+        drained = self.flush(timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if not drained:
+            logger.log("warning", "WriteBehind > Close:: Pending writes were not acknowledged before exit.", params={"pending": self._size})
+
+# Process-wide write-behind queue, drained on exit
+writeBehind = WriteBehindQueue()
+atexit.register(writeBehind.close)